@@ -0,0 +1,251 @@
+"""
+Migration script to add hot-path indexes to the time_entries table
+Indexes are built with CREATE INDEX CONCURRENTLY so the table stays writable while they build
+Run this script against existing databases (fresh databases get them from create_all)
+Not needed once time_entries is partitioned (partition_time_entries.py creates the indexes)
+"""
+
+import json
+import uuid
+from sqlalchemy import text
+from app.database import engine
+from app.partitions import is_partitioned
+
+# (name, CREATE statement) - all partial on live rows
+INDEXES = [
+    (
+        "ix_time_entries_one_active_timer",
+        """
+        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_time_entries_one_active_timer
+        ON time_entries (user_id)
+        WHERE end_time IS NULL AND is_deleted = false;
+        """
+    ),
+    (
+        "ix_time_entries_user_start_time",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_time_entries_user_start_time
+        ON time_entries (user_id, start_time)
+        INCLUDE (end_time, duration_minutes, project_id, task_id)
+        WHERE is_deleted = false;
+        """
+    ),
+    (
+        "ix_time_entries_task_id",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_time_entries_task_id
+        ON time_entries (task_id)
+        WHERE is_deleted = false;
+        """
+    ),
+    (
+        "ix_time_entries_project_start_time",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_time_entries_project_start_time
+        ON time_entries (project_id, start_time)
+        WHERE is_deleted = false;
+        """
+    ),
+]
+
+# (description, hot query, index it must use)
+PLAN_CHECKS = [
+    (
+        "get_active_timer",
+        """
+        SELECT * FROM time_entries
+        WHERE user_id = :user_id AND end_time IS NULL AND is_deleted = false
+        LIMIT 1
+        """,
+        "ix_time_entries_one_active_timer"
+    ),
+    (
+        "get_time_entries_by_date_range",
+        """
+        SELECT * FROM time_entries
+        WHERE user_id = :user_id AND start_time >= now() - interval '30 days'
+          AND start_time <= now() AND is_deleted = false
+        """,
+        "ix_time_entries_user_start_time"
+    ),
+    (
+        "get_task_time_entries",
+        """
+        SELECT * FROM time_entries
+        WHERE task_id = :some_id AND is_deleted = false
+        """,
+        "ix_time_entries_task_id"
+    ),
+    (
+        "get_project_time_entries",
+        """
+        SELECT * FROM time_entries
+        WHERE project_id = :some_id AND is_deleted = false
+        """,
+        "ix_time_entries_project_start_time"
+    ),
+]
+
+
+def autocommit_connection():
+    """CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block"""
+    return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def find_duplicate_active_timers(conn):
+    """Users with more than one running timer would make the unique index build fail"""
+    result = conn.execute(text("""
+        SELECT user_id, count(*)
+        FROM time_entries
+        WHERE end_time IS NULL AND is_deleted = false
+        GROUP BY user_id
+        HAVING count(*) > 1;
+    """))
+    return result.fetchall()
+
+
+def drop_invalid_index(conn, index_name):
+    """A failed concurrent build leaves an INVALID index behind - drop it so it can be rebuilt"""
+    result = conn.execute(text("""
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name;
+    """), {"name": index_name})
+    row = result.fetchone()
+    if row and row[0]:
+        print(f"Dropping invalid index {index_name} left by a previous attempt...")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};"))
+
+
+def run_migration():
+    """Build the time_entries indexes without blocking writes"""
+    try:
+        with autocommit_connection() as conn:
+            print("Connected to database successfully!")
+
+            duplicates = find_duplicate_active_timers(conn)
+            if duplicates:
+                print("❌ Some users have more than one active timer; stop the extra timers first:")
+                for user_id, count in duplicates:
+                    print(f"  - user {user_id}: {count} active timers")
+                return
+
+            for index_name, statement in INDEXES:
+                drop_invalid_index(conn, index_name)
+                print(f"Building {index_name}...")
+                conn.execute(text(statement))
+                print(f"✅ Built {index_name}")
+
+            conn.execute(text("ANALYZE time_entries;"))
+            print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        print("Make sure your database is running and accessible.")
+
+
+def rollback_migration():
+    """Drop the time_entries indexes"""
+    try:
+        with autocommit_connection() as conn:
+            print("Rolling back migration...")
+            for index_name, _ in INDEXES:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};"))
+                print(f"✅ Dropped {index_name}")
+
+            print("✅ Rollback completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def plan_index_names(plan):
+    """Collect every 'Index Name' in an EXPLAIN (FORMAT JSON) plan tree"""
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= plan_index_names(child)
+    return names
+
+
+def check_query_plans():
+    """EXPLAIN each hot query and verify it uses its index"""
+    all_ok = True
+    try:
+        with engine.begin() as conn:
+            # Small tables make sequential scans look cheaper; force the planner to show index usage
+            conn.execute(text("SET LOCAL enable_seqscan = off;"))
+            params = {"user_id": uuid.uuid4(), "some_id": uuid.uuid4()}
+
+            for name, query, expected_index in PLAN_CHECKS:
+                result = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+                raw_plan = result.scalar()
+                plan = (json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan)[0]["Plan"]
+                used = plan_index_names(plan)
+
+                if expected_index in used:
+                    print(f"✅ {name}: uses {expected_index}")
+                else:
+                    all_ok = False
+                    print(f"❌ {name}: expected {expected_index}, plan uses {sorted(used) or 'no index'}")
+
+    except Exception as e:
+        print(f"❌ Error checking query plans: {e}")
+        return False
+
+    return all_ok
+
+
+def check_table_exists():
+    """Check if time_entries table exists"""
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_name = 'time_entries';
+            """))
+
+            tables = [row[0] for row in result.fetchall()]
+            return 'time_entries' in tables
+
+    except Exception as e:
+        print(f"❌ Error checking table: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("=== Time Entries Index Migration ===")
+
+    if not check_table_exists():
+        print("❌ time_entries table does not exist!")
+        print("Please create your database tables first by running your FastAPI app.")
+        exit(1)
+
+    with engine.connect() as conn:
+        if is_partitioned(conn):
+            print("✅ time_entries is partitioned; its indexes come from partition_time_entries.py")
+            exit(0)
+
+    print("1. Run migration (build indexes concurrently)")
+    print("2. Rollback migration (drop indexes)")
+    print("3. Check that hot queries use the indexes (EXPLAIN)")
+
+    choice = input("Enter your choice (1, 2, or 3): ").strip()
+
+    if choice == "1":
+        run_migration()
+    elif choice == "2":
+        confirm = input(
+            "Are you sure you want to rollback? This will drop the indexes! (y/N): ").strip().lower()
+        if confirm == 'y':
+            rollback_migration()
+        else:
+            print("Rollback cancelled.")
+    elif choice == "3":
+        if not check_query_plans():
+            exit(1)
+    else:
+        print("Invalid choice. Please run the script again.")
@@ -0,0 +1,231 @@
+# In-process caching helpers
+# backend/app/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= time.monotonic():
+                if entry is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl_seconds: float = None):
+        """Store value under key, evicting the least recently used entry when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop a single key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose (key, value) matches predicate"""
+        with self._lock:
+            stale = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class NonceLedger:
+    """Single-use nonces already spent, remembered until the value they came with expires"""
+
+    def __init__(self):
+        self._spent = {}  # nonce -> expires (unix time)
+        self._lock = threading.Lock()
+
+    def spend(self, nonce: str, expires: int) -> bool:
+        """True the first time a nonce is spent, False afterwards"""
+        now = time.time()
+        with self._lock:
+            if nonce in self._spent:
+                return False
+            if len(self._spent) >= 1024:
+                self._spent = {key: until for key, until in self._spent.items() if until >= now}
+            self._spent[nonce] = expires
+            return True
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache for computed responses, grouped into scopes (e.g. a user id)
+    that writes invalidate as a whole.
+
+    Entries are fresh for ttl_seconds, then served stale for up to stale_seconds more
+    while one background refresh recomputes them (stale-while-revalidate). Invalidated
+    entries are dropped, never served stale. A computation that started before an
+    invalidation of its scope is not stored, so a slow read can't cache pre-write data.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 60, stale_seconds: float = 300,
+                 refresh_workers: int = 2):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.refresh_workers = refresh_workers
+        self._entries = OrderedDict()  # (scope, key) -> (fresh_until, stale_until, value)
+        self._scope_keys = {}          # scope -> set of (scope, key)
+        self._generations = {}         # scope -> invalidation count
+        self._epoch = 0                # bumped by clear()
+        self._refreshing = set()
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _generation(self, scope):
+        return self._epoch, self._generations.get(scope, 0)
+
+    def _store(self, entry_key, value, generation):
+        scope = entry_key[0]
+        now = time.monotonic()
+        with self._lock:
+            if self._generation(scope) != generation:
+                return False
+            self._entries[entry_key] = (now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds, value)
+            self._entries.move_to_end(entry_key)
+            self._scope_keys.setdefault(scope, set()).add(entry_key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard_scope_key(evicted)
+                self.evictions += 1
+            return True
+
+    def _discard_scope_key(self, entry_key):
+        keys = self._scope_keys.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self._scope_keys[entry_key[0]]
+
+    def _refresh(self, entry_key, compute, generation):
+        try:
+            self._store(entry_key, compute(), generation)
+            with self._lock:
+                self.refreshes += 1
+        except Exception:
+            # Keep serving the stale value until it ages out
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(entry_key)
+
+    def get_or_compute(self, scope, key, compute, refresh=None):
+        """
+        Cached value for (scope, key), calling compute() on a miss.
+        refresh() recomputes a stale entry in the background (it runs on another
+        thread, so it must not reuse the caller's DB session); defaults to compute.
+        """
+        entry_key = (scope, key)
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation(scope)
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[entry_key]
+                self._discard_scope_key(entry_key)
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(entry_key)
+                if entry[0] > now:
+                    self.hits += 1
+                    return entry[2]
+
+                self.stale_hits += 1
+                if entry_key not in self._refreshing:
+                    self._refreshing.add(entry_key)
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.refresh_workers, thread_name_prefix="cache-refresh")
+                    self._executor.submit(self._refresh, entry_key, refresh or compute, generation)
+                return entry[2]
+
+            self.misses += 1
+
+        value = compute()
+        self._store(entry_key, value, generation)
+        return value
+
+    def invalidate_scope(self, scope):
+        """Drop every entry of scope and discard results of in-flight computations for it"""
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self.invalidations += 1
+            for entry_key in self._scope_keys.pop(scope, ()):
+                self._entries.pop(entry_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._scope_keys.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __len__(self):
+        return len(self._entries)
@@ -14,6 +14,13 @@ from .auth import (
     reactivate_user_account
 )
 
+# Cached token claims / current user
+from .auth_cache import (
+    get_token_claims,
+    get_cached_user,
+    invalidate_user_auth
+)
+
 # User profile management CRUD operations
 from .user import (
     get_users,
@@ -32,6 +39,7 @@ from .user import (
 from .workspace import (
     create_workspace,
     get_user_workspaces,
+    get_user_workspace_ids,
     get_workspace_by_id,
     update_workspace,
     add_workspace_member,
@@ -39,6 +47,7 @@ from .workspace import (
     remove_workspace_member,
     check_workspace_permission,
     get_workspace_members,
+    get_workspace_members_page,
     soft_delete_workspace
 )
 
@@ -47,6 +56,7 @@ from .project import (
     create_project,
     get_workspace_projects,
     get_user_projects,
+    get_user_projects_page,
     get_project_by_id,
     update_project,
     add_project_member,
@@ -61,6 +71,8 @@ from .project import (
 from .task import (
     create_task,
     get_project_tasks,
+    get_project_task_tree,
+    get_project_tasks_page,
     get_task_by_id,
     get_user_tasks,
     update_task,
@@ -68,14 +80,22 @@ from .task import (
     update_task_status,
     assign_task,
     unassign_task,
-    soft_delete_task
+    soft_delete_task,
+    soft_delete_task_subtree,
+    get_task_ancestors,
+    get_task_root_project_id,
+    get_task_root_project_ids
 )
 
 # Time Entry CRUD operations
 from .time_entry import (
     start_time_entry,
     stop_time_entry,
+    stop_active_timer,
     get_user_time_entries,
+    get_user_time_entries_page,
+    time_entry_conditions,
+    search_time_entries,
     get_project_time_entries,
     get_task_time_entries,
     update_time_entry,
@@ -83,5 +103,24 @@ from .time_entry import (
     create_manual_time_entry,
     get_time_entries_by_date_range,
     get_workspace_time_entries,
+    iter_time_entries_for_export,
     soft_delete_time_entry
 )
+
+# Bulk time entry import
+from .time_entry_import import import_time_entries_csv
+
+# Daily rollup CRUD operations
+from .rollup import (
+    add_time_entry_to_rollups,
+    remove_time_entry_from_rollups,
+    rebuild_daily_rollups,
+    get_user_rollup_totals,
+    get_user_rollup_breakdown
+)
+
+# Analytics CRUD operations
+from .analytics import (
+    get_productivity_metrics,
+    get_recent_activity_rows
+)
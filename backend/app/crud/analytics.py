@@ -0,0 +1,87 @@
+# Analytics CRUD operations
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from .. import models
+from ..cache import ResponseCache
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "5000"))
+# Results only change on time entry writes (which invalidate them) and as "recent" windows move
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+ANALYTICS_CACHE_STALE_SECONDS = float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "3600"))
+
+# Analytics responses keyed by user id (scope) and (endpoint, params)
+analytics_cache = ResponseCache(
+    max_entries=ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANALYTICS_CACHE_TTL_SECONDS,
+    stale_seconds=ANALYTICS_CACHE_STALE_SECONDS
+)
+
+
+def invalidate_user_analytics(user_id: uuid.UUID):
+    """Drop cached analytics of a user whose time entries changed (call after commit)"""
+    analytics_cache.invalidate_scope(str(user_id))
+
+
+def invalidate_all_analytics():
+    """Drop every cached analytics result, for writes spanning many users"""
+    analytics_cache.clear()
+
+
+def get_productivity_metrics(db: Session, user_id: uuid.UUID, recent_days: int = 7):
+    """Aggregate a user's totals, per-project minutes and recent minutes from daily_time_rollups"""
+    recent_day = (datetime.now(timezone.utc) - timedelta(days=recent_days)).date()
+    rollup = models.DailyTimeRollup
+
+    # Totals and the recent window in a single pass over the user's rollup rows
+    entries_count, total_minutes, recent_minutes = db.query(
+        func.coalesce(func.sum(rollup.entries_count), 0),
+        func.coalesce(func.sum(rollup.minutes), 0),
+        func.coalesce(func.sum(
+            case((rollup.day >= recent_day, rollup.minutes), else_=0)
+        ), 0)
+    ).filter(
+        rollup.user_id == user_id
+    ).one()
+
+    # Per-project minutes
+    project_rows = db.query(
+        models.Project.name,
+        func.sum(rollup.minutes)
+    ).select_from(rollup).join(
+        models.Project, models.Project.id == rollup.project_id
+    ).filter(
+        rollup.user_id == user_id
+    ).group_by(models.Project.name).having(
+        func.sum(rollup.entries_count) > 0
+    ).all()
+
+    return {
+        "entries_count": int(entries_count),
+        "total_minutes": float(total_minutes),
+        "recent_minutes": float(recent_minutes),
+        "project_minutes": {name: float(project_minutes or 0) for name, project_minutes in project_rows}
+    }
+
+
+def get_recent_activity_rows(db: Session, user_id: uuid.UUID, days: int = 30):
+    """Get a user's recent entries with task and project names joined in one query"""
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+
+    return db.query(
+        models.TimeEntry.start_time,
+        models.TimeEntry.created_at,
+        models.TimeEntry.duration_minutes,
+        models.Task.name.label("task_name"),
+        models.Project.name.label("project_name")
+    ).select_from(models.TimeEntry).outerjoin(
+        models.Task, models.Task.id == models.TimeEntry.task_id
+    ).outerjoin(
+        models.Project, models.Project.id == models.Task.project_id
+    ).filter(
+        models.TimeEntry.user_id == user_id,
+        models.TimeEntry.is_deleted == False,
+        models.TimeEntry.created_at >= cutoff_date
+    ).order_by(models.TimeEntry.created_at.desc()).all()
@@ -0,0 +1,11 @@
+# Async authentication CRUD operations (AsyncSession)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+import uuid
+
+
+async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID):
+    """Get user by ID - used for token validation"""
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalars().first()
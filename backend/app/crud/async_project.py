@@ -0,0 +1,16 @@
+# Async project CRUD operations (AsyncSession)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..schemas.project import ProjectRole
+import uuid
+
+
+async def check_project_permission(db: AsyncSession, project_id: uuid.UUID, user_id: uuid.UUID, required_role: ProjectRole = ProjectRole.MEMBER):
+    """Check if user has required permission in project"""
+    result = await db.execute(select(models.ProjectMember.user_id).where(
+        models.ProjectMember.project_id == project_id,
+        models.ProjectMember.user_id == user_id,
+        models.ProjectMember.role >= required_role
+    ).limit(1))
+    return result.first() is not None
@@ -0,0 +1,14 @@
+# Async task CRUD operations (AsyncSession)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+import uuid
+
+
+async def get_task_by_id(db: AsyncSession, task_id: uuid.UUID):
+    """Get task by ID"""
+    result = await db.execute(select(models.Task).where(
+        models.Task.id == task_id,
+        models.Task.is_deleted == False
+    ))
+    return result.scalars().first()
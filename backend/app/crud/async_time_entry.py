@@ -0,0 +1,235 @@
+# Async time entry CRUD operations (AsyncSession)
+# Mirrors crud/time_entry.py for routers running on the async engine
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from .. import models
+from ..schemas.time_entry import TimeEntryCreate, TimeEntryStop, TimeEntryUpdate, TimeEntrySortField
+from ..events import timer_events, TIMER_STARTED, TIMER_STOPPED, TIMER_UPDATED, TIMER_DELETED
+from ..pagination import apply_keyset, split_page, DEFAULT_PAGE_SIZE
+from .rollup import rollup_delta
+from .analytics import invalidate_user_analytics
+from .time_entry import (
+    time_entry_conditions, time_entry_sort_column,
+    START_TIMER_SQL, STOP_TIMER_SQL, start_timer_params,
+    project_workspace_cache, timer_event_payload
+)
+import uuid
+from datetime import datetime, timezone
+
+
+async def get_project_workspace_id(db: AsyncSession, project_id: uuid.UUID):
+    """Workspace of a project (cached, shared with the sync CRUD)"""
+    workspace_id = project_workspace_cache.get(project_id)
+    if workspace_id is None:
+        result = await db.execute(select(models.Project.workspace_id).where(
+            models.Project.id == project_id
+        ))
+        workspace_id = result.scalar()
+        if workspace_id is not None:
+            project_workspace_cache.set(project_id, workspace_id)
+    return workspace_id
+
+
+async def publish_timer_event(db: AsyncSession, event_type: str, payload: dict):
+    """Push a committed timer change (a timer_event_payload) to live stream subscribers"""
+    timer_events.publish(
+        event_type,
+        payload["user_id"],
+        await get_project_workspace_id(db, uuid.UUID(payload["project_id"])),
+        payload
+    )
+
+
+async def start_time_entry(db: AsyncSession, time_entry: TimeEntryCreate):
+    """Start a new time entry (timer) in a single round trip"""
+    result = await db.execute(
+        select(models.TimeEntry).from_statement(START_TIMER_SQL),
+        start_timer_params(time_entry)
+    )
+    db_time_entry = result.scalars().first()
+
+    if db_time_entry is None:
+        await db.rollback()
+        raise HTTPException(400, "You already have an active timer. Stop it before starting a new one.")
+
+    await db.commit()
+    invalidate_user_analytics(time_entry.user_id)
+    await publish_timer_event(db, TIMER_STARTED, timer_event_payload(db_time_entry))
+    return db_time_entry
+
+
+async def stop_active_timer(db: AsyncSession, user_id: uuid.UUID):
+    """Stop the user's running timer in a single round trip; None if no timer was running"""
+    result = await db.execute(
+        select(models.TimeEntry).from_statement(STOP_TIMER_SQL),
+        {"user_id": user_id}
+    )
+    db_time_entry = result.scalars().first()
+    await db.commit()
+    if db_time_entry is not None:
+        invalidate_user_analytics(user_id)
+        await publish_timer_event(db, TIMER_STOPPED, timer_event_payload(db_time_entry))
+    return db_time_entry
+
+
+async def stop_time_entry(db: AsyncSession, time_entry_id: uuid.UUID, stop_data: TimeEntryStop):
+    """Stop an active time entry"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.id == time_entry_id,
+        models.TimeEntry.end_time.is_(None)  # Only stop active timers
+    ))
+    db_time_entry = result.scalars().first()
+
+    if db_time_entry:
+        await db.execute(delete(models.ActiveTimer).where(models.ActiveTimer.time_entry_id == db_time_entry.id))
+        db_time_entry.end_time = stop_data.end_time
+        db_time_entry.duration_minutes = stop_data.duration_minutes
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        await db.execute(rollup_delta(db_time_entry))
+        await db.commit()
+        invalidate_user_analytics(db_time_entry.user_id)
+        await publish_timer_event(db, TIMER_STOPPED, timer_event_payload(db_time_entry))
+
+    return db_time_entry
+
+
+async def get_time_entry_by_id(db: AsyncSession, time_entry_id: uuid.UUID):
+    """Get time entry by ID"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.id == time_entry_id,
+        models.TimeEntry.is_deleted == False
+    ))
+    return result.scalars().first()
+
+
+async def get_user_time_entries(db: AsyncSession, user_id: uuid.UUID, active_only: bool = False):
+    """Get time entries for a user"""
+    query = select(models.TimeEntry).where(
+        models.TimeEntry.user_id == user_id,
+        models.TimeEntry.is_deleted == False
+    )
+
+    if active_only:
+        query = query.where(models.TimeEntry.end_time.is_(None))
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def search_time_entries(db: AsyncSession, sort_by: TimeEntrySortField = TimeEntrySortField.START_TIME,
+                              descending: bool = True, cursor: str = None, limit: int = None, **filters):
+    """Async search_time_entries - same filters, sorting and (entries, next_cursor) result"""
+    query = select(models.TimeEntry).where(*time_entry_conditions(**filters))
+    sort_column = time_entry_sort_column(sort_by)
+
+    if cursor or limit:
+        limit = limit or DEFAULT_PAGE_SIZE
+        query = apply_keyset(query, sort_column, models.TimeEntry.id, cursor, limit, descending)
+        result = await db.execute(query)
+        return split_page(result.scalars().all(), sort_column, models.TimeEntry.id, limit)
+
+    order = (sort_column.desc(), models.TimeEntry.id.desc()) if descending else (sort_column, models.TimeEntry.id)
+    result = await db.execute(query.order_by(*order))
+    return result.scalars().all(), None
+
+
+async def get_user_time_entries_page(db: AsyncSession, user_id: uuid.UUID, start_date: datetime = None, end_date: datetime = None,
+                                     task_id: uuid.UUID = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of a user's time entries, newest first, keyed on (start_time, id)"""
+    return await search_time_entries(
+        db, cursor=cursor, limit=limit,
+        user_id=user_id, start_date=start_date, end_date=end_date, task_id=task_id)
+
+
+async def get_task_time_entries(db: AsyncSession, task_id: uuid.UUID):
+    """Get all time entries for a task"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.task_id == task_id,
+        models.TimeEntry.is_deleted == False
+    ))
+    return result.scalars().all()
+
+
+async def update_time_entry(db: AsyncSession, time_entry_id: uuid.UUID, update_data: TimeEntryUpdate):
+    """Update time entry description"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.id == time_entry_id
+    ))
+    db_time_entry = result.scalars().first()
+
+    if db_time_entry:
+        if update_data.description is not None:
+            db_time_entry.description = update_data.description
+
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        if db_time_entry.end_time is None:
+            await publish_timer_event(db, TIMER_UPDATED, timer_event_payload(db_time_entry))
+
+    return db_time_entry
+
+
+async def get_active_timer(db: AsyncSession, user_id: uuid.UUID):
+    """Get currently active timer for user"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.user_id == user_id,
+        models.TimeEntry.end_time.is_(None),
+        models.TimeEntry.is_deleted == False
+    ).limit(1))
+    return result.scalars().first()
+
+
+async def create_manual_time_entry(db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, task_id: uuid.UUID,
+                                   start_time: datetime, end_time: datetime, description: str = None):
+    """Create a completed time entry manually (not from timer)"""
+    duration_minutes = (end_time - start_time).total_seconds() / 60
+
+    db_time_entry = models.TimeEntry(
+        start_time=start_time,
+        end_time=end_time,
+        duration_minutes=duration_minutes,
+        description=description,
+        user_id=user_id,
+        project_id=project_id,
+        task_id=task_id
+    )
+    db.add(db_time_entry)
+    await db.execute(rollup_delta(db_time_entry))
+    await db.commit()
+    invalidate_user_analytics(user_id)
+    return db_time_entry
+
+
+async def get_time_entries_by_date_range(db: AsyncSession, user_id: uuid.UUID, start_date: datetime, end_date: datetime):
+    """Get time entries for a user within a date range"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.user_id == user_id,
+        models.TimeEntry.start_time >= start_date,
+        models.TimeEntry.start_time <= end_date,
+        models.TimeEntry.is_deleted == False
+    ))
+    return result.scalars().all()
+
+
+async def soft_delete_time_entry(db: AsyncSession, time_entry_id: uuid.UUID):
+    """Soft delete time entry"""
+    result = await db.execute(select(models.TimeEntry).where(
+        models.TimeEntry.id == time_entry_id
+    ))
+    db_time_entry = result.scalars().first()
+
+    if db_time_entry:
+        was_running = db_time_entry.end_time is None and not db_time_entry.is_deleted
+        if db_time_entry.end_time is None:
+            await db.execute(delete(models.ActiveTimer).where(models.ActiveTimer.time_entry_id == db_time_entry.id))
+        if db_time_entry.end_time is not None and not db_time_entry.is_deleted:
+            await db.execute(rollup_delta(db_time_entry, -1))
+        db_time_entry.is_deleted = True
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        invalidate_user_analytics(db_time_entry.user_id)
+        if was_running:
+            await publish_timer_event(db, TIMER_DELETED, timer_event_payload(db_time_entry))
+        return True
+    return False
@@ -2,7 +2,9 @@
 from sqlalchemy.orm import Session
 from .. import models
 from ..schemas.auth import UserSignup
-from ..utils import get_password_hash, verify_password
+from ..utils import get_password_hash, verify_password, verify_and_update_password
+from .auth_cache import invalidate_user_auth
+from ..unit_of_work import commit, on_commit
 import uuid
 
 
@@ -25,8 +27,7 @@ def create_user(db: Session, user: UserSignup):
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    commit(db)
     return db_user
 
 
@@ -35,8 +36,15 @@ def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
+
+    # Transparently upgrade hashes made with an older bcrypt work factor
+    if new_hash:
+        user.hashed_password = new_hash
+        commit(db)
+        on_commit(db, lambda: invalidate_user_auth(user.id))
     return user
 
 
@@ -60,8 +68,8 @@ def reset_user_password(db: Session, email: str, new_password: str):
     
     # Update password
     user.hashed_password = get_password_hash(new_password)
-    db.commit()
-    db.refresh(user)
+    commit(db)
+    on_commit(db, lambda: invalidate_user_auth(user.id))
     return True
 
 
@@ -85,7 +93,7 @@ def request_password_reset(db: Session, email: str):
 
 def change_password(db: Session, user_id: uuid.UUID, current_password: str, new_password: str):
     """Change user password with current password verification"""
-    from datetime import datetime
+    from datetime import datetime, timezone
 
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
@@ -97,43 +105,44 @@ def change_password(db: Session, user_id: uuid.UUID, current_password: str, new_
 
     # Update password
     user.hashed_password = get_password_hash(new_password)
-    user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    user.updated_at = datetime.now(timezone.utc)
+    commit(db)
+    on_commit(db, lambda: invalidate_user_auth(user.id))
     return user
 
 
 def reset_password(db: Session, email: str, new_password: str):
     """Reset password for password recovery (without current password)"""
-    from datetime import datetime
+    from datetime import datetime, timezone
 
     user = get_user_by_email(db, email)
     if not user:
         return None
 
     user.hashed_password = get_password_hash(new_password)
-    user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(user)
+    user.updated_at = datetime.now(timezone.utc)
+    commit(db)
+    on_commit(db, lambda: invalidate_user_auth(user.id))
     return user
 
 
 def deactivate_user_account(db: Session, user_id: uuid.UUID):
     """Deactivate user account (disable login but keep data)"""
-    from datetime import datetime
+    from datetime import datetime, timezone
 
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user:
         user.is_active = False
-        user.updated_at = datetime.utcnow()
-        db.commit()
+        user.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_auth(user.id))
         return True
     return False
 
 
 def reactivate_user_account(db: Session, user_id: uuid.UUID):
     """Reactivate user account"""
-    from datetime import datetime
+    from datetime import datetime, timezone
 
     user = db.query(models.User).filter(
         models.User.id == user_id,
@@ -141,7 +150,8 @@ def reactivate_user_account(db: Session, user_id: uuid.UUID):
     ).first()
     if user:
         user.is_active = True
-        user.updated_at = datetime.utcnow()
-        db.commit()
+        user.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_auth(user.id))
         return True
     return False
@@ -0,0 +1,93 @@
+# Cached token verification and current-user resolution
+# Hot path of get_current_user: token hash -> decoded claims, user id -> user column snapshot
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from ..cache import TTLCache
+from ..utils import decode_token, ACCESS_TOKEN_EXPIRE_MINUTES
+import hashlib
+import os
+import time
+import uuid
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "50000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Entries live until the token's own exp (set per entry)
+token_claims_cache = TTLCache(
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# Column values only - ORM instances can't be shared across sessions
+user_cache = TTLCache(
+    max_entries=USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=USER_CACHE_TTL_SECONDS
+)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_token_claims(token: str):
+    """Decoded claims of a valid token (cached until it expires), or None"""
+    key = _token_key(token)
+    claims = token_claims_cache.get(key)
+    if claims is not None:
+        return claims
+
+    claims = decode_token(token)
+    # Access tokens carry no "type"; reset tokens and stream tickets are not bearer tokens
+    if claims is None or claims.get("sub") is None or claims.get("type") is not None:
+        return None
+
+    ttl = claims["exp"] - time.time() if "exp" in claims else None
+    if ttl is None or ttl > 0:
+        token_claims_cache.set(key, claims, ttl)
+    return claims
+
+
+def _snapshot(user: models.User):
+    return {column.key: getattr(user, column.key) for column in models.User.__table__.columns}
+
+
+def _from_snapshot(snapshot: dict):
+    """Detached User carrying the cached column values, ready for Session.merge(load=False)"""
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_cached_user(db: Session, user_id: uuid.UUID):
+    """User by ID attached to db; served from user_cache without a query when possible"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return db.merge(_from_snapshot(snapshot), load=False)
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is not None:
+        user_cache.set(user_id, _snapshot(user))
+    return user
+
+
+async def get_cached_user_async(db: AsyncSession, user_id: uuid.UUID):
+    """Async get_cached_user, sharing the same cache"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return await db.merge(_from_snapshot(snapshot), load=False)
+
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    user = result.scalars().first()
+    if user is not None:
+        user_cache.set(user_id, _snapshot(user))
+    return user
+
+
+def invalidate_user_auth(user_id: uuid.UUID):
+    """Drop a user's cached snapshot and every cached token claim issued to them"""
+    user_id = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+    user_cache.invalidate(user_id)
+    token_claims_cache.invalidate_where(lambda key, claims: claims.get("sub") == str(user_id))
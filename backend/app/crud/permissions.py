@@ -0,0 +1,126 @@
+# Effective-role resolution with a TTL/LRU cache
+# Shared by check_project_access, check_task_access and check_workspace_access
+from collections import namedtuple
+from sqlalchemy.orm import Session
+from .. import models
+from ..cache import TTLCache
+import os
+import uuid
+
+PERMISSION_CACHE_TTL_SECONDS = float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "60"))
+PERMISSION_CACHE_MAX_ENTRIES = int(os.getenv("PERMISSION_CACHE_MAX_ENTRIES", "10000"))
+
+permission_cache = TTLCache(
+    max_entries=PERMISSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=PERMISSION_CACHE_TTL_SECONDS
+)
+
+# is_manager: workspace owner or project creator
+# member_role: role of the active project membership, None if not a member
+ProjectAccess = namedtuple("ProjectAccess", ["workspace_id", "is_manager", "member_role"])
+
+# is_owner: workspace owner, is_member: has an active membership row
+WorkspaceAccess = namedtuple("WorkspaceAccess", ["is_owner", "is_member"])
+
+
+def _as_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def get_project_access(db: Session, project_id: uuid.UUID, user_id: uuid.UUID):
+    """Get the user's cached ProjectAccess for a project, or None if the project does not exist"""
+    project_id, user_id = _as_uuid(project_id), _as_uuid(user_id)
+    key = ("project", project_id, user_id)
+
+    access = permission_cache.get(key)
+    if access is not None:
+        return access
+
+    # Project, workspace owner and membership in one round trip
+    row = db.query(
+        models.Project.workspace_id,
+        models.Project.creator_id,
+        models.Workspace.owner_id,
+        models.ProjectMember.role
+    ).join(
+        models.Workspace, models.Workspace.id == models.Project.workspace_id
+    ).outerjoin(
+        models.ProjectMember,
+        (models.ProjectMember.project_id == models.Project.id) &
+        (models.ProjectMember.user_id == user_id) &
+        (models.ProjectMember.is_deleted == False)
+    ).filter(
+        models.Project.id == project_id,
+        models.Project.is_deleted == False
+    ).first()
+
+    if not row:
+        return None
+
+    access = ProjectAccess(
+        workspace_id=row.workspace_id,
+        is_manager=row.owner_id == user_id or row.creator_id == user_id,
+        member_role=row.role
+    )
+    permission_cache.set(key, access)
+    return access
+
+
+def get_workspace_access(db: Session, workspace_id: uuid.UUID, user_id: uuid.UUID):
+    """Get the user's cached WorkspaceAccess for a workspace, or None if the workspace does not exist"""
+    workspace_id, user_id = _as_uuid(workspace_id), _as_uuid(user_id)
+    key = ("workspace", workspace_id, user_id)
+
+    access = permission_cache.get(key)
+    if access is not None:
+        return access
+
+    row = db.query(
+        models.Workspace.owner_id,
+        models.WorkspaceMember.id.label("member_id")
+    ).outerjoin(
+        models.WorkspaceMember,
+        (models.WorkspaceMember.workspace_id == models.Workspace.id) &
+        (models.WorkspaceMember.user_id == user_id) &
+        (models.WorkspaceMember.is_deleted == False)
+    ).filter(
+        models.Workspace.id == workspace_id,
+        models.Workspace.is_deleted == False
+    ).first()
+
+    if not row:
+        return None
+
+    access = WorkspaceAccess(
+        is_owner=row.owner_id == user_id,
+        is_member=row.member_id is not None
+    )
+    permission_cache.set(key, access)
+    return access
+
+
+def invalidate_project_access(project_id: uuid.UUID, user_id: uuid.UUID = None):
+    """Drop cached roles for one member of a project, or for every user when user_id is None"""
+    project_id = _as_uuid(project_id)
+    if user_id is not None:
+        permission_cache.invalidate(("project", project_id, _as_uuid(user_id)))
+    else:
+        permission_cache.invalidate_where(
+            lambda key, _: key[0] == "project" and key[1] == project_id)
+
+
+def invalidate_workspace_access(workspace_id: uuid.UUID, user_id: uuid.UUID = None):
+    """Drop cached roles for one member of a workspace, or the whole workspace and its projects"""
+    workspace_id = _as_uuid(workspace_id)
+    if user_id is not None:
+        permission_cache.invalidate(("workspace", workspace_id, _as_uuid(user_id)))
+    else:
+        permission_cache.invalidate_where(
+            lambda key, value: (key[0] == "workspace" and key[1] == workspace_id) or
+            (key[0] == "project" and value.workspace_id == workspace_id))
+
+
+def invalidate_user_access(user_id: uuid.UUID):
+    """Drop every cached role held by a user"""
+    user_id = _as_uuid(user_id)
+    permission_cache.invalidate_where(lambda key, _: key[2] == user_id)
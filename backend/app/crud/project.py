@@ -6,8 +6,11 @@ from ..schemas.project import (
     ProjectCreate, ProjectUpdate, ProjectMemberCreate,
     ProjectMemberUpdate, ProjectRole, ProjectStatus
 )
+from .permissions import get_project_access, invalidate_project_access
+from ..pagination import paginate, DEFAULT_PAGE_SIZE
+from ..unit_of_work import transaction, commit, on_commit
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def check_project_access(db: Session, project_id: str, user_id: str, required_role: ProjectRole = ProjectRole.MEMBER):
@@ -35,32 +38,18 @@ def check_project_access(db: Session, project_id: str, user_id: str, required_ro
     if not project:
         raise HTTPException(404, "Project not found")
 
-    # Check if user is workspace owner (automatic MANAGER access)
-    workspace_owner = db.query(models.Workspace).filter(
-        models.Workspace.id == project.workspace_id,
-        models.Workspace.owner_id == user_uuid
-    ).first()
+    # Resolve effective role (cached per user and project)
+    access = get_project_access(db, project.id, user_uuid)
+    if not access:
+        raise HTTPException(404, "Project not found")
 
-    if workspace_owner:
+    # 2-TIER LOGIC: Workspace owner / Creator = MANAGER, Members = MEMBER
+    if access.is_manager:
         user_effective_role = ProjectRole.MANAGER
+    elif access.member_role is not None:
+        user_effective_role = ProjectRole.MEMBER
     else:
-        # 2-TIER LOGIC: Creator = MANAGER, Members = MEMBER
-        is_creator = project.creator_id == user_uuid
-
-        if is_creator:
-            user_effective_role = ProjectRole.MANAGER
-        else:
-            # Check if user is a member
-            is_member = db.query(models.ProjectMember).filter(
-                models.ProjectMember.project_id == project.id,
-                models.ProjectMember.user_id == user_uuid,
-                models.ProjectMember.is_deleted == False
-            ).first()
-
-            if is_member:
-                user_effective_role = ProjectRole.MEMBER
-            else:
-                raise HTTPException(403, "Not a project member")
+        raise HTTPException(403, "Not a project member")
 
     # Check permission level (MANAGER=1, MEMBER=2, lower = higher privilege)
     if user_effective_role <= required_role:
@@ -72,55 +61,36 @@ def check_project_access(db: Session, project_id: str, user_id: str, required_ro
 
 def create_project(db: Session, project: ProjectCreate, creator_id: uuid.UUID):
     """Create new project within workspace and auto-add workspace owner as MANAGER"""
-    db_project = models.Project(
-        name=project.name,
-        description=project.description,
-        deadline=project.deadline,
-        status=project.status,
-        workspace_id=project.workspace_id,
-        creator_id=creator_id
-    )
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-
-    # Add creator as MANAGER (MUST BE COMMITTED)
-    creator_member = models.ProjectMember(
-        project_id=db_project.id,
-        user_id=creator_id,
-        role=ProjectRole.MANAGER
-    )
-    db.add(creator_member)
-    db.commit()  # ← COMMIT CREATOR IMMEDIATELY
-    db.refresh(creator_member)
-
-    # Auto-add workspace owner as MANAGER (if different from creator)
-    workspace = db.query(models.Workspace).filter(
-        models.Workspace.id == project.workspace_id
-    ).first()
-
-    if workspace and workspace.owner_id != creator_id:
-        # Check if workspace owner already exists as a member (soft delete scenario)
-        existing_member = db.query(models.ProjectMember).filter(
-            models.ProjectMember.project_id == db_project.id,
-            models.ProjectMember.user_id == workspace.owner_id
-        ).first()
-
-        if existing_member:
-            # Reactivate and set as MANAGER
-            existing_member.is_deleted = False
-            existing_member.deleted_at = None
-            existing_member.role = ProjectRole.MANAGER
-        else:
-            # Add new workspace owner as MANAGER
-            workspace_owner_member = models.ProjectMember(
+    # Normally already in the identity map from the route's workspace access check
+    workspace = db.get(models.Workspace, project.workspace_id)
+
+    # Project and memberships are written in one transaction (one INSERT per table)
+    with transaction(db):
+        db_project = models.Project(
+            id=uuid.uuid4(),
+            name=project.name,
+            description=project.description,
+            deadline=project.deadline,
+            status=project.status,
+            workspace_id=project.workspace_id,
+            creator_id=creator_id
+        )
+        db.add(db_project)
+
+        # Add creator as MANAGER
+        db.add(models.ProjectMember(
+            project_id=db_project.id,
+            user_id=creator_id,
+            role=ProjectRole.MANAGER
+        ))
+
+        # Auto-add workspace owner as MANAGER (if different from creator)
+        if workspace and workspace.owner_id != creator_id:
+            db.add(models.ProjectMember(
                 project_id=db_project.id,
                 user_id=workspace.owner_id,
                 role=ProjectRole.MANAGER
-            )
-            db.add(workspace_owner_member)
-
-        db.commit()  # ← COMMIT WORKSPACE OWNER CHANGES
+            ))
 
     return db_project
 
@@ -152,6 +122,16 @@ def get_user_projects(db: Session, user_id: uuid.UUID):
     ).all()
 
 
+def get_user_projects_page(db: Session, user_id: uuid.UUID, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of the user's projects keyed on (created_at, id)"""
+    query = db.query(models.Project).join(models.ProjectMember).filter(
+        models.ProjectMember.user_id == user_id,
+        models.ProjectMember.is_deleted == False,
+        models.Project.is_deleted == False
+    )
+    return paginate(query, models.Project.created_at, models.Project.id, cursor, limit)
+
+
 def get_project_by_id(db: Session, project_id: uuid.UUID):
     """Get project with members"""
     return db.query(models.Project).filter(
@@ -162,18 +142,15 @@ def get_project_by_id(db: Session, project_id: uuid.UUID):
 
 def update_project(db: Session, project_id: uuid.UUID, project_update: ProjectUpdate):
     """Update project details"""
-    db_project = db.query(models.Project).filter(
-        models.Project.id == project_id
-    ).first()
+    db_project = db.get(models.Project, project_id)
 
     if db_project:
         update_data = project_update.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_project, key, value)
 
-        db_project.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_project)
+        db_project.updated_at = datetime.now(timezone.utc)
+        commit(db)
 
     return db_project
 
@@ -192,9 +169,9 @@ def add_project_member(db: Session, project_id: uuid.UUID, member_data: ProjectM
             existing_member.is_deleted = False
             existing_member.deleted_at = None
             existing_member.role = ProjectRole.MEMBER  # Force MEMBER role
-            existing_member.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(existing_member)
+            existing_member.updated_at = datetime.now(timezone.utc)
+            commit(db)
+            on_commit(db, lambda: invalidate_project_access(project_id, member_data.user_id))
             return existing_member
         else:
             # Member already exists and is active
@@ -209,8 +186,8 @@ def add_project_member(db: Session, project_id: uuid.UUID, member_data: ProjectM
         deleted_at=None
     )
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    commit(db)
+    on_commit(db, lambda: invalidate_project_access(project_id, member_data.user_id))
     return db_member
 
 
@@ -218,13 +195,12 @@ def update_project_member_role(db: Session, project_id: uuid.UUID, user_id: uuid
     """Update member role in project with workspace owner protection"""
 
     # Get project and workspace info
-    project = db.query(models.Project).filter(
-        models.Project.id == project_id).first()
+    # Identity map lookups: the route's access check has usually loaded both already
+    project = db.get(models.Project, project_id)
     if not project:
         raise HTTPException(404, "Project not found")
 
-    workspace = db.query(models.Workspace).filter(
-        models.Workspace.id == project.workspace_id).first()
+    workspace = db.get(models.Workspace, project.workspace_id)
 
     # Check if target user is workspace owner
     is_target_workspace_owner = workspace and workspace.owner_id == user_id
@@ -248,9 +224,9 @@ def update_project_member_role(db: Session, project_id: uuid.UUID, user_id: uuid
 
     if db_member:
         db_member.role = role
-        db_member.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_member)
+        db_member.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_project_access(project_id, user_id))
 
     return db_member
 
@@ -259,13 +235,12 @@ def remove_project_member(db: Session, project_id: uuid.UUID, user_id: uuid.UUID
     """Remove member from project (soft delete) with workspace owner protection"""
 
     # Get project and workspace info
-    project = db.query(models.Project).filter(
-        models.Project.id == project_id).first()
+    # Identity map lookups: the route's access check has usually loaded both already
+    project = db.get(models.Project, project_id)
     if not project:
         raise HTTPException(404, "Project not found")
 
-    workspace = db.query(models.Workspace).filter(
-        models.Workspace.id == project.workspace_id).first()
+    workspace = db.get(models.Workspace, project.workspace_id)
 
     # PROTECTION: Cannot remove workspace owner
     is_target_workspace_owner = workspace and workspace.owner_id == user_id
@@ -289,7 +264,8 @@ def remove_project_member(db: Session, project_id: uuid.UUID, user_id: uuid.UUID
     if db_member:
         db_member.is_deleted = True
         db_member.deleted_at = datetime.utcnow()
-        db.commit()
+        commit(db)
+        on_commit(db, lambda: invalidate_project_access(project_id, user_id))
         return True
     return False
 
@@ -315,13 +291,12 @@ def get_project_members(db: Session, project_id: uuid.UUID):
 
 def soft_delete_project(db: Session, project_id: uuid.UUID):
     """Soft delete project"""
-    db_project = db.query(models.Project).filter(
-        models.Project.id == project_id
-    ).first()
+    db_project = db.get(models.Project, project_id)
 
     if db_project:
         db_project.is_deleted = True
-        db_project.updated_at = datetime.utcnow()
-        db.commit()
+        db_project.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_project_access(project_id))
         return True
     return False
@@ -0,0 +1,174 @@
+# Daily rollup maintenance and reads
+# Writers call these before their own commit so rollups change in the same transaction as time_entries
+from sqlalchemy import func, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import models
+import uuid
+from datetime import date, datetime, timezone
+
+Rollup = models.DailyTimeRollup
+
+
+def rollup_day(start_time: datetime) -> date:
+    """UTC day a time entry is rolled up under (naive timestamps are treated as UTC)"""
+    if start_time.tzinfo is None:
+        return start_time.date()
+    return start_time.astimezone(timezone.utc).date()
+
+
+def _rollup_day_sql(start_time_column):
+    return func.date(func.timezone("UTC", start_time_column))
+
+
+def _upsert(stmt):
+    """Add incoming minutes/counts onto existing rollup rows"""
+    return stmt.on_conflict_do_update(
+        index_elements=[Rollup.user_id, Rollup.day, Rollup.project_id, Rollup.task_id],
+        set_={
+            "minutes": Rollup.minutes + stmt.excluded.minutes,
+            "entries_count": Rollup.entries_count + stmt.excluded.entries_count,
+            "updated_at": func.now()
+        }
+    )
+
+
+def rollup_delta(time_entry: models.TimeEntry, sign: int = 1):
+    """
+    Upsert statement adding (sign=1) or removing (sign=-1) one completed entry.
+    Returned rather than executed so sync and async sessions can share it.
+    """
+    return _upsert(insert(Rollup).values(
+        user_id=time_entry.user_id,
+        day=rollup_day(time_entry.start_time),
+        project_id=time_entry.project_id,
+        task_id=time_entry.task_id,
+        minutes=sign * (time_entry.duration_minutes or 0),
+        entries_count=sign,
+        updated_at=func.now()
+    ))
+
+
+def rollup_delta_from_rows(rows, sign: int = 1):
+    """
+    Upsert statement applying a set of entry rows (a subquery/CTE exposing user_id, project_id,
+    task_id, start_time, end_time and duration_minutes), e.g. the RETURNING of a bulk update.
+    Running timers (end_time IS NULL) are skipped.
+    """
+    day = _rollup_day_sql(rows.c.start_time)
+    grouped = select(
+        rows.c.user_id,
+        day,
+        rows.c.project_id,
+        rows.c.task_id,
+        sign * func.sum(func.coalesce(rows.c.duration_minutes, 0)),
+        sign * func.count(),
+        func.now()
+    ).where(
+        rows.c.end_time.isnot(None)
+    ).group_by(rows.c.user_id, day, rows.c.project_id, rows.c.task_id)
+
+    return _upsert(insert(Rollup).from_select(
+        ["user_id", "day", "project_id", "task_id", "minutes", "entries_count", "updated_at"],
+        grouped
+    ))
+
+
+def rollup_upsert_sql(source: str, sign: int = 1) -> str:
+    """
+    Raw-SQL counterpart of rollup_delta_from_rows for data-modifying CTEs: upserts the completed
+    rows of CTE `source` (exposing user_id, project_id, task_id, start_time, end_time, duration_minutes)
+    """
+    return f"""
+        INSERT INTO daily_time_rollups (user_id, day, project_id, task_id, minutes, entries_count, updated_at)
+        SELECT user_id, date(timezone('UTC', start_time)), project_id, task_id,
+               {sign} * sum(coalesce(duration_minutes, 0)), {sign} * count(*), now()
+        FROM {source}
+        WHERE end_time IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (user_id, day, project_id, task_id) DO UPDATE SET
+            minutes = daily_time_rollups.minutes + EXCLUDED.minutes,
+            entries_count = daily_time_rollups.entries_count + EXCLUDED.entries_count,
+            updated_at = now()
+    """
+
+
+def add_time_entry_to_rollups(db: Session, time_entry: models.TimeEntry):
+    """Count a completed entry in its day's rollup (caller commits)"""
+    if time_entry.end_time is not None and not time_entry.is_deleted:
+        db.execute(rollup_delta(time_entry, 1))
+
+
+def remove_time_entry_from_rollups(db: Session, time_entry: models.TimeEntry):
+    """Take a completed entry back out of its day's rollup (caller commits)"""
+    if time_entry.end_time is not None and not time_entry.is_deleted:
+        db.execute(rollup_delta(time_entry, -1))
+
+
+def rebuild_daily_rollups(db: Session, user_id: uuid.UUID = None):
+    """Recompute rollups from time_entries, for everyone or a single user"""
+    clear = delete(Rollup)
+    entries = select(models.TimeEntry).where(models.TimeEntry.is_deleted == False)
+    if user_id:
+        clear = clear.where(Rollup.user_id == user_id)
+        entries = entries.where(models.TimeEntry.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(rollup_delta_from_rows(entries.subquery()))
+    db.commit()
+    return result.rowcount
+
+
+def get_user_rollup_totals(db: Session, user_id: uuid.UUID, start_day: date = None, end_day: date = None):
+    """(entries_count, total_minutes) for a user, optionally within [start_day, end_day]"""
+    query = db.query(
+        func.coalesce(func.sum(Rollup.entries_count), 0),
+        func.coalesce(func.sum(Rollup.minutes), 0)
+    ).filter(Rollup.user_id == user_id)
+
+    if start_day:
+        query = query.filter(Rollup.day >= start_day)
+    if end_day:
+        query = query.filter(Rollup.day <= end_day)
+
+    entries_count, total_minutes = query.one()
+    return int(entries_count), float(total_minutes)
+
+
+def get_user_rollup_breakdown(db: Session, user_id: uuid.UUID, group_by: str, start_day: date = None, end_day: date = None):
+    """Minutes and entry counts per project, task or day for a user, largest first (days in order)"""
+    if group_by == "project":
+        keys = [Rollup.project_id, models.Project.name.label("project_name")]
+    elif group_by == "task":
+        keys = [Rollup.task_id, models.Task.name.label("task_name"), Rollup.project_id]
+    elif group_by == "day":
+        keys = [Rollup.day]
+    else:
+        raise ValueError(f"Unsupported group_by '{group_by}'")
+
+    minutes = func.sum(Rollup.minutes).label("minutes")
+    entries_count = func.sum(Rollup.entries_count).label("entries_count")
+
+    query = db.query(*keys, minutes, entries_count).select_from(Rollup).filter(
+        Rollup.user_id == user_id
+    )
+    if group_by == "project":
+        query = query.join(models.Project, models.Project.id == Rollup.project_id)
+    elif group_by == "task":
+        query = query.join(models.Task, models.Task.id == Rollup.task_id)
+
+    if start_day:
+        query = query.filter(Rollup.day >= start_day)
+    if end_day:
+        query = query.filter(Rollup.day <= end_day)
+
+    query = query.group_by(*keys).having(func.sum(Rollup.entries_count) > 0)
+    query = query.order_by(Rollup.day) if group_by == "day" else query.order_by(minutes.desc())
+
+    breakdown = []
+    for row in query.all():
+        item = row._asdict()
+        item["minutes"] = float(item["minutes"])
+        item["entries_count"] = int(item["entries_count"])
+        breakdown.append(item)
+    return breakdown
@@ -1,11 +1,21 @@
 # Task CRUD operations
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, literal, func, and_, or_
+from sqlalchemy.orm import Session, aliased, joinedload
 from fastapi import HTTPException
 from .. import models
 from ..schemas.task import TaskCreate, TaskUpdate, TaskStatus
 from ..schemas.project import ProjectRole
+from .permissions import get_project_access
+from .rollup import rollup_delta_from_rows
+from .analytics import invalidate_all_analytics
+from ..pagination import paginate, DEFAULT_PAGE_SIZE
+from ..unit_of_work import commit, on_commit
+from collections import defaultdict
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+
+# Guard against parent_task_id cycles in recursive ancestry queries
+MAX_TASK_DEPTH = 1000
 
 
 def create_task(db: Session, task: TaskCreate):
@@ -20,8 +30,7 @@ def create_task(db: Session, task: TaskCreate):
         parent_task_id=task.parent_task_id
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    commit(db)
     return db_task
 
 
@@ -38,6 +47,74 @@ def get_project_tasks(db: Session, project_id: uuid.UUID, include_subtasks: bool
     return query.all()
 
 
+def get_project_tasks_page(db: Session, project_id: uuid.UUID, include_subtasks: bool = True, member_id: uuid.UUID = None,
+                           cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of a project's tasks keyed on (created_at, id); member_id limits to assigned or unassigned tasks"""
+    query = db.query(models.Task).filter(
+        models.Task.project_id == project_id,
+        models.Task.is_deleted == False
+    )
+
+    if not include_subtasks:
+        query = query.filter(models.Task.parent_task_id.is_(None))
+
+    if member_id:
+        query = query.filter(or_(
+            models.Task.assigned_to_id == member_id,
+            models.Task.assigned_to_id.is_(None)
+        ))
+
+    return paginate(query, models.Task.created_at, models.Task.id, cursor, limit)
+
+
+def get_project_task_tree(db: Session, project_id: uuid.UUID, member_id: uuid.UUID = None):
+    """
+    Load a project's whole task tree (with assignees) in one query and assemble it in memory.
+    When member_id is given, only tasks assigned to that member or unassigned are kept,
+    and hidden tasks hide their subtasks too.
+    """
+    tree = select(models.Task.id, literal(0).label("depth")).where(
+        models.Task.project_id == project_id,
+        models.Task.parent_task_id.is_(None),
+        models.Task.is_deleted == False
+    ).cte("project_task_tree", recursive=True)
+
+    child = aliased(models.Task)
+    tree = tree.union_all(
+        select(child.id, tree.c.depth + 1).where(
+            child.parent_task_id == tree.c.id,
+            child.is_deleted == False,
+            tree.c.depth < MAX_TASK_DEPTH
+        )
+    )
+
+    tasks = db.query(models.Task).options(
+        joinedload(models.Task.assigned_to)
+    ).filter(
+        models.Task.id.in_(select(tree.c.id))
+    ).order_by(models.Task.created_at, models.Task.id).all()
+
+    # Bucket children by parent id
+    children = defaultdict(list)
+    for task in tasks:
+        children[task.parent_task_id].append(task)
+
+    columns = [column.key for column in models.Task.__table__.columns]
+
+    def build(task):
+        node = {key: getattr(task, key) for key in columns}
+        node["assigned_to"] = task.assigned_to
+        node["subtasks"] = [build(subtask) for subtask in children[task.id] if is_visible(subtask)]
+        return node
+
+    def is_visible(task):
+        if member_id is None:
+            return True
+        return task.assigned_to_id == member_id or task.assigned_to_id is None
+
+    return [build(task) for task in children[None] if is_visible(task)]
+
+
 def get_task_by_id(db: Session, task_id: uuid.UUID):
     """Get task with subtasks"""
     return db.query(models.Task).filter(
@@ -61,18 +138,15 @@ def get_user_tasks(db: Session, user_id: uuid.UUID, status: TaskStatus = None):
 
 def update_task(db: Session, task_id: uuid.UUID, task_update: TaskUpdate):
     """Update task details"""
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id
-    ).first()
+    db_task = db.get(models.Task, task_id)
     
     if db_task:
         update_data = task_update.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_task, key, value)
         
-        db_task.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_task)
+        db_task.updated_at = datetime.now(timezone.utc)
+        commit(db)
     
     return db_task
 
@@ -85,6 +159,77 @@ def get_task_subtasks(db: Session, parent_task_id: uuid.UUID):
     ).all()
 
 
+def _task_ancestry_cte(task_id, stop_at_project: bool):
+    """
+    Recursive CTE walking parent_task_id upwards from task_id, or from each of a
+    collection of task ids (depth 0 = the task itself, root_id = the task it started from)
+    """
+    start = models.Task.id.in_(task_id) if isinstance(task_id, (list, tuple, set, frozenset)) \
+        else models.Task.id == task_id
+    ancestry = select(
+        models.Task.id,
+        models.Task.parent_task_id,
+        models.Task.project_id,
+        literal(0).label("depth"),
+        models.Task.id.label("root_id")
+    ).where(
+        start,
+        models.Task.is_deleted == False
+    ).cte("task_ancestry", recursive=True)
+
+    parent = aliased(models.Task)
+    step = select(
+        parent.id,
+        parent.parent_task_id,
+        parent.project_id,
+        ancestry.c.depth + 1,
+        ancestry.c.root_id
+    ).where(
+        parent.id == ancestry.c.parent_task_id,
+        parent.is_deleted == False,
+        ancestry.c.depth < MAX_TASK_DEPTH
+    )
+    if stop_at_project:
+        # Stop climbing once a task that owns a project is reached
+        step = step.where(ancestry.c.project_id.is_(None))
+
+    return ancestry.union_all(step)
+
+
+def get_task_ancestors(db: Session, task_id: uuid.UUID):
+    """Get the task and all its ancestors (nearest first) in a single recursive query"""
+    ancestry = _task_ancestry_cte(task_id, stop_at_project=False)
+    return db.query(ancestry).order_by(ancestry.c.depth).all()
+
+
+def get_task_root_project_id(db: Session, task_id: uuid.UUID):
+    """Resolve the project a task or subtask belongs to in a single recursive query"""
+    ancestry = _task_ancestry_cte(task_id, stop_at_project=True)
+    return db.query(ancestry.c.project_id).filter(
+        ancestry.c.project_id.isnot(None)
+    ).order_by(ancestry.c.depth).limit(1).scalar()
+
+
+def get_task_root_project_ids(db: Session, task_ids):
+    """{task_id: project_id} for several tasks or subtasks in one recursive query (missing tasks left out)"""
+    if not task_ids:
+        return {}
+    ancestry = _task_ancestry_cte(set(task_ids), stop_at_project=True)
+    rows = db.query(ancestry.c.root_id, ancestry.c.project_id).filter(
+        ancestry.c.project_id.isnot(None)
+    ).all()
+    return {row.root_id: row.project_id for row in rows}
+
+
+def get_task_project_id(db: Session, task: models.Task):
+    """Get the project of a loaded task, only querying the ancestry for subtasks"""
+    if task.project_id:
+        return task.project_id
+    if not task.parent_task_id:
+        return None
+    return get_task_root_project_id(db, task.parent_task_id)
+
+
 #def create_subtask(db: Session, parent_task_id: uuid.UUID, subtask: TaskCreate):
     #"""Create subtask under a parent task"""
     # Override project_id and parent_task_id for subtask
@@ -96,15 +241,12 @@ def get_task_subtasks(db: Session, parent_task_id: uuid.UUID):
 
 def update_task_status(db: Session, task_id: uuid.UUID, status: TaskStatus):
     """Update task status"""
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id
-    ).first()
+    db_task = db.get(models.Task, task_id)
     
     if db_task:
         db_task.status = status
-        db_task.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_task)
+        db_task.updated_at = datetime.now(timezone.utc)
+        commit(db)
     
     return db_task
 
@@ -113,18 +255,13 @@ def assign_task(db: Session, task_id: uuid.UUID, user_id: uuid.UUID):
     """Assign task to a user (must be project member)"""
     from fastapi import HTTPException
     
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id
-    ).first()
+    db_task = db.get(models.Task, task_id)
     
     if not db_task:
         raise HTTPException(404, "Task not found")
     
-    # Get project ID (handle subtasks)
-    project_id = db_task.project_id
-    if not project_id and db_task.parent_task_id:
-        parent_task = get_task_by_id(db, db_task.parent_task_id)
-        project_id = parent_task.project_id if parent_task else None
+    # Get project ID (handle subtasks at any depth)
+    project_id = get_task_project_id(db, db_task)
     
     if not project_id:
         raise HTTPException(400, "Task is not associated with any project")
@@ -141,47 +278,94 @@ def assign_task(db: Session, task_id: uuid.UUID, user_id: uuid.UUID):
     
     # Assign the task
     db_task.assigned_to_id = user_id
-    db_task.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_task)
+    db_task.updated_at = datetime.now(timezone.utc)
+    commit(db)
     
     return db_task
 
 
 def unassign_task(db: Session, task_id: uuid.UUID):
     """Remove task assignment"""
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id
-    ).first()
+    db_task = db.get(models.Task, task_id)
     
     if db_task:
         db_task.assigned_to_id = None
-        db_task.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_task)
+        db_task.updated_at = datetime.now(timezone.utc)
+        commit(db)
     
     return db_task
 
 
+def soft_delete_task_subtree(db: Session, task_id: uuid.UUID, include_time_entries: bool = False):
+    """Soft delete a task, every descendant subtask and optionally their time entries in one statement"""
+    subtree = select(
+        models.Task.id,
+        literal(0).label("depth")
+    ).where(
+        models.Task.id == task_id
+    ).cte("task_subtree", recursive=True)
+
+    child = aliased(models.Task)
+    subtree = subtree.union_all(
+        select(child.id, subtree.c.depth + 1).where(
+            child.parent_task_id == subtree.c.id,
+            subtree.c.depth < MAX_TASK_DEPTH
+        )
+    )
+    subtree_ids = select(subtree.c.id)
+
+    deleted_tasks = update(models.Task).where(
+        models.Task.id.in_(subtree_ids),
+        models.Task.is_deleted == False
+    ).values(
+        is_deleted=True,
+        updated_at=func.now()
+    ).returning(models.Task.id).cte("deleted_tasks")
+
+    counts = [select(func.count()).select_from(deleted_tasks).scalar_subquery()]
+
+    if include_time_entries:
+        deleted_time_entries = update(models.TimeEntry).where(
+            models.TimeEntry.task_id.in_(subtree_ids),
+            models.TimeEntry.is_deleted == False
+        ).values(
+            is_deleted=True,
+            updated_at=func.now()
+        ).returning(
+            models.TimeEntry.id, models.TimeEntry.user_id, models.TimeEntry.project_id, models.TimeEntry.task_id,
+            models.TimeEntry.start_time, models.TimeEntry.end_time, models.TimeEntry.duration_minutes
+        ).cte("deleted_time_entries")
+        counts.append(select(func.count()).select_from(deleted_time_entries).scalar_subquery())
+
+        # Free the running-timer slot of any deleted running entry
+        released_timers = delete(models.ActiveTimer).where(
+            models.ActiveTimer.time_entry_id.in_(
+                select(deleted_time_entries.c.id).where(deleted_time_entries.c.end_time.is_(None))
+            )
+        ).returning(models.ActiveTimer.user_id).cte("released_timers")
+        counts.append(select(func.count()).select_from(released_timers).scalar_subquery())
+
+        # Take the deleted entries back out of daily_time_rollups in the same statement
+        rollups = rollup_delta_from_rows(deleted_time_entries, -1).returning(
+            models.DailyTimeRollup.day).cte("updated_rollups")
+        counts.append(select(func.count()).select_from(rollups).scalar_subquery())
+
+    row = db.execute(select(*counts)).one()
+    commit(db)
+    if include_time_entries and row[1]:
+        # Entries of any number of users may be gone
+        on_commit(db, invalidate_all_analytics)
+
+    return {
+        "tasks": row[0],
+        "time_entries": row[1] if include_time_entries else 0
+    }
+
+
 def soft_delete_task(db: Session, task_id: uuid.UUID):
     """Soft delete task and all its subtasks"""
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id
-    ).first()
-    
-    if db_task:
-        # Delete subtasks first
-        subtasks = get_task_subtasks(db, task_id)
-        for subtask in subtasks:
-            subtask.is_deleted = True
-            subtask.updated_at = datetime.utcnow()
-        
-        # Delete main task
-        db_task.is_deleted = True
-        db_task.updated_at = datetime.utcnow()
-        db.commit()
-        return True
-    return False
+    deleted = soft_delete_task_subtree(db, task_id)
+    return deleted["tasks"] > 0
 
 
 def check_task_access(db: Session, task_id: str, user_id: str, required_role: ProjectRole = ProjectRole.MEMBER):
@@ -212,58 +396,32 @@ def check_task_access(db: Session, task_id: str, user_id: str, required_role: Pr
     if not task:
         raise HTTPException(404, "Task not found")
 
-    # For subtasks, get the root project through parent task chain
-    project_id = task.project_id
-    if not project_id and task.parent_task_id:
-        # Follow parent chain to find project
-        current_task = task
-        while current_task.parent_task_id and not current_task.project_id:
-            current_task = get_task_by_id(db, current_task.parent_task_id)
-            if not current_task:
-                break
-        project_id = current_task.project_id if current_task else None
+    # For subtasks, resolve the root project through the parent task chain
+    project_id = get_task_project_id(db, task)
 
     if not project_id:
         raise HTTPException(404, "Task is not associated with any project")
 
-    # Check if user is workspace owner (automatic MANAGER access)
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    # Resolve effective role in the task's project (cached per user and project)
+    access = get_project_access(db, project_id, user_uuid)
+    if not access:
         raise HTTPException(404, "Project not found")
 
-    workspace_owner = db.query(models.Workspace).filter(
-        models.Workspace.id == project.workspace_id,
-        models.Workspace.owner_id == user_uuid
-    ).first()
-
-    if workspace_owner:
+    if access.is_manager:
+        # Workspace owner or project creator (MANAGER access)
         user_effective_role = ProjectRole.MANAGER
+    elif access.member_role is not None:
+        # Get the actual role from project membership
+        user_effective_role = access.member_role
     else:
-        # Check if user is project creator (MANAGER access)
-        is_project_creator = project.creator_id == user_uuid
+        # Check if user is task creator or assignee (special access)
+        is_task_creator = task.created_by == user_uuid if hasattr(task, 'created_by') else False
+        is_task_assignee = task.assigned_to_id == user_uuid
 
-        if is_project_creator:
-            user_effective_role = ProjectRole.MANAGER
+        if is_task_creator or is_task_assignee:
+            user_effective_role = ProjectRole.MEMBER
         else:
-            # Check if user is project member
-            is_project_member = db.query(models.ProjectMember).filter(
-                models.ProjectMember.project_id == project_id,
-                models.ProjectMember.user_id == user_uuid,
-                models.ProjectMember.is_deleted == False
-            ).first()
-
-            if is_project_member:
-                # Get the actual role from project membership
-                user_effective_role = is_project_member.role
-            else:
-                # Check if user is task creator or assignee (special access)
-                is_task_creator = task.created_by == user_uuid if hasattr(task, 'created_by') else False
-                is_task_assignee = task.assigned_to_id == user_uuid
-
-                if is_task_creator or is_task_assignee:
-                    user_effective_role = ProjectRole.MEMBER
-                else:
-                    raise HTTPException(403, "Not authorized to access this task")
+            raise HTTPException(403, "Not authorized to access this task")
 
     # Check permission level (MANAGER=1, MEMBER=2, lower = higher privilege)
     if user_effective_role <= required_role:
@@ -303,66 +461,55 @@ def get_workspace_tasks(db: Session, workspace_id: uuid.UUID, user_id: uuid.UUID
         return get_user_accessible_tasks(db, user_id, workspace_id)
 
 
-def get_user_accessible_tasks(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID = None):
-    """Get tasks accessible to user based on role"""
-    
-    # Check if user is project manager for any projects
-    manager_projects = db.query(models.ProjectMember).filter(
-        models.ProjectMember.user_id == user_id,
-        models.ProjectMember.role == ProjectRole.MANAGER,
-        models.ProjectMember.is_deleted == False
-    ).all()
-    
-    accessible_tasks = []
-    
-    # Add ALL tasks from projects where user is MANAGER
-    for membership in manager_projects:
-        project_tasks = db.query(models.Task).filter(
-            models.Task.project_id == membership.project_id,
-            models.Task.is_deleted == False
-        ).all()
-        accessible_tasks.extend(project_tasks)
-    
-    # Add ONLY ASSIGNED tasks from projects where user is MEMBER
-    member_projects = db.query(models.ProjectMember).filter(
-        models.ProjectMember.user_id == user_id,
-        models.ProjectMember.role == ProjectRole.MEMBER,
-        models.ProjectMember.is_deleted == False
-    ).all()
-    
-    for membership in member_projects:
-        # Only assigned tasks for members
-        assigned_tasks = db.query(models.Task).filter(
-            models.Task.project_id == membership.project_id,
-            models.Task.assigned_to_id == user_id,
-            models.Task.is_deleted == False
-        ).all()
-        accessible_tasks.extend(assigned_tasks)
-        
-        # NOTE: Members should NOT see unassigned tasks in bulk queries
-        # They can only view unassigned tasks when specifically requested via check_task_access
-    
-    # Remove duplicates and apply workspace filter
-    unique_tasks = {task.id: task for task in accessible_tasks}
-    
+def _user_accessible_tasks_query(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID = None, status: TaskStatus = None):
+    """Role-aware task query: all tasks where user is MANAGER, only assigned tasks where MEMBER"""
+    query = db.query(models.Task).join(
+        models.ProjectMember,
+        and_(
+            models.ProjectMember.project_id == models.Task.project_id,
+            models.ProjectMember.user_id == user_id,
+            models.ProjectMember.is_deleted == False
+        )
+    ).filter(
+        models.Task.is_deleted == False,
+        or_(
+            models.ProjectMember.role == ProjectRole.MANAGER,
+            # NOTE: Members should NOT see unassigned tasks in bulk queries
+            # They can only view unassigned tasks when specifically requested via check_task_access
+            and_(
+                models.ProjectMember.role == ProjectRole.MEMBER,
+                models.Task.assigned_to_id == user_id
+            )
+        )
+    )
+
     if workspace_id:
-        filtered_tasks = []
-        for task in unique_tasks.values():
-            project = db.query(models.Project).filter(models.Project.id == task.project_id).first()
-            if project and project.workspace_id == workspace_id:
-                filtered_tasks.append(task)
-        return filtered_tasks
-    
-    return list(unique_tasks.values())
+        query = query.join(
+            models.Project, models.Project.id == models.Task.project_id
+        ).filter(models.Project.workspace_id == workspace_id)
+
+    if status:
+        query = query.filter(models.Task.status == status)
+
+    return query.order_by(models.Task.created_at, models.Task.id)
+
+
+def get_user_accessible_tasks(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID = None, status: TaskStatus = None):
+    """Get tasks accessible to user based on role"""
+    return _user_accessible_tasks_query(db, user_id, workspace_id, status).all()
+
+
+def get_user_accessible_tasks_page(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID = None,
+                                   status: TaskStatus = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of tasks accessible to user based on role, keyed on (created_at, id)"""
+    query = _user_accessible_tasks_query(db, user_id, workspace_id, status)
+    return paginate(query, models.Task.created_at, models.Task.id, cursor, limit)
 
 
 def get_user_tasks_enhanced(db: Session, user_id: uuid.UUID, status: TaskStatus = None, include_accessible: bool = False):
     """Enhanced user tasks - can include accessible tasks beyond just assigned"""
     if include_accessible:
-        tasks = get_user_accessible_tasks(db, user_id)
-        if status:
-            tasks = [task for task in tasks if task.status == status]
-        return tasks
+        return get_user_accessible_tasks(db, user_id, status=status)
     else:
         # Original behavior - just assigned tasks
         return get_user_tasks(db, user_id, status)
@@ -1,26 +1,154 @@
 # Time Entry CRUD operations
+from sqlalchemy import select, text, bindparam, DateTime
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Session
+from fastapi import HTTPException
 from .. import models
-from ..schemas.time_entry import TimeEntryCreate, TimeEntryStop, TimeEntryUpdate
+from ..schemas.time_entry import TimeEntryCreate, TimeEntryStop, TimeEntryUpdate, TimeEntrySortField, TimeEntryResponse
+from ..pagination import paginate, DEFAULT_PAGE_SIZE
+from ..cache import TTLCache
+from ..events import timer_events, TIMER_STARTED, TIMER_STOPPED, TIMER_UPDATED, TIMER_DELETED
+from .rollup import add_time_entry_to_rollups, remove_time_entry_from_rollups, rollup_upsert_sql
+from .analytics import invalidate_user_analytics
+from ..unit_of_work import commit, on_commit
 import uuid
 from datetime import datetime, timezone
 
 
-def start_time_entry(db: Session, time_entry: TimeEntryCreate):
-    """Start a new time entry (timer)"""
-    db_time_entry = models.TimeEntry(
-        start_time=time_entry.start_time,
-        user_id=time_entry.user_id,
-        project_id=time_entry.project_id,
-        task_id=time_entry.task_id,
-        description=time_entry.description
+# Claim the user's active_timers slot and insert the entry in one statement;
+# no row comes back when the user already has a running timer
+START_TIMER_SQL = text("""
+    WITH claimed AS (
+        INSERT INTO active_timers (user_id, time_entry_id, start_time)
+        VALUES (:user_id, :id, :start_time)
+        ON CONFLICT (user_id) DO NOTHING
+        RETURNING user_id, time_entry_id, start_time
     )
-    db.add(db_time_entry)
-    db.commit()
-    db.refresh(db_time_entry)
+    INSERT INTO time_entries (
+        id, created_at, updated_at, is_deleted, start_time,
+        user_id, project_id, task_id, description
+    )
+    SELECT time_entry_id, now(), now(), false, start_time,
+           user_id, CAST(:project_id AS uuid), CAST(:task_id AS uuid), CAST(:description AS text)
+    FROM claimed
+    RETURNING *
+""").bindparams(
+    bindparam("id", type_=UUID(as_uuid=True)),
+    bindparam("user_id", type_=UUID(as_uuid=True)),
+    bindparam("project_id", type_=UUID(as_uuid=True)),
+    bindparam("task_id", type_=UUID(as_uuid=True)),
+    bindparam("start_time", type_=DateTime(timezone=True))
+)
+
+# Release the user's active_timers slot, stop the entry it points at with the
+# duration computed in SQL and add it to daily_time_rollups in one statement.
+# The slot's (time_entry_id, start_time) pins the UPDATE to a single monthly
+# partition, so stopping doesn't get slower as partitions accumulate.
+STOP_TIMER_SQL = text(f"""
+    WITH released AS (
+        DELETE FROM active_timers WHERE user_id = :user_id
+        RETURNING time_entry_id, start_time
+    ), stopped AS (
+        UPDATE time_entries
+        SET end_time = now(),
+            duration_minutes = extract(epoch FROM now() - time_entries.start_time) / 60,
+            updated_at = now()
+        FROM released
+        WHERE time_entries.id = released.time_entry_id
+          AND time_entries.start_time = released.start_time
+          AND time_entries.end_time IS NULL
+          AND time_entries.is_deleted = false
+        RETURNING time_entries.*
+    ), rolled_up AS (
+        {rollup_upsert_sql("stopped")}
+    )
+    SELECT * FROM stopped
+""").bindparams(
+    bindparam("user_id", type_=UUID(as_uuid=True))
+)
+
+
+# Projects never move between workspaces, so timer events can resolve the workspace from memory
+project_workspace_cache = TTLCache(max_entries=10000, ttl_seconds=3600)
+
+
+def timer_event_payload(time_entry: models.TimeEntry):
+    return TimeEntryResponse.model_validate(time_entry).model_dump(mode="json")
+
+
+def get_project_workspace_id(db: Session, project_id: uuid.UUID):
+    """Workspace of a project (cached)"""
+    workspace_id = project_workspace_cache.get(project_id)
+    if workspace_id is None:
+        workspace_id = db.query(models.Project.workspace_id).filter(
+            models.Project.id == project_id
+        ).scalar()
+        if workspace_id is not None:
+            project_workspace_cache.set(project_id, workspace_id)
+    return workspace_id
+
+
+def publish_timer_event(db: Session, event_type: str, payload: dict):
+    """Push a committed timer change (a timer_event_payload) to live stream subscribers"""
+    timer_events.publish(
+        event_type,
+        payload["user_id"],
+        get_project_workspace_id(db, uuid.UUID(payload["project_id"])),
+        payload
+    )
+
+
+def start_timer_params(time_entry: TimeEntryCreate):
+    return {
+        "id": uuid.uuid4(),
+        "user_id": time_entry.user_id,
+        "project_id": time_entry.project_id,
+        "task_id": time_entry.task_id,
+        "description": time_entry.description,
+        "start_time": time_entry.start_time
+    }
+
+
+def start_time_entry(db: Session, time_entry: TimeEntryCreate):
+    """Start a new time entry (timer) in a single round trip"""
+    db_time_entry = db.execute(
+        select(models.TimeEntry).from_statement(START_TIMER_SQL),
+        start_timer_params(time_entry)
+    ).scalars().first()
+
+    if db_time_entry is None:
+        db.rollback()
+        raise HTTPException(400, "You already have an active timer. Stop it before starting a new one.")
+
+    commit(db)
+    payload = timer_event_payload(db_time_entry)
+    on_commit(db, lambda: invalidate_user_analytics(time_entry.user_id))
+    on_commit(db, lambda: publish_timer_event(db, TIMER_STARTED, payload))
+    return db_time_entry
+
+
+def stop_active_timer(db: Session, user_id: uuid.UUID):
+    """Stop the user's running timer in a single round trip; None if no timer was running"""
+    db_time_entry = db.execute(
+        select(models.TimeEntry).from_statement(STOP_TIMER_SQL),
+        {"user_id": user_id}
+    ).scalars().first()
+
+    commit(db)
+    if db_time_entry is not None:
+        payload = timer_event_payload(db_time_entry)
+        on_commit(db, lambda: invalidate_user_analytics(user_id))
+        on_commit(db, lambda: publish_timer_event(db, TIMER_STOPPED, payload))
     return db_time_entry
 
 
+def clear_active_timer(db: Session, time_entry: models.TimeEntry):
+    """Release the user's running-timer slot held by time_entry (caller commits)"""
+    db.query(models.ActiveTimer).filter(
+        models.ActiveTimer.time_entry_id == time_entry.id
+    ).delete(synchronize_session=False)
+
+
 def stop_time_entry(db: Session, time_entry_id: uuid.UUID, stop_data: TimeEntryStop):
     """Stop an active time entry"""
     db_time_entry = db.query(models.TimeEntry).filter(
@@ -29,11 +157,15 @@ def stop_time_entry(db: Session, time_entry_id: uuid.UUID, stop_data: TimeEntryS
     ).first()
     
     if db_time_entry:
+        clear_active_timer(db, db_time_entry)
         db_time_entry.end_time = stop_data.end_time
         db_time_entry.duration_minutes = stop_data.duration_minutes
-        db_time_entry.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_time_entry)
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        add_time_entry_to_rollups(db, db_time_entry)
+        commit(db)
+        payload = timer_event_payload(db_time_entry)
+        on_commit(db, lambda: invalidate_user_analytics(db_time_entry.user_id))
+        on_commit(db, lambda: publish_timer_event(db, TIMER_STOPPED, payload))
     
     return db_time_entry
 
@@ -51,6 +183,72 @@ def get_user_time_entries(db: Session, user_id: uuid.UUID, active_only: bool = F
     return query.all()
 
 
+def time_entry_conditions(user_id: uuid.UUID = None, task_id: uuid.UUID = None, project_id: uuid.UUID = None,
+                          workspace_id: uuid.UUID = None, start_date: datetime = None, end_date: datetime = None,
+                          min_duration: float = None, max_duration: float = None, running_only: bool = False,
+                          description: str = None, include_deleted: bool = False):
+    """
+    WHERE clauses for a time entry search. Works with Query.filter(*...) and select().where(*...),
+    so sync and async callers compose the same filters into one SQL query.
+    """
+    conditions = []
+    if not include_deleted:
+        conditions.append(models.TimeEntry.is_deleted == False)
+    if user_id:
+        conditions.append(models.TimeEntry.user_id == user_id)
+    if task_id:
+        conditions.append(models.TimeEntry.task_id == task_id)
+    if project_id:
+        conditions.append(models.TimeEntry.project_id == project_id)
+    if workspace_id:
+        conditions.append(models.TimeEntry.project_id.in_(
+            select(models.Project.id).where(models.Project.workspace_id == workspace_id)
+        ))
+    if start_date:
+        conditions.append(models.TimeEntry.start_time >= start_date)
+    if end_date:
+        conditions.append(models.TimeEntry.start_time <= end_date)
+    if min_duration is not None:
+        conditions.append(models.TimeEntry.duration_minutes >= min_duration)
+    if max_duration is not None:
+        conditions.append(models.TimeEntry.duration_minutes <= max_duration)
+    if running_only:
+        conditions.append(models.TimeEntry.end_time.is_(None))
+    if description:
+        pattern = description.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append(models.TimeEntry.description.ilike(f"%{pattern}%", escape="\\"))
+    return conditions
+
+
+def time_entry_sort_column(sort_by: TimeEntrySortField = TimeEntrySortField.START_TIME):
+    """Keyset-safe (non-null datetime) sort column"""
+    return getattr(models.TimeEntry, TimeEntrySortField(sort_by).value)
+
+
+def search_time_entries(db: Session, sort_by: TimeEntrySortField = TimeEntrySortField.START_TIME, descending: bool = True,
+                        cursor: str = None, limit: int = None, **filters):
+    """
+    Filter, sort and optionally paginate time entries (filters as in time_entry_conditions).
+    Returns (entries, next_cursor); without cursor/limit every match is returned and next_cursor is None.
+    """
+    query = db.query(models.TimeEntry).filter(*time_entry_conditions(**filters))
+    sort_column = time_entry_sort_column(sort_by)
+
+    if cursor or limit:
+        return paginate(query, sort_column, models.TimeEntry.id, cursor, limit or DEFAULT_PAGE_SIZE, descending)
+
+    order = (sort_column.desc(), models.TimeEntry.id.desc()) if descending else (sort_column, models.TimeEntry.id)
+    return query.order_by(*order).all(), None
+
+
+def get_user_time_entries_page(db: Session, user_id: uuid.UUID, start_date: datetime = None, end_date: datetime = None,
+                               task_id: uuid.UUID = None, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of a user's time entries, newest first, keyed on (start_time, id)"""
+    return search_time_entries(
+        db, cursor=cursor, limit=limit,
+        user_id=user_id, start_date=start_date, end_date=end_date, task_id=task_id)
+
+
 def get_project_time_entries(db: Session, project_id: uuid.UUID):
     """Get all time entries for a project"""
     return db.query(models.TimeEntry).filter(
@@ -77,9 +275,11 @@ def update_time_entry(db: Session, time_entry_id: uuid.UUID, update_data: TimeEn
         if update_data.description is not None:
             db_time_entry.description = update_data.description
         
-        db_time_entry.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_time_entry)
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        if db_time_entry.end_time is None:
+            payload = timer_event_payload(db_time_entry)
+            on_commit(db, lambda: publish_timer_event(db, TIMER_UPDATED, payload))
     
     return db_time_entry
 
@@ -108,8 +308,9 @@ def create_manual_time_entry(db: Session, user_id: uuid.UUID, project_id: uuid.U
         task_id=task_id
     )
     db.add(db_time_entry)
-    db.commit()
-    db.refresh(db_time_entry)
+    add_time_entry_to_rollups(db, db_time_entry)
+    commit(db)
+    on_commit(db, lambda: invalidate_user_analytics(user_id))
     return db_time_entry
 
 
@@ -138,6 +339,47 @@ def get_workspace_time_entries(db: Session, workspace_id: uuid.UUID, start_date:
     return query.all()
 
 
+def iter_time_entries_for_export(db: Session, user_id: uuid.UUID = None, workspace_id: uuid.UUID = None,
+                                 start_date: datetime = None, end_date: datetime = None, batch_size: int = 1000):
+    """
+    Stream time entries with user, project and task names joined in SQL.
+    Rows are fetched through a server-side cursor in batches, so memory stays flat for any export size.
+    """
+    query = db.query(
+        models.TimeEntry.id,
+        models.TimeEntry.start_time,
+        models.TimeEntry.end_time,
+        models.TimeEntry.duration_minutes,
+        models.TimeEntry.description,
+        models.User.full_name.label("user_name"),
+        models.User.email.label("user_email"),
+        models.TimeEntry.project_id,
+        models.Project.name.label("project_name"),
+        models.TimeEntry.task_id,
+        models.Task.name.label("task_name")
+    ).select_from(models.TimeEntry).join(
+        models.User, models.User.id == models.TimeEntry.user_id
+    ).join(
+        models.Project, models.Project.id == models.TimeEntry.project_id
+    ).outerjoin(
+        models.Task, models.Task.id == models.TimeEntry.task_id
+    ).filter(
+        models.TimeEntry.is_deleted == False
+    )
+
+    if user_id:
+        query = query.filter(models.TimeEntry.user_id == user_id)
+    if workspace_id:
+        query = query.filter(models.Project.workspace_id == workspace_id)
+    if start_date:
+        query = query.filter(models.TimeEntry.start_time >= start_date)
+    if end_date:
+        query = query.filter(models.TimeEntry.start_time <= end_date)
+
+    query = query.order_by(models.TimeEntry.start_time, models.TimeEntry.id)
+    yield from query.yield_per(batch_size)
+
+
 def soft_delete_time_entry(db: Session, time_entry_id: uuid.UUID):
     """Soft delete time entry"""
     db_time_entry = db.query(models.TimeEntry).filter(
@@ -145,8 +387,16 @@ def soft_delete_time_entry(db: Session, time_entry_id: uuid.UUID):
     ).first()
     
     if db_time_entry:
+        was_running = db_time_entry.end_time is None and not db_time_entry.is_deleted
+        if db_time_entry.end_time is None:
+            clear_active_timer(db, db_time_entry)
+        remove_time_entry_from_rollups(db, db_time_entry)
         db_time_entry.is_deleted = True
-        db_time_entry.updated_at = datetime.utcnow()
-        db.commit()
+        db_time_entry.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_analytics(db_time_entry.user_id))
+        if was_running:
+            payload = timer_event_payload(db_time_entry)
+            on_commit(db, lambda: publish_timer_event(db, TIMER_DELETED, payload))
         return True
     return False
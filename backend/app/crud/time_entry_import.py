@@ -0,0 +1,326 @@
+# Bulk time entry import (CSV -> COPY into a staging table -> merge)
+# Accepts our own export format as well as Toggl / Clockify style exports
+import csv
+import io
+import uuid
+from datetime import datetime, timezone
+from pydantic import ValidationError
+from sqlalchemy import text, or_
+from sqlalchemy.orm import Session
+from .. import models
+from ..schemas.time_entry import TimeEntryCreate
+from .rollup import rollup_upsert_sql
+from .analytics import invalidate_user_analytics
+from .task import get_task_root_project_ids
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "time_entry_import_staging"
+STAGING_COLUMNS = [
+    "id", "start_time", "end_time", "duration_minutes", "description",
+    "user_id", "project_id", "task_id"
+]
+
+# Fallback formats for exports that don't use ISO 8601 (Clockify US/EU locales)
+DATETIME_FORMATS = [
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+]
+
+
+class RowError(ValueError):
+    pass
+
+
+def _normalize_header(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
+
+def _parse_datetime(value: str) -> datetime:
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        for fmt in DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise RowError(f"Unrecognized date/time '{value}'")
+
+    # Naive timestamps are treated as UTC
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _row_timestamp(row: dict, prefix: str):
+    """Read {prefix}_time, combining it with {prefix}_date when the export splits them (Toggl/Clockify)"""
+    clock = (row.get(f"{prefix}_time") or "").strip()
+    day = (row.get(f"{prefix}_date") or "").strip()
+    if day and clock:
+        return _parse_datetime(f"{day} {clock}")
+    if clock or day:
+        return _parse_datetime(clock or day)
+    return None
+
+
+def _parse_uuid(value: str, field: str):
+    try:
+        return uuid.UUID(value.strip())
+    except ValueError:
+        raise RowError(f"Invalid {field} '{value}'")
+
+
+def _accessible_projects(db: Session, user_id: uuid.UUID, workspace_id: uuid.UUID = None):
+    """Projects the importing user may log time against: member projects plus owned workspaces' projects"""
+    query = db.query(models.Project.id, models.Project.name).join(
+        models.Workspace, models.Workspace.id == models.Project.workspace_id
+    ).outerjoin(
+        models.ProjectMember,
+        (models.ProjectMember.project_id == models.Project.id) &
+        (models.ProjectMember.user_id == user_id) &
+        (models.ProjectMember.is_deleted == False)
+    ).filter(
+        models.Project.is_deleted == False,
+        or_(models.Workspace.owner_id == user_id, models.ProjectMember.user_id.isnot(None))
+    )
+    if workspace_id:
+        query = query.filter(models.Project.workspace_id == workspace_id)
+    return query.all()
+
+
+class _TaskResolver:
+    """Resolves task references for a batch of rows with two queries, caching across batches"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.by_id = {}          # task_id -> project_id (subtasks resolved to their root project)
+        self.missing_ids = set()
+        self.by_name = {}        # (project_id, name) -> task_id (None when not found)
+
+    def prefetch(self, task_ids, named_tasks):
+        task_ids = {task_id for task_id in task_ids if task_id not in self.by_id and task_id not in self.missing_ids}
+        named_tasks = {key for key in named_tasks if key not in self.by_name}
+
+        if task_ids:
+            rows = self.db.query(models.Task.id, models.Task.project_id).filter(
+                models.Task.id.in_(task_ids),
+                models.Task.is_deleted == False
+            ).all()
+            for row in rows:
+                self.by_id[row.id] = row.project_id
+            self.missing_ids.update(task_ids - self.by_id.keys())
+
+            # Subtasks have no project_id of their own; climb to the project for all of them at once
+            subtask_ids = {row.id for row in rows if row.project_id is None}
+            root_projects = get_task_root_project_ids(self.db, subtask_ids)
+            for task_id in subtask_ids:
+                self.by_id[task_id] = root_projects.get(task_id)
+
+        if named_tasks:
+            project_ids = {project_id for project_id, _ in named_tasks}
+            names = {name for _, name in named_tasks}
+            rows = self.db.query(models.Task.id, models.Task.project_id, models.Task.name).filter(
+                models.Task.project_id.in_(project_ids),
+                models.Task.name.in_(names),
+                models.Task.is_deleted == False
+            ).order_by(models.Task.created_at).all()
+            found = {}
+            for row in rows:
+                found.setdefault((row.project_id, row.name), row.id)
+            for key in named_tasks:
+                self.by_name[key] = found.get(key)
+
+
+def _copy_batch(db: Session, rows):
+    """COPY a batch of validated rows into the staging table"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def import_time_entries_csv(db: Session, csv_file, user_id: uuid.UUID, workspace_id: uuid.UUID = None,
+                            dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Import completed time entries for a user from a CSV text stream.
+
+    Rows reference projects/tasks by id (project_id, task_id) or by name (project, task).
+    Valid rows are COPYed into a temporary staging table batch by batch and merged into
+    time_entries with one INSERT ... SELECT, skipping entries that already exist or
+    repeat earlier in the file (same user, task and start time) and adding them to
+    daily_time_rollups.
+    Everything happens in one transaction.
+    """
+    reader = csv.DictReader(csv_file)
+    if reader.fieldnames:
+        reader.fieldnames = [_normalize_header(name) for name in reader.fieldnames]
+
+    projects = _accessible_projects(db, user_id, workspace_id)
+    project_ids = {project.id for project in projects}
+    project_by_name = {}
+    for project in projects:
+        project_by_name.setdefault(project.name, project.id)
+
+    tasks = _TaskResolver(db)
+    report = {"rows": 0, "valid": 0, "imported": 0, "duplicates": 0, "error_count": 0, "errors": [], "dry_run": dry_run}
+
+    def record_error(line_number, message):
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": line_number, "error": message})
+
+    if not dry_run:
+        db.execute(text(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ("
+            "id uuid, start_time timestamptz, end_time timestamptz, duration_minutes double precision, "
+            "description text, user_id uuid, project_id uuid, task_id uuid"
+            ") ON COMMIT DROP"
+        ))
+
+    def process(batch):
+        # Resolve every task reference in the batch up front
+        task_ids, named_tasks = set(), set()
+        for _, project_id, row in batch:
+            if row.get("task_id"):
+                try:
+                    task_ids.add(uuid.UUID(row["task_id"].strip()))
+                except ValueError:
+                    pass
+            elif project_id and row.get("task"):
+                named_tasks.add((project_id, row["task"].strip()))
+        tasks.prefetch(task_ids, named_tasks)
+
+        staged = []
+        for line_number, project_id, row in batch:
+            try:
+                if not project_id:
+                    raise RowError("Project not found or not accessible")
+
+                if row.get("task_id"):
+                    task_id = _parse_uuid(row["task_id"], "task_id")
+                    if task_id not in tasks.by_id:
+                        raise RowError("Task not found")
+                    if tasks.by_id[task_id] != project_id:
+                        raise RowError("Task does not belong to the project")
+                elif row.get("task"):
+                    task_id = tasks.by_name.get((project_id, row["task"].strip()))
+                    if not task_id:
+                        raise RowError(f"Task '{row['task'].strip()}' not found in project")
+                else:
+                    raise RowError("Missing task_id or task")
+
+                start_time = _row_timestamp(row, "start")
+                end_time = _row_timestamp(row, "end")
+                if not start_time or not end_time:
+                    raise RowError("Start and end time are required")
+                if end_time < start_time:
+                    raise RowError("End time is before start time")
+
+                entry = TimeEntryCreate(
+                    start_time=start_time,
+                    end_time=end_time,
+                    duration_minutes=(end_time - start_time).total_seconds() / 60,
+                    description=(row.get("description") or "").strip() or None,
+                    user_id=user_id,
+                    project_id=project_id,
+                    task_id=task_id
+                )
+            except RowError as e:
+                record_error(line_number, str(e))
+                continue
+            except ValidationError as e:
+                record_error(line_number, "; ".join(error["msg"] for error in e.errors()))
+                continue
+
+            staged.append([
+                uuid.uuid4(), entry.start_time.isoformat(), entry.end_time.isoformat(), entry.duration_minutes,
+                entry.description, entry.user_id, entry.project_id, entry.task_id
+            ])
+
+        report["valid"] += len(staged)
+        if staged and not dry_run:
+            _copy_batch(db, staged)
+
+    batch = []
+    try:
+        for row in reader:
+            report["rows"] += 1
+            line_number = reader.line_num
+
+            project_id = None
+            if row.get("project_id"):
+                try:
+                    candidate = uuid.UUID(row["project_id"].strip())
+                    project_id = candidate if candidate in project_ids else None
+                except ValueError:
+                    project_id = None
+            elif row.get("project"):
+                project_id = project_by_name.get(row["project"].strip())
+
+            batch.append((line_number, project_id, row))
+            if len(batch) >= batch_size:
+                process(batch)
+                batch = []
+
+        if batch:
+            process(batch)
+
+        if dry_run:
+            return report
+
+        # Merge staged rows, keeping one row per (user, task, start time) within the
+        # file and skipping entries that were already imported, and add the new
+        # entries to daily_time_rollups in the same statement
+        imported = db.execute(text(f"""
+            WITH inserted AS (
+                INSERT INTO time_entries (
+                    id, created_at, updated_at, is_deleted, start_time, end_time,
+                    duration_minutes, description, user_id, project_id, task_id
+                )
+                SELECT DISTINCT ON (s.user_id, s.task_id, s.start_time)
+                       s.id, now(), now(), false, s.start_time, s.end_time,
+                       s.duration_minutes, s.description, s.user_id, s.project_id, s.task_id
+                FROM {STAGING_TABLE} s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM time_entries t
+                    WHERE t.user_id = s.user_id
+                      AND t.task_id = s.task_id
+                      AND t.start_time = s.start_time
+                      AND t.is_deleted = false
+                )
+                ORDER BY s.user_id, s.task_id, s.start_time
+                RETURNING user_id, project_id, task_id, start_time, end_time, duration_minutes
+            ), rolled_up AS (
+                {rollup_upsert_sql("inserted")}
+            )
+            SELECT count(*) FROM inserted
+        """)).scalar()
+        report["imported"] = imported
+        # Rows repeated within the file and rows already in time_entries
+        report["duplicates"] = report["valid"] - report["imported"]
+        db.commit()
+        if imported:
+            invalidate_user_analytics(user_id)
+    except Exception:
+        db.rollback()
+        raise
+
+    return report
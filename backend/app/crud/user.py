@@ -2,15 +2,25 @@
 from sqlalchemy.orm import Session
 from .. import models
 from ..schemas.user import UserUpdate
+from .permissions import invalidate_user_access
+from .auth_cache import invalidate_user_auth
+from ..pagination import paginate, DEFAULT_PAGE_SIZE
+from ..unit_of_work import commit, on_commit
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    """Get list of all users with pagination"""
-    return db.query(models.User).filter(
+def get_users(db: Session, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    Get one page of users keyed on (created_at, id), or every user when limit is None;
+    returns (users, next_cursor)
+    """
+    query = db.query(models.User).filter(
         models.User.is_deleted == False
-    ).offset(skip).limit(limit).all()
+    )
+    if limit is None:
+        return query.order_by(models.User.created_at, models.User.id).all(), None
+    return paginate(query, models.User.created_at, models.User.id, cursor, limit)
 
 
 def get_user_by_id_protected(db: Session, user_id: str):
@@ -49,9 +59,9 @@ def update_user_profile(db: Session, user_id: str, user_update: dict):
             if hasattr(db_user, key) and value is not None:
                 setattr(db_user, key, value)
 
-        db_user.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_user)
+        db_user.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_auth(db_user.id))
     return db_user
 
 
@@ -77,9 +87,9 @@ def update_user_with_schema(db: Session, user_id: uuid.UUID, user_update: UserUp
         if hasattr(db_user, key) and key != 'password':  # Password handled separately
             setattr(db_user, key, value)
 
-    db_user.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_user)
+    db_user.updated_at = datetime.now(timezone.utc)
+    commit(db)
+    on_commit(db, lambda: invalidate_user_auth(db_user.id))
     return db_user
 
 
@@ -136,8 +146,10 @@ def soft_delete_user(db: Session, user_id: str):
     if db_user:
         db_user.is_deleted = True
         db_user.is_active = False
-        db_user.updated_at = datetime.utcnow()
-        db.commit()
+        db_user.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_access(db_user.id))
+        on_commit(db, lambda: invalidate_user_auth(db_user.id))
         return True
     return False
 
@@ -151,8 +163,9 @@ def restore_user(db: Session, user_id: uuid.UUID):
     if db_user:
         db_user.is_deleted = False
         db_user.is_active = True
-        db_user.updated_at = datetime.utcnow()
-        db.commit()
+        db_user.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_user_auth(db_user.id))
         return True
     return False
 
@@ -6,29 +6,31 @@ from ..schemas.workspace import (
     WorkspaceCreate, WorkspaceUpdate, WorkspaceMemberCreate,
     WorkspaceMemberUpdate, WorkspaceRole
 )
+from .permissions import get_workspace_access, invalidate_workspace_access
+from ..pagination import paginate, DEFAULT_PAGE_SIZE
+from ..unit_of_work import transaction, commit, on_commit
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def create_workspace(db: Session, workspace: WorkspaceCreate, owner_id: uuid.UUID):
     """Create new workspace with user as owner"""
-    db_workspace = models.Workspace(
-        name=workspace.name,
-        description=workspace.description,
-        owner_id=owner_id
-    )
-    db.add(db_workspace)
-    db.commit()
-    db.refresh(db_workspace)
-
-    # Add owner as ADMIN member
-    db_member = models.WorkspaceMember(
-        workspace_id=db_workspace.id,
-        user_id=owner_id,
-        role=WorkspaceRole.ADMIN
-    )
-    db.add(db_member)
-    db.commit()
+    # Workspace and owner membership are written in one transaction
+    with transaction(db):
+        db_workspace = models.Workspace(
+            id=uuid.uuid4(),
+            name=workspace.name,
+            description=workspace.description,
+            owner_id=owner_id
+        )
+        db.add(db_workspace)
+
+        # Add owner as ADMIN member
+        db.add(models.WorkspaceMember(
+            workspace_id=db_workspace.id,
+            user_id=owner_id,
+            role=WorkspaceRole.ADMIN
+        ))
 
     return db_workspace
 
@@ -42,6 +44,15 @@ def get_user_workspaces(db: Session, user_id: uuid.UUID):
     ).all()
 
 
+def get_user_workspace_ids(db: Session, user_id: uuid.UUID):
+    """IDs of the workspaces the user is a member of"""
+    return [row[0] for row in db.query(models.WorkspaceMember.workspace_id).join(models.Workspace).filter(
+        models.WorkspaceMember.user_id == user_id,
+        models.WorkspaceMember.is_deleted == False,
+        models.Workspace.is_deleted == False
+    ).all()]
+
+
 def get_workspace_by_id(db: Session, workspace_id: uuid.UUID):
     """Get workspace with members"""
     return db.query(models.Workspace).filter(
@@ -62,18 +73,15 @@ def is_workspace_owner(db: Session, workspace_id: uuid.UUID, user_id: uuid.UUID)
 
 def update_workspace(db: Session, workspace_id: uuid.UUID, workspace_update: WorkspaceUpdate):
     """Update workspace details"""
-    db_workspace = db.query(models.Workspace).filter(
-        models.Workspace.id == workspace_id
-    ).first()
+    db_workspace = db.get(models.Workspace, workspace_id)
 
     if db_workspace:
         update_data = workspace_update.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_workspace, key, value)
 
-        db_workspace.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_workspace)
+        db_workspace.updated_at = datetime.now(timezone.utc)
+        commit(db)
 
     return db_workspace
 
@@ -92,9 +100,9 @@ def add_workspace_member(db: Session, workspace_id: uuid.UUID, member_data: Work
             existing_member.is_deleted = False
             existing_member.deleted_at = None
             existing_member.role = WorkspaceRole.MEMBER  # Force MEMBER role
-            existing_member.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(existing_member)
+            existing_member.updated_at = datetime.now(timezone.utc)
+            commit(db)
+            on_commit(db, lambda: invalidate_workspace_access(workspace_id, member_data.user_id))
             return existing_member
         else:
             # Member already exists and is active
@@ -109,8 +117,8 @@ def add_workspace_member(db: Session, workspace_id: uuid.UUID, member_data: Work
         deleted_at=None
     )
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    commit(db)
+    on_commit(db, lambda: invalidate_workspace_access(workspace_id, member_data.user_id))
     return db_member
 
 
@@ -123,9 +131,9 @@ def update_member_role(db: Session, workspace_id: uuid.UUID, user_id: uuid.UUID,
 
     if db_member:
         db_member.role = role
-        db_member.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(db_member)
+        db_member.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_workspace_access(workspace_id, user_id))
 
     return db_member
 
@@ -141,7 +149,8 @@ def remove_workspace_member(db: Session, workspace_id: uuid.UUID, user_id: uuid.
     if db_member:
         db_member.is_deleted = True
         db_member.deleted_at = datetime.utcnow()
-        db.commit()
+        commit(db)
+        on_commit(db, lambda: invalidate_workspace_access(workspace_id, user_id))
         return True
     return False
 
@@ -170,23 +179,18 @@ def check_workspace_access(db: Session, workspace_id: str, user_id: str, require
     if not workspace:
         raise HTTPException(404, "Workspace not found")
 
-    # 2-TIER LOGIC: Owner = ADMIN, Members = MEMBER
-    is_owner = workspace.owner_id == user_uuid
+    # Resolve effective role (cached per user and workspace)
+    access = get_workspace_access(db, workspace.id, user_uuid)
+    if not access:
+        raise HTTPException(404, "Workspace not found")
 
-    if is_owner:
+    # 2-TIER LOGIC: Owner = ADMIN, Members = MEMBER
+    if access.is_owner:
         user_effective_role = WorkspaceRole.ADMIN
+    elif access.is_member:
+        user_effective_role = WorkspaceRole.MEMBER
     else:
-        # Check if user is a member
-        is_member = db.query(models.WorkspaceMember).filter(
-            models.WorkspaceMember.workspace_id == workspace.id,
-            models.WorkspaceMember.user_id == user_uuid,
-            models.WorkspaceMember.is_deleted == False
-        ).first()
-
-        if is_member:
-            user_effective_role = WorkspaceRole.MEMBER
-        else:
-            raise HTTPException(403, "Not a workspace member")
+        raise HTTPException(403, "Not a workspace member")
 
     # Check permission level (ADMIN=1, MEMBER=2, lower = higher privilege)
     if user_effective_role <= required_role:
@@ -216,15 +220,23 @@ def get_workspace_members(db: Session, workspace_id: uuid.UUID):
     ).all()
 
 
+def get_workspace_members_page(db: Session, workspace_id: uuid.UUID, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Get one page of active workspace members keyed on (created_at, id)"""
+    query = db.query(models.WorkspaceMember).filter(
+        models.WorkspaceMember.workspace_id == workspace_id,
+        models.WorkspaceMember.is_deleted == False
+    )
+    return paginate(query, models.WorkspaceMember.created_at, models.WorkspaceMember.id, cursor, limit)
+
+
 def soft_delete_workspace(db: Session, workspace_id: uuid.UUID):
     """Soft delete workspace"""
-    db_workspace = db.query(models.Workspace).filter(
-        models.Workspace.id == workspace_id
-    ).first()
+    db_workspace = db.get(models.Workspace, workspace_id)
 
     if db_workspace:
         db_workspace.is_deleted = True
-        db_workspace.updated_at = datetime.utcnow()
-        db.commit()
+        db_workspace.updated_at = datetime.now(timezone.utc)
+        commit(db)
+        on_commit(db, lambda: invalidate_workspace_access(workspace_id))
         return True
     return False
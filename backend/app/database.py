@@ -1,8 +1,12 @@
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from .metrics import TimedQueuePool, TimedAsyncQueuePool
+from .unit_of_work import begin_request
 
 # Load .env file from the backend directory
 env_path = Path(__file__).parent.parent / ".env"
@@ -10,16 +14,34 @@ load_dotenv(env_path)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Pool classes only add checkout-wait timing for /metrics
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool)
+# Objects stay loaded after commit so CRUD can return them without a refresh (see unit_of_work.py)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
 Base = declarative_base()
 
+# Async engine (asyncpg) for routers listed in ASYNC_ROUTERS
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1).replace(
+    "postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Database dependency function
 
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    # On UnitOfWorkRoute routers the request commits once, before its response (see unit_of_work.py)
+    begin_request(request, db)
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,128 @@
+# In-process timer event bus
+# backend/app/events.py
+#
+# Timer CRUD publishes started/stopped/updated/deleted events after commit;
+# /time-entries/timer/stream subscribers receive the ones for their own
+# timers and for teammates' timers in workspaces they belong to.
+# The bus is per process: with several API workers, a client only sees
+# events published by the worker serving its stream.
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+TIMER_STARTED = "timer.started"
+TIMER_STOPPED = "timer.stopped"
+TIMER_UPDATED = "timer.updated"
+TIMER_DELETED = "timer.deleted"
+# Sent instead of the dropped events when a subscriber falls behind; clients refetch /timer/active
+TIMER_RESYNC = "timer.resync"
+
+TIMER_EVENT_QUEUE_SIZE = int(os.getenv("TIMER_EVENT_QUEUE_SIZE", "100"))
+
+
+class TimerSubscription:
+    """One stream's queue; created and consumed on the event loop"""
+
+    def __init__(self, user_id, workspace_ids, queue_size: int = TIMER_EVENT_QUEUE_SIZE):
+        self.user_id = user_id
+        self.workspace_ids = frozenset(workspace_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, event) -> bool:
+        return event["user_id"] == str(self.user_id) or (
+            event["workspace_id"] is not None and event["workspace_id"] in self.workspace_ids)
+
+    def _deliver(self, event):
+        # Runs on the subscription's loop; a full queue means the client is too slow
+        # to keep up, so replace the backlog with a single resync event
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": TIMER_RESYNC, "at": time.time()})
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float = None):
+        """Next event, or None after timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TimerEventBus:
+    """Fan-out of timer events to stream subscribers; publish is safe from any thread"""
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, user_id, workspace_ids=()) -> TimerSubscription:
+        subscription = TimerSubscription(user_id, {str(workspace_id) for workspace_id in workspace_ids})
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: TimerSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type: str, user_id, workspace_id, time_entry: dict):
+        event = {
+            "type": event_type,
+            "user_id": str(user_id),
+            "workspace_id": str(workspace_id) if workspace_id else None,
+            "time_entry": time_entry,
+            "at": time.time()
+        }
+        with self._lock:
+            self.published += 1
+            targets = [subscription for subscription in self._subscriptions if subscription.wants(event)]
+
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                self.unsubscribe(subscription)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+
+timer_events = TimerEventBus()
+
+
+# Server-Sent Events framing
+
+TIMER_STREAM_HEARTBEAT_SECONDS = float(os.getenv("TIMER_STREAM_HEARTBEAT_SECONDS", "15"))
+# Client reconnect delay advertised to EventSource
+TIMER_STREAM_RETRY_MS = int(os.getenv("TIMER_STREAM_RETRY_MS", "3000"))
+
+
+def sse_message(event_type: str, data) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def timer_event_stream(bus: TimerEventBus, subscription: TimerSubscription, snapshot: dict):
+    """
+    SSE body for one subscriber: the current timer state first, then live events.
+    Comment lines keep idle connections open through proxies; the subscription
+    is dropped when the client disconnects and the generator is closed.
+    """
+    try:
+        yield f"retry: {TIMER_STREAM_RETRY_MS}\n\n"
+        yield sse_message("timer.snapshot", snapshot)
+        while True:
+            event = await subscription.get(TIMER_STREAM_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield sse_message(event["type"], event)
+    finally:
+        bus.unsubscribe(subscription)
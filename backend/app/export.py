@@ -0,0 +1,87 @@
+# Streaming CSV / NDJSON export of time entries
+# backend/app/export.py
+
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from fastapi.responses import StreamingResponse
+from .database import SessionLocal
+from .crud.time_entry import iter_time_entries_for_export
+
+EXPORT_COLUMNS = [
+    "id", "start_time", "end_time", "duration_minutes", "description",
+    "user_name", "user_email", "project_id", "project_name", "task_id", "task_name"
+]
+
+# Rows buffered per chunk written to the client
+CHUNK_ROWS = 500
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_plain(getattr(row, column)) for column in EXPORT_COLUMNS])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _plain(getattr(row, column)) for column in EXPORT_COLUMNS}))
+        if len(lines) == CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def stream_time_entries_export(export_format: ExportFormat, filename: str, **filters):
+    """
+    StreamingResponse for iter_time_entries_for_export(**filters).
+    The export uses its own session so the server-side cursor outlives the request's dependency scope.
+    """
+    def generate():
+        db = SessionLocal()
+        try:
+            rows = iter_time_entries_for_export(db, **filters)
+            if export_format == ExportFormat.NDJSON:
+                yield from _ndjson_chunks(rows)
+            else:
+                yield from _csv_chunks(rows)
+        finally:
+            db.close()
+
+    if export_format == ExportFormat.NDJSON:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    else:
+        media_type, extension = "text/csv", "csv"
+
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
@@ -0,0 +1,220 @@
+# Password hashing service
+# backend/app/hashing.py
+#
+# bcrypt runs in a small, bounded process pool so a login burst burns those
+# processes' CPU instead of holding the API's worker threads (and the GIL).
+# Callers block on the result but the waiting thread releases the GIL, so
+# timer and other traffic keeps being served.
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from .cache import TTLCache
+from .metrics import hashing_queue_wait, hashing_duration
+
+# Work factor; hashes made with any other factor are rehashed transparently on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 hashes inline in the calling thread (scripts, tests)
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes allowed in flight (running + queued) before new ones are rejected with 503.
+# The hashing routes are sync, so every pending hash holds one of the threadpool's
+# threads (40 by default) while it waits; keep this well below that so a login
+# burst can't starve other traffic of threads
+HASHING_MAX_PENDING = int(os.getenv("HASHING_MAX_PENDING", str(max(HASHING_WORKERS, 1) * 2)))
+
+# Admission control for endpoints that hash: attempts per client IP, and failed
+# logins per account email from one client IP (so nobody can lock others out)
+PASSWORD_ATTEMPT_WINDOW_SECONDS = float(os.getenv("PASSWORD_ATTEMPT_WINDOW_SECONDS", "60"))
+PASSWORD_ATTEMPTS_PER_IP = int(os.getenv("PASSWORD_ATTEMPTS_PER_IP", "30"))
+PASSWORD_ATTEMPTS_PER_EMAIL = int(os.getenv("PASSWORD_ATTEMPTS_PER_EMAIL", "5"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+
+# Worker-side functions: module level so they can be pickled into the pool.
+# Each returns (result, started_at, finished_at) so the caller can split queue wait from hash time.
+
+def _hash_job(password: str):
+    started_at = time.time()
+    return pwd_context.hash(password), started_at, time.time()
+
+
+def _verify_job(password: str, hashed_password: str):
+    started_at = time.time()
+    return pwd_context.verify(password, hashed_password), started_at, time.time()
+
+
+def _verify_and_update_job(password: str, hashed_password: str):
+    started_at = time.time()
+    return pwd_context.verify_and_update(password, hashed_password), started_at, time.time()
+
+
+class PasswordHasher:
+    """Bounded bcrypt executor with queue-depth and timing counters"""
+
+    def __init__(self, workers: int = HASHING_WORKERS, max_pending: int = HASHING_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+
+    def _get_executor(self):
+        # Created lazily; spawn so workers don't inherit the server's threads and connections
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _run(self, job, *args):
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many authentication requests, please retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self.in_flight += 1
+            self.submitted += 1
+            executor = self._get_executor() if self.workers > 0 else None
+
+        submitted_at = time.time()
+        try:
+            if executor is None:
+                result, started_at, finished_at = job(*args)
+            else:
+                result, started_at, finished_at = executor.submit(job, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        queue_seconds = max(0.0, started_at - submitted_at)
+        with self._lock:
+            self.completed += 1
+            self.queue_seconds_total += queue_seconds
+            self.queue_seconds_max = max(self.queue_seconds_max, queue_seconds)
+            self.hash_seconds_total += finished_at - started_at
+        hashing_queue_wait.observe(queue_seconds)
+        hashing_duration.observe(finished_at - started_at)
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_job, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(_verify_job, password, hashed_password)
+
+    def verify_and_update(self, password: str, hashed_password: str):
+        """(valid, new_hash) - new_hash is set when the stored hash wasn't made with the current work factor"""
+        return self._run(_verify_and_update_job, password, hashed_password)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_seconds": self.queue_seconds_total / self.completed if self.completed else 0.0,
+                "max_queue_seconds": self.queue_seconds_max,
+                "avg_hash_seconds": self.hash_seconds_total / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AttemptLimiter:
+    """Fixed-window attempt counter per key (client IP, email)"""
+
+    def __init__(self, max_attempts: int, window_seconds: float, max_keys: int = 100000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._windows = TTLCache(max_entries=max_keys, ttl_seconds=window_seconds)
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Count an attempt; returns seconds until the window resets if key is over its limit, else None"""
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                self._windows.set(key, [now, 1])
+                return None
+            window[1] += 1
+            if window[1] > self.max_attempts:
+                return max(1.0, self.window_seconds - (now - window[0]))
+            return None
+
+    def check(self, key):
+        """Seconds until the window resets if key has used up its attempts, else None (without counting)"""
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and window[1] >= self.max_attempts:
+                return max(1.0, self.window_seconds - (now - window[0]))
+            return None
+
+
+password_hasher = PasswordHasher()
+ip_limiter = AttemptLimiter(PASSWORD_ATTEMPTS_PER_IP, PASSWORD_ATTEMPT_WINDOW_SECONDS)
+email_limiter = AttemptLimiter(PASSWORD_ATTEMPTS_PER_EMAIL, PASSWORD_ATTEMPT_WINDOW_SECONDS)
+
+
+def _too_many_attempts(retry_after: float):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, please try again later",
+        headers={"Retry-After": str(int(retry_after))}
+    )
+
+
+def _email_key(client_ip: str, email: str):
+    return (email.lower(), client_ip)
+
+
+def admit_password_attempt(client_ip: str = None, email: str = None):
+    """
+    Raise 429 before any hashing work when the client IP is over its attempt budget, or
+    has already failed too many logins for this email (successful logins don't count)
+    """
+    if client_ip:
+        retry_after = ip_limiter.hit(client_ip)
+        if retry_after is not None:
+            raise _too_many_attempts(retry_after)
+    if email:
+        retry_after = email_limiter.check(_email_key(client_ip, email))
+        if retry_after is not None:
+            raise _too_many_attempts(retry_after)
+
+
+def record_failed_password_attempt(client_ip: str = None, email: str = None):
+    """Count a failed login against the email's budget for this client IP"""
+    if email:
+        email_limiter.hit(_email_key(client_ip, email))
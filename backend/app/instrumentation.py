@@ -0,0 +1,173 @@
+# Per-request SQL instrumentation
+# backend/app/instrumentation.py
+#
+# Engine event hooks count and time every statement executed on behalf of the
+# current request (sync engine and the async engine alike) and fingerprint them,
+# so a statement repeated N times with different parameters - the shape of an
+# N+1 behind a lazy relationship - shows up as one fingerprint with count N.
+# Each request ends with a structured "sql" log line; with SQL_DEBUG_HEADERS=1
+# the totals are also returned as X-SQL-* response headers.
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "0") == "1"
+# Same SELECT fingerprint this many times in one request is reported as N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+SQL_DEBUG_HEADER_NAMES = ["X-SQL-Queries", "X-SQL-Time-Ms", "X-SQL-N-Plus-One"]
+
+_current_stats = contextvars.ContextVar("sql_query_stats", default=None)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with parameters, literals and IN-list lengths normalised away"""
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("?...", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class QueryStats:
+    """Statements executed during one request (or track_queries block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.by_fingerprint = {}  # fingerprint -> [count, seconds]
+        self._fingerprints = {}   # raw statement -> fingerprint
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        # Fingerprinting is the expensive part, so it's done once per distinct statement text
+        key = self._fingerprints.get(statement)
+        if key is None:
+            key = self._fingerprints[statement] = fingerprint(statement)
+        entry = self.by_fingerprint.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        """SELECT fingerprints executed at least threshold times, most frequent first"""
+        return sorted(
+            (
+                {
+                    "fingerprint": hashlib.sha1(key.encode()).hexdigest()[:12],
+                    "count": count,
+                    "ms": round(seconds * 1000, 2),
+                    "statement": key[:300]
+                }
+                for key, (count, seconds) in self.by_fingerprint.items()
+                if count >= threshold and key.lstrip("( ").upper().startswith(("SELECT", "WITH"))
+            ),
+            key=lambda item: item["count"],
+            reverse=True
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def instrument_engine(engine):
+    """Attach the statement counters to a (sync) Engine; use async_engine.sync_engine for async"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries():
+    """
+    Collect QueryStats for the statements run inside the block, e.g. to assert a
+    query budget in a script or test:  with track_queries() as stats: ...; assert stats.count <= 3
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class SQLInstrumentationMiddleware:
+    """ASGI middleware that scopes QueryStats to each HTTP request"""
+
+    def __init__(self, app, debug_headers: bool = SQL_DEBUG_HEADERS, threshold: int = SQL_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started_at = time.perf_counter()
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    # Streaming bodies may run more statements after this point; the log line has the totals
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-sql-queries", str(stats.count).encode()))
+                    headers.append((b"x-sql-time-ms", f"{stats.seconds * 1000:.2f}".encode()))
+                    headers.append((b"x-sql-n-plus-one", str(len(stats.repeated(self.threshold))).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            self._log(scope, status_code, stats, time.perf_counter() - started_at)
+
+    def _log(self, scope, status_code, stats: QueryStats, seconds: float):
+        if not stats.count:
+            return
+        repeated = stats.repeated(self.threshold)
+        route = scope.get("route")
+        record = {
+            "event": "sql",
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "route": getattr(route, "path", None),
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 2),
+            "queries": stats.count,
+            "sql_ms": round(stats.seconds * 1000, 2),
+            "distinct_statements": len(stats.by_fingerprint),
+            "n_plus_one": repeated
+        }
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record))
@@ -1,12 +1,57 @@
+import os
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine
-from .routes import auth, user, workspace, project, task, time_entry, analytics
+from .database import Base, engine, async_engine
+from .pagination import NEXT_CURSOR_HEADER
+from .hashing import password_hasher
+from .partitions import PartitionMaintainer
+from .crud.analytics import analytics_cache
+from .metrics import MetricsMiddleware, METRICS_ENABLED, registry, watch_pool, watch_cache, watch_password_hasher
+from .crud.auth_cache import token_claims_cache, user_cache
+from .crud.permissions import permission_cache
+from .crud.time_entry import project_workspace_cache
+from .slow_queries import slow_query_recorder
+from .profiling import ProfilingMiddleware, PROFILING_ENABLED, PROFILE_ID_HEADER_NAMES
+from .instrumentation import (
+    SQLInstrumentationMiddleware, instrument_engine,
+    SQL_INSTRUMENTATION, SQL_DEBUG_HEADERS, SQL_DEBUG_HEADER_NAMES
+)
+from .routes import auth, user, workspace, project, task, time_entry, analytics, async_time_entry, admin
+
+# Routers served from the async engine (AsyncSession), e.g. ASYNC_ROUTERS=time_entries.
+# Only the time entry endpoints have async versions so far; any other name is a
+# configuration mistake and stops startup rather than being silently ignored.
+SUPPORTED_ASYNC_ROUTERS = {"time_entries"}
+ASYNC_ROUTERS = {name.strip() for name in os.getenv("ASYNC_ROUTERS", "").split(",") if name.strip()}
+if ASYNC_ROUTERS - SUPPORTED_ASYNC_ROUTERS:
+    raise ValueError(
+        f"Unsupported ASYNC_ROUTERS {', '.join(sorted(ASYNC_ROUTERS - SUPPORTED_ASYNC_ROUTERS))}; "
+        f"only {', '.join(sorted(SUPPORTED_ASYNC_ROUTERS))} can be served asynchronously"
+    )
 
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="TimeTrack API", description="A time tracking application API")
 
+
+# Keeps upcoming monthly time_entries partitions created
+partition_maintainer = PartitionMaintainer(engine)
+
+
+@app.on_event("startup")
+def start_partition_maintenance():
+    partition_maintainer.start()
+
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    partition_maintainer.stop()
+    password_hasher.shutdown()
+    analytics_cache.shutdown()
+    slow_query_recorder.shutdown()
+
+
 # Configure CORS to allow requests from your frontend
 origins = [
     "http://localhost",
@@ -21,8 +66,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER] + (SQL_DEBUG_HEADER_NAMES if SQL_DEBUG_HEADERS else [])
+    + (PROFILE_ID_HEADER_NAMES if PROFILING_ENABLED else []),
 )
 
+# Per-request statement counts, timings and N+1 detection (see instrumentation.py)
+if SQL_INSTRUMENTATION:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(SQLInstrumentationMiddleware)
+
+# Slow statement log with sampled EXPLAIN plans, served at /admin/slow-queries.
+# Async statements are recorded too, but only the psycopg2 engine can replay them for EXPLAIN.
+slow_query_recorder.attach(engine)
+slow_query_recorder.attach(async_engine.sync_engine, explain=False)
+
+# Requests sent with a signed X-Profile-Request header are sampled (see profiling.py)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Prometheus metrics: route latency/sizes, in-flight requests, DB pools, hashing queue, caches
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    watch_pool("sync", engine.pool)
+    watch_pool("async", async_engine.pool)
+    watch_password_hasher(password_hasher)
+    watch_cache("token_claims", token_claims_cache)
+    watch_cache("user", user_cache)
+    watch_cache("permissions", permission_cache)
+    watch_cache("project_workspace", project_workspace_cache)
+    watch_cache("analytics", analytics_cache)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Authentication routes
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 
@@ -38,8 +116,13 @@ app.include_router(project.router, prefix="/projects", tags=["Projects"])
 # Task management routes
 app.include_router(task.router, prefix="/tasks", tags=["Tasks"])
 
-# Time tracking routes
+# Time tracking routes (async endpoints take precedence when enabled)
+if "time_entries" in ASYNC_ROUTERS:
+    app.include_router(async_time_entry.router, prefix="/time-entries", tags=["Time Tracking"])
 app.include_router(time_entry.router, prefix="/time-entries", tags=["Time Tracking"])
 
 # Analytics routes
-app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
\ No newline at end of file
+app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+
+# Admin routes (superusers only)
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -0,0 +1,307 @@
+# In-process metrics in Prometheus text format
+# backend/app/metrics.py
+#
+# A small registry of counters, gauges and histograms (no client library needed)
+# served at /metrics. Recording is a dict lookup plus a bisect under a lock per
+# metric; values read from other components (pool size, hashing queue, caches)
+# are collected only when /metrics is scraped.
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+HASH_QUEUE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set_total(self, value, *labels):
+        """For counters mirrored from a component that keeps its own running total"""
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, plus sum and count
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, labels, ('le', _format_value(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collect):
+        """collect() is called on every scrape, to refresh gauges from their source"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for collect in collectors:
+            collect()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to the end of the response body", ("method", "route"))
+http_request_size = registry.histogram(
+    "http_request_size_bytes", "Request body size", ("method", "route"), SIZE_BUCKETS)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), SIZE_BUCKETS)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being served", ("method",))
+
+# Database pools
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("pool",), WAIT_BUCKETS)
+db_pool_size = registry.gauge("db_pool_size", "Configured pool size", ("pool",))
+db_pool_checked_out = registry.gauge("db_pool_checked_out", "Connections currently checked out", ("pool",))
+db_pool_overflow = registry.gauge("db_pool_overflow", "Connections open beyond pool_size (negative while filling)", ("pool",))
+db_pool_checked_in = registry.gauge("db_pool_checked_in", "Idle connections in the pool", ("pool",))
+
+# Password hashing
+hashing_queue_wait = registry.histogram(
+    "password_hash_queue_seconds", "Time a bcrypt job waited for a hashing worker", (), HASH_QUEUE_BUCKETS)
+hashing_duration = registry.histogram(
+    "password_hash_seconds", "Time spent hashing/verifying in a worker", (), HASH_QUEUE_BUCKETS)
+
+# Caches
+cache_hits = registry.counter("cache_hits_total", "Lookups served from the cache (stale hits included)", ("cache",))
+cache_misses = registry.counter("cache_misses_total", "Lookups not served from the cache", ("cache",))
+cache_hit_ratio = registry.gauge("cache_hit_ratio", "hits / (hits + misses) since start", ("cache",))
+cache_entries = registry.gauge("cache_entries", "Entries currently cached", ("cache",))
+
+
+class _TimedCheckout:
+    """Mixin timing how long QueuePool._do_get blocks for a connection"""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at, self.metrics_label)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def watch_pool(label: str, pool):
+    """Report a QueuePool's size/checked-out/overflow gauges on every scrape"""
+    def collect():
+        db_pool_size.set(pool.size(), label)
+        db_pool_checked_out.set(pool.checkedout(), label)
+        db_pool_overflow.set(pool.overflow(), label)
+        db_pool_checked_in.set(pool.checkedin(), label)
+    registry.add_collector(collect)
+
+
+def watch_cache(name: str, cache):
+    """Report a TTLCache/ResponseCache's hit ratio and size on every scrape"""
+    def collect():
+        hits = cache.hits + getattr(cache, "stale_hits", 0)
+        lookups = hits + cache.misses
+        cache_hits.set_total(hits, name)
+        cache_misses.set_total(cache.misses, name)
+        cache_hit_ratio.set(hits / lookups if lookups else 0.0, name)
+        cache_entries.set(len(cache), name)
+    registry.add_collector(collect)
+
+
+def watch_password_hasher(hasher):
+    """Report the hashing pool's queue depth and rejections on every scrape"""
+    in_flight = registry.gauge("password_hash_in_flight", "bcrypt jobs running or queued")
+    queued = registry.gauge("password_hash_queued", "bcrypt jobs waiting for a worker")
+    rejected = registry.counter("password_hash_rejected_total", "bcrypt jobs rejected with 503")
+
+    def collect():
+        stats = hasher.stats()
+        in_flight.set(stats["in_flight"])
+        queued.set(stats["queued"])
+        rejected.set_total(stats["rejected"])
+    registry.add_collector(collect)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, sizes and in-flight requests"""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started_at = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            # Route template (not the raw path) keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_requests.inc(method, route, str(status_code))
+            http_request_duration.observe(time.perf_counter() - started_at, method, route)
+            http_request_size.observe(request_bytes, method, route)
+            http_response_size.observe(response_bytes, method, route)
@@ -10,6 +10,8 @@ from .workspace import Workspace, WorkspaceMember
 from .project import Project, ProjectMember
 from .task import Task
 from .time_entry import TimeEntry
+from .active_timer import ActiveTimer
+from .daily_time_rollup import DailyTimeRollup
 
 __all__ = [
     "BaseModel",
@@ -20,4 +22,6 @@ __all__ = [
     "ProjectMember",
     "Task",
     "TimeEntry",
+    "ActiveTimer",
+    "DailyTimeRollup",
 ]
\ No newline at end of file
@@ -0,0 +1,41 @@
+# One row per user with a running timer
+# backend/app/models/active_timer.py
+
+from sqlalchemy import Column, DateTime, ForeignKey, event, inspect, text
+from sqlalchemy.dialects.postgresql import UUID
+from ..database import Base
+
+# Claim a slot for every entry already running, newest per user (timers start and
+# stop only through active_timers, so entries without a slot could never be stopped)
+BACKFILL_ACTIVE_TIMERS_SQL = text("""
+    INSERT INTO active_timers (user_id, time_entry_id, start_time)
+    SELECT DISTINCT ON (user_id) user_id, id, start_time
+    FROM time_entries
+    WHERE end_time IS NULL AND is_deleted = false
+    ORDER BY user_id, start_time DESC
+    ON CONFLICT (user_id) DO NOTHING
+""")
+
+class ActiveTimer(Base):
+    """
+    Enforces "at most one running timer per user" for the partitioned time_entries table,
+    where a unique partial index on user_id alone is not possible.
+    Written in the same transaction as the timer's time entry.
+    """
+    __tablename__ = "active_timers"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True,
+                     comment="User whose timer is running")
+    time_entry_id = Column(UUID(as_uuid=True), nullable=False,
+                           comment="ID of the running time entry")
+    start_time = Column(DateTime(timezone=True), nullable=False,
+                        comment="Start of the running entry, locates its time_entries partition")
+
+
+def backfill_active_timers(target, connection, **kw):
+    """after_create hook: a deployment that adds active_timers keeps its running timers stoppable"""
+    if connection.dialect.name == "postgresql" and inspect(connection).has_table("time_entries"):
+        connection.execute(BACKFILL_ACTIVE_TIMERS_SQL)
+
+
+event.listen(ActiveTimer.__table__, "after_create", backfill_active_timers)
@@ -9,6 +9,8 @@ from ..database import Base # Import the Base from your database setup
 
 class BaseModel(Base):
     __abstract__ = True # This tells SQLAlchemy not to create a table for BaseModel itself
+    # Server-generated values come back with INSERT/UPDATE ... RETURNING instead of a refresh SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True,
                 comment="Unique identifier for the record (UUID)")
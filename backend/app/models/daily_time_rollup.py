@@ -0,0 +1,35 @@
+# Pre-aggregated daily totals of completed time entries
+# backend/app/models/daily_time_rollup.py
+
+from datetime import datetime, timezone
+from sqlalchemy import Column, Date, DateTime, Float, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from ..database import Base
+
+class DailyTimeRollup(Base):
+    """
+    One row per (user, project, task, UTC day), maintained in the same transaction as
+    the time entry writes (see crud/rollup.py). Rebuild with rebuild_daily_rollups.py.
+    """
+    __tablename__ = "daily_time_rollups"
+    __table_args__ = (
+        # Project reports over a date range
+        Index("ix_daily_time_rollups_project_day", "project_id", "day"),
+    )
+
+    # Primary key leads with (user_id, day) so per-user date ranges are a single index range scan
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True,
+                     comment="ID of the user who recorded the time")
+    day = Column(Date, primary_key=True,
+                 comment="UTC date of the entries' start_time")
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), primary_key=True,
+                        comment="ID of the project the time was logged against")
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"), primary_key=True,
+                     comment="ID of the task/subtask the time was logged against")
+
+    minutes = Column(Float, default=0, nullable=False,
+                     comment="Sum of duration_minutes of completed, non-deleted entries")
+    entries_count = Column(Integer, default=0, nullable=False,
+                           comment="Number of completed, non-deleted entries")
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False,
+                        comment="Timestamp when the rollup was last changed (UTC)")
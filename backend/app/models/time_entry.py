@@ -1,16 +1,37 @@
 # For tracking time model
 # backend/app/models/time_entry.py
 
-from sqlalchemy import Column, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Float, Text, Index, text, event
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 from sqlalchemy.dialects.postgresql import UUID
+from ..partitions import create_initial_partitions
 
 class TimeEntry(BaseModel):
     __tablename__ = "time_entries"
+    # Range partitioned by month on start_time (see app/partitions.py, partition_time_entries.py).
+    # Indexes are created on every partition; unique indexes would have to include start_time,
+    # so "one running timer per user" is enforced by the active_timers table instead.
+    __table_args__ = (
+        # get_active_timer
+        Index("ix_time_entries_running_timer", "user_id",
+              postgresql_where=text("end_time IS NULL AND is_deleted = false")),
+        # get_time_entries_by_date_range / user history, covering the aggregated columns
+        Index("ix_time_entries_user_start_time", "user_id", "start_time",
+              postgresql_include=["end_time", "duration_minutes", "project_id", "task_id"],
+              postgresql_where=text("is_deleted = false")),
+        # get_task_time_entries
+        Index("ix_time_entries_task_id", "task_id",
+              postgresql_where=text("is_deleted = false")),
+        # get_project_time_entries / get_workspace_time_entries
+        Index("ix_time_entries_project_start_time", "project_id", "start_time",
+              postgresql_where=text("is_deleted = false")),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
 
-    start_time = Column(DateTime(timezone=True), nullable=False,
-                        comment="Timestamp when the time entry started (UTC)")
+    # Part of the primary key because it is the partition key; ORM updates then prune to one partition
+    start_time = Column(DateTime(timezone=True), primary_key=True, nullable=False,
+                        comment="Timestamp when the time entry started (UTC), partition key")
     end_time = Column(DateTime(timezone=True), nullable=True,
                       comment="Timestamp when the time entry ended (UTC), null if still running")
     duration_minutes = Column(Float, nullable=True,
@@ -28,4 +49,8 @@ class TimeEntry(BaseModel):
     # Relationships
     user = relationship("User")
     project = relationship("Project")
-    task = relationship("Task", back_populates="time_entries")
\ No newline at end of file
+    task = relationship("Task", back_populates="time_entries")
+
+
+# create_all creates the default partition and the months around now along with the table
+event.listen(TimeEntry.__table__, "after_create", create_initial_partitions)
@@ -0,0 +1,76 @@
+# Keyset (cursor) pagination helpers
+# backend/app/pagination.py
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort_value: datetime, row_id: uuid.UUID) -> str:
+    """Opaque cursor for the row a page ended on"""
+    raw = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor - raises 400 for tampered or malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid pagination cursor")
+
+
+def apply_keyset(query, sort_column, id_column, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, descending: bool = False):
+    """
+    Filter, order and limit a Query or Select for the page after cursor.
+    One extra row is requested so split_page can tell whether another page exists.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        key = tuple_(sort_column, id_column)
+        query = query.filter(key < tuple_(sort_value, row_id) if descending else key > tuple_(sort_value, row_id))
+
+    # Replace any existing ordering with the keyset ordering
+    query = query.order_by(None)
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+
+    return query.limit(limit + 1)
+
+
+def split_page(rows, sort_column, id_column, limit: int = DEFAULT_PAGE_SIZE):
+    """Turn the rows fetched by apply_keyset into (items, next_cursor)"""
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return items, next_cursor
+
+
+def paginate(query, sort_column, id_column, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE, descending: bool = False):
+    """
+    Apply keyset pagination ordered by (sort_column, id_column) to a sync Query.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    rows = apply_keyset(query, sort_column, id_column, cursor, limit, descending).all()
+    return split_page(rows, sort_column, id_column, limit)
+
+
+def set_next_cursor(response: Response, next_cursor: str):
+    """Expose the next page cursor to clients, leaving list bodies unchanged"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,197 @@
+# Monthly range partitions of time_entries (on start_time)
+# backend/app/partitions.py
+#
+# time_entries_yYYYYmMM holds one UTC month; time_entries_default catches anything
+# outside the attached months (e.g. imported history) until a maintenance pass
+# splits it out into its own month. Old months can be detached into an archive schema.
+
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "time_entries"
+DEFAULT_PARTITION = "time_entries_default"
+ARCHIVE_SCHEMA = "time_entries_archive"
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("TIME_ENTRY_PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("TIME_ENTRY_PARTITION_MAINTENANCE_SECONDS", str(6 * 3600)))
+
+_PARTITION_NAME = re.compile(r"^time_entries_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"time_entries_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str):
+    """Month a partition table holds, or None for the default/other tables"""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE relname = :name AND relnamespace = 'public'::regnamespace"
+    ), {"name": PARENT_TABLE}).scalar() or False
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": f"public.{name}"}).scalar() is not None
+
+
+def attached_partitions(conn):
+    """Names of the partitions currently attached to time_entries"""
+    return [row[0] for row in conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+        ORDER BY c.relname
+    """), {"parent": PARENT_TABLE})]
+
+
+def create_default_partition(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+
+def create_month_partition(conn, month: date) -> bool:
+    """Create (and attach) the partition for month; returns False if it already exists"""
+    name = partition_name(month)
+    if _table_exists(conn, name):
+        return False
+
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    upper_month = add_months(month, 1)
+    upper = datetime(upper_month.year, upper_month.month, 1, tzinfo=timezone.utc)
+    bounds = f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    params = {"lower": lower, "upper": upper}
+
+    has_default_rows = _table_exists(conn, DEFAULT_PARTITION) and conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE start_time >= :lower AND start_time < :upper)"
+    ), params).scalar()
+
+    if not has_default_rows:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return True
+
+    # Rows for this month landed in the default partition; move them out before the bounds can attach
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE start_time >= :lower AND start_time < :upper
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), params)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+    return True
+
+
+def ensure_time_entry_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD, first_month: date = None):
+    """
+    Make sure the default partition and every month from first_month (default: this month)
+    through months_ahead exist, and split any month that has rows in the default partition.
+    Safe to run concurrently from several processes. Returns the names of created partitions.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('time_entries_partitions'))"))
+    create_default_partition(conn)
+
+    current = month_start(datetime.now(timezone.utc).date())
+    first_month = month_start(first_month) if first_month else current
+    months = set()
+    month = first_month
+    while month <= add_months(current, months_ahead):
+        months.add(month)
+        month = add_months(month, 1)
+
+    months.update(row[0] for row in conn.execute(text(f"""
+        SELECT DISTINCT date_trunc('month', timezone('UTC', start_time))::date
+        FROM {DEFAULT_PARTITION}
+    """)))
+
+    created = []
+    for month in sorted(months):
+        if create_month_partition(conn, month):
+            created.append(partition_name(month))
+    return created
+
+
+def create_initial_partitions(target, connection, **kw):
+    """after_create hook for the time_entries Table so create_all yields an insertable table"""
+    if connection.dialect.name == "postgresql":
+        ensure_time_entry_partitions(connection)
+
+
+def detach_partitions_before(conn, cutoff_month: date, archive: bool = True):
+    """
+    Detach every monthly partition older than cutoff_month. Detached tables keep their data;
+    with archive=True they are moved into the time_entries_archive schema.
+    Rollups in daily_time_rollups are left untouched, so reports still cover archived months.
+    """
+    cutoff_month = month_start(cutoff_month)
+    detached = []
+    for name in attached_partitions(conn):
+        month = partition_month(name)
+        if month is None or month >= cutoff_month:
+            continue
+
+        # DETACH ... CONCURRENTLY isn't allowed while a default partition exists, but a plain
+        # detach only holds its lock for the catalog update
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if archive:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        detached.append(name)
+    return detached
+
+
+class PartitionMaintainer:
+    """Background thread that keeps future partitions created while the app runs"""
+
+    def __init__(self, engine, interval_seconds: float = PARTITION_MAINTENANCE_INTERVAL_SECONDS):
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        try:
+            with self.engine.begin() as conn:
+                if not is_partitioned(conn):
+                    return []
+                created = ensure_time_entry_partitions(conn)
+            if created:
+                logger.info("Created time_entries partitions: %s", ", ".join(created))
+            return created
+        except Exception:
+            logger.exception("time_entries partition maintenance failed")
+            return []
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="partition-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
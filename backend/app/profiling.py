@@ -0,0 +1,323 @@
+# On-demand request profiling
+# backend/app/profiling.py
+#
+# A request carrying a valid X-Profile-Request header is profiled by a sampling
+# profiler while it runs; every other request goes straight through. Header values
+# are minted by a superuser via POST /admin/profiles/tokens, HMAC-signed with
+# PROFILING_SECRET and bound to one method + path, an expiry, the minting user and
+# a one-time nonce: the request must also carry that user's bearer token, and the
+# value is spent by the first request that uses it (per worker process - the
+# ledger of spent nonces is in memory). The samples are saved as a speedscope
+# file in a bounded on-disk directory and the response says where to fetch it.
+#
+# Sampling (sys._current_frames() every PROFILING_INTERVAL_MS from a side thread)
+# rather than cProfile because sync routes run in threadpool workers: a profiler
+# enabled in the event loop thread would never see check_task_access & co.
+# Samples are attributed to the request by this middleware's coroutine frame on
+# the event loop thread and by the route's endpoint/dependency functions on
+# worker threads, so a concurrent request to the same endpoint can bleed in;
+# profile on a quiet instance when that matters.
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import NamedTuple
+from .cache import NonceLedger
+from .crud.auth_cache import get_token_claims
+
+logger = logging.getLogger(__name__)
+
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+PROFILING_ENABLED = bool(PROFILING_SECRET)
+PROFILING_HEADER = "X-Profile-Request"
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "timetrack-profiles"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
+PROFILING_MAX_BYTES = int(os.getenv("PROFILING_MAX_BYTES", str(200 * 1024 * 1024)))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+# Sampling stops after this long, e.g. for a /timer/stream connection
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "30"))
+PROFILING_MAX_TOKEN_TTL = int(os.getenv("PROFILING_MAX_TOKEN_TTL", "3600"))
+
+PROFILE_ID_HEADER_NAMES = ["X-Profile-Id", "X-Profile-Url"]
+
+_header_key = PROFILING_HEADER.lower().encode()
+
+
+def _signature(expires: int, user_id: str, nonce: str, method: str, path: str) -> str:
+    message = f"{expires}:{user_id}:{nonce}:{method.upper()}:{path}".encode()
+    return hmac.new(PROFILING_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+class ProfileGrant(NamedTuple):
+    user_id: str
+    nonce: str
+    expires: int
+
+
+def sign_profile_request(method: str, path: str, user_id, ttl: int = 300) -> str:
+    """
+    X-Profile-Request header value letting user_id have one request to method + path
+    profiled within ttl seconds
+    """
+    expires = int(time.time()) + min(ttl, PROFILING_MAX_TOKEN_TTL)
+    nonce = secrets.token_urlsafe(12)
+    return f"{expires}.{user_id}.{nonce}.{_signature(expires, str(user_id), nonce, method, path)}"
+
+
+def verify_profile_request(value: str, method: str, path: str):
+    """ProfileGrant of a correctly signed, unexpired header value for this method + path, else None"""
+    if not PROFILING_SECRET:
+        return None
+    parts = value.split(".")
+    if len(parts) != 4:
+        return None
+    expires, user_id, nonce, signature = parts
+    if not expires.isdigit() or int(expires) < time.time():
+        return None
+    if not hmac.compare_digest(signature, _signature(int(expires), user_id, nonce, method, path)):
+        return None
+    return ProfileGrant(user_id, nonce, int(expires))
+
+
+def _bearer_subject(scope):
+    """sub claim of the request's valid bearer token, if it has one"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            claims = get_token_claims(token.strip())
+            return claims.get("sub") if claims else None
+    return None
+
+
+def _route_codes(route):
+    """Code objects of a route's endpoint and all of its dependencies"""
+    codes = set()
+    dependants = [getattr(route, "dependant", None)]
+    while dependants:
+        dependant = dependants.pop()
+        if dependant is None:
+            continue
+        call = getattr(dependant.call, "__wrapped__", dependant.call)
+        code = getattr(call, "__code__", None) or getattr(getattr(call, "__call__", None), "__code__", None)
+        if code is not None:
+            codes.add(code)
+        dependants.extend(dependant.dependencies)
+    return codes
+
+
+class RequestSampler:
+    """Side thread sampling the stacks that belong to one request"""
+
+    def __init__(self, scope, root_frame, interval_ms: float = PROFILING_INTERVAL_MS,
+                 max_seconds: float = PROFILING_MAX_SECONDS):
+        self.scope = scope
+        self.root_frame = root_frame
+        self.loop_thread_id = threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.frames = []        # speedscope shared frames
+        self._frame_index = {}  # (name, file, line) -> index in frames
+        self.samples = {}       # thread id -> ([stack], [weight ms])
+        self._codes = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now - self.started_at > self.max_seconds:
+                return
+            self._sample((now - last) * 1000)
+            last = now
+
+    def _sample(self, weight_ms: float):
+        if self._codes is None and self.scope.get("route") is not None:
+            self._codes = _route_codes(self.scope["route"])
+        own_thread_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            stack = self._request_stack(thread_id, frame)
+            if stack:
+                stacks, weights = self.samples.setdefault(thread_id, ([], []))
+                stacks.append(stack)
+                weights.append(weight_ms)
+
+    def _request_stack(self, thread_id, frame):
+        """Frame indexes root -> leaf from where this request starts on the thread, or None"""
+        frames = []
+        cut = None
+        while frame is not None:
+            frames.append(frame)
+            if thread_id == self.loop_thread_id:
+                if frame is self.root_frame:
+                    cut = len(frames)
+                    break
+            elif self._codes and frame.f_code in self._codes:
+                cut = len(frames)
+            frame = frame.f_back
+        if cut is None:
+            return None
+        return [self._index(f) for f in reversed(frames[:cut])]
+
+    def _index(self, frame):
+        code = frame.f_code
+        key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def speedscope(self, name: str):
+        """The samples as a speedscope file (https://www.speedscope.app/file-format-schema.json)"""
+        profiles = []
+        for thread_id, (stacks, weights) in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": "event loop" if thread_id == self.loop_thread_id else f"worker thread {thread_id}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": stacks,
+                "weights": [round(weight, 3) for weight in weights]
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "timetrack-request-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": profiles
+        }
+
+
+class ProfileStore:
+    """Speedscope files in a directory, oldest removed past max_files / max_bytes"""
+
+    suffix = ".speedscope.json"
+
+    def __init__(self, directory: str = PROFILING_DIR, max_files: int = PROFILING_MAX_FILES,
+                 max_bytes: int = PROFILING_MAX_BYTES):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, profile_id: str):
+        """File for a profile id, or None if it isn't (or is no longer) stored"""
+        try:
+            profile_id = str(uuid.UUID(profile_id))
+        except ValueError:
+            return None
+        path = os.path.join(self.directory, profile_id + self.suffix)
+        return path if os.path.exists(path) else None
+
+    def save(self, profile_id: str, document: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id + self.suffix)
+        # Written under a temporary name so a download never sees half a file
+        with open(path + ".tmp", "w") as f:
+            json.dump(document, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        self._prune()
+
+    def list(self):
+        """Stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                entries.append({
+                    "id": entry.name[:-len(self.suffix)],
+                    "size": stat.st_size,
+                    "created_at": stat.st_mtime
+                })
+        return sorted(entries, key=lambda entry: entry["created_at"], reverse=True)
+
+    def _prune(self):
+        with self._lock:
+            entries = self.list()
+            total = sum(entry["size"] for entry in entries)
+            while entries and (len(entries) > self.max_files or total > self.max_bytes):
+                oldest = entries.pop()
+                total -= oldest["size"]
+                try:
+                    os.remove(os.path.join(self.directory, oldest["id"] + self.suffix))
+                except FileNotFoundError:
+                    pass
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests that carry a valid X-Profile-Request header"""
+
+    def __init__(self, app, store: ProfileStore = profile_store, url_prefix: str = "/admin/profiles"):
+        self.app = app
+        self.store = store
+        self.url_prefix = url_prefix
+        self.spent_nonces = NonceLedger()
+
+    def _granted(self, scope) -> bool:
+        """Whether this request carries a fresh grant and the bearer token of the user it was minted for"""
+        value = dict(scope["headers"]).get(_header_key)
+        if value is None:
+            return False
+        grant = verify_profile_request(value.decode("latin-1"), scope["method"], scope["path"])
+        if grant is None or _bearer_subject(scope) != grant.user_id:
+            return False
+        return self.spent_nonces.spend(grant.nonce, grant.expires)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._granted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                headers.append((b"x-profile-url", f"{self.url_prefix}/{profile_id}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = RequestSampler(scope, sys._getframe())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            name = f"{scope['method']} {scope['path']} ({sampler.duration * 1000:.1f} ms)"
+            try:
+                # Serialising can take a while for long requests; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: self.store.save(profile_id, sampler.speedscope(name)))
+            except Exception:
+                logger.exception("Failed to save profile %s", profile_id)
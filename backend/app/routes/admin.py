@@ -0,0 +1,78 @@
+"""Operational endpoints for superusers"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from ..schemas.user import UserResponse
+from ..unit_of_work import UnitOfWorkRoute
+from ..slow_queries import slow_query_recorder
+from ..profiling import (
+    profile_store, sign_profile_request,
+    PROFILING_ENABLED, PROFILING_HEADER, PROFILING_MAX_TOKEN_TTL
+)
+from .auth import get_current_user
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+def get_current_superuser(current_user: UserResponse = Depends(get_current_user)):
+    """Current user, or 403 unless they are a superuser"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access admin endpoints"
+        )
+    return current_user
+
+
+@router.get("/slow-queries")
+def read_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: Optional[float] = Query(None, ge=0),
+    current_user: UserResponse = Depends(get_current_superuser)
+):
+    """Recently recorded slow statements, newest first, with sampled EXPLAIN plans"""
+    return {
+        "stats": slow_query_recorder.stats(),
+        "queries": slow_query_recorder.snapshot(limit, min_duration_ms)
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(current_user: UserResponse = Depends(get_current_superuser)):
+    """Empty the slow statement buffer"""
+    slow_query_recorder.clear()
+
+
+@router.post("/profiles/tokens")
+def create_profile_token(
+    path: str = Query(..., description="Request path to profile, e.g. /analytics/productivity-insights"),
+    method: str = Query("GET"),
+    ttl: int = Query(300, ge=1, le=PROFILING_MAX_TOKEN_TTL),
+    current_user: UserResponse = Depends(get_current_superuser)
+):
+    """
+    Single-use X-Profile-Request header value; the next request to method + path sent
+    with it and with this user's bearer token is profiled
+    """
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request profiling is not enabled")
+    return {
+        "header": PROFILING_HEADER,
+        "value": sign_profile_request(method, path, current_user.id, ttl),
+        "expires_in": ttl
+    }
+
+
+@router.get("/profiles")
+def list_profiles(current_user: UserResponse = Depends(get_current_superuser)):
+    """Stored request profiles, newest first"""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, current_user: UserResponse = Depends(get_current_superuser)):
+    """A stored profile as a speedscope file (open it at https://www.speedscope.app)"""
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}{profile_store.suffix}")
@@ -1,11 +1,120 @@
 """Simple analytics routes for the AI chatbot demo"""
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from ..database import get_db
-from ..models import User, TimeEntry, Task, Project
+from ..database import get_db, SessionLocal
+from ..unit_of_work import UnitOfWorkRoute
+from ..models import User
+from ..crud.analytics import get_productivity_metrics, get_recent_activity_rows, analytics_cache
+from .auth import get_current_user
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+def cached_analytics(db: Session, user_id, endpoint: str, build, *params):
+    """
+    build(db, user_id, *params) served from analytics_cache, keyed by (user, endpoint, params).
+    Stale entries are rebuilt in the background on their own session.
+    """
+    def refresh():
+        refresh_db = SessionLocal()
+        try:
+            return build(refresh_db, user_id, *params)
+        finally:
+            refresh_db.close()
+
+    return analytics_cache.get_or_compute(
+        str(user_id), (endpoint, params), lambda: build(db, user_id, *params), refresh)
+
+
+def build_productivity_insights(db: Session, user_id):
+    """Productivity insights response for a user"""
+    # Aggregate this user's time entries in SQL
+    metrics = get_productivity_metrics(db, user_id)
+    entries_count = metrics["entries_count"]
+    
+    if not entries_count:
+        return {
+            "message": "No time tracking data available yet. Start logging your time to see insights!",
+            "total_hours": 0,
+            "entries_count": 0,
+            "projects_worked": [],
+            "insights": ["Start tracking your time to see productivity insights"]
+        }
+    
+    # Calculate basic metrics
+    total_hours = metrics["total_minutes"] / 60
+    
+    # Per-project hours
+    project_hours = {
+        name: minutes / 60 for name, minutes in metrics["project_minutes"].items()
+    }
+    projects = set(project_hours)
+    
+    # Recent activity (last 7 days)
+    recent_hours = metrics["recent_minutes"] / 60
+    
+    # Generate insights
+    insights = []
+    if project_hours:
+        top_project = max(project_hours.items(), key=lambda x: x[1])
+        insights.append(f"You've spent the most time on '{top_project[0]}' with {top_project[1]:.1f} hours")
+    
+    if recent_hours > 0:
+        insights.append(f"In the last 7 days, you've logged {recent_hours:.1f} hours")
+    
+    avg_hours = total_hours / entries_count if entries_count else 0
+    if avg_hours > 0:
+        insights.append(f"Your average session length is {avg_hours:.1f} hours")
+    
+    return {
+        "total_hours": round(total_hours, 1),
+        "entries_count": entries_count,
+        "average_session_hours": round(avg_hours, 1),
+        "projects_worked": list(projects),
+        "project_hours_distribution": project_hours,
+        "most_productive_project": max(project_hours.items(), key=lambda x: x[1])[0] if project_hours else None,
+        "recent_week_hours": round(recent_hours, 1),
+        "insights": insights
+    }
+
+
+def build_recent_activity(db: Session, user_id, days: int):
+    """Recent activity response for a user"""
+    time_entries = get_recent_activity_rows(db, user_id, days)
+    
+    # Process entries for response
+    entries_data = []
+    daily_summaries = {}
+    
+    for te in time_entries:
+        date_str = te.start_time.date().isoformat() if te.start_time else te.created_at.date().isoformat()
+        hours = float(te.duration_minutes or 0) / 60
+        
+        entries_data.append({
+            "date": date_str,
+            "duration_hours": hours,
+            "project_name": te.project_name or "Unknown",
+            "task_name": te.task_name or "Unknown Task"
+        })
+        
+        if date_str not in daily_summaries:
+            daily_summaries[date_str] = {"date": date_str, "total_hours": 0, "entries_count": 0, "projects": set()}
+        
+        daily_summaries[date_str]["total_hours"] += hours
+        daily_summaries[date_str]["entries_count"] += 1
+        if te.project_name:
+            daily_summaries[date_str]["projects"].add(te.project_name)
+    
+    # Convert sets to lists
+    for summary in daily_summaries.values():
+        summary["projects"] = list(summary["projects"])
+    
+    return {
+        "time_entries": entries_data,
+        "daily_summaries": list(daily_summaries.values()),
+        "period": f"Last {days} days"
+    }
 
-router = APIRouter()
 
 @router.get("/productivity-insights/{user_id}")
 async def get_productivity_insights(user_id: str, db: Session = Depends(get_db)):
@@ -26,61 +135,8 @@ async def get_productivity_insights(user_id: str, db: Session = Depends(get_db))
                 "insights": ["Please register or log in to see your data"]
             }
         
-        # Get time entries for this user
-        time_entries = db.query(TimeEntry).filter(TimeEntry.user_id == user.id).all()
-        
-        if not time_entries:
-            return {
-                "message": "No time tracking data available yet. Start logging your time to see insights!",
-                "total_hours": 0,
-                "entries_count": 0,
-                "projects_worked": [],
-                "insights": ["Start tracking your time to see productivity insights"]
-            }
-        
-        # Calculate basic metrics
-        total_minutes = sum(float(te.duration_minutes or 0) for te in time_entries)
-        total_hours = total_minutes / 60
-        
-        # Get unique projects
-        projects = set()
-        project_hours = {}
-        
-        for te in time_entries:
-            if te.task and te.task.project:
-                project_name = te.task.project.name
-                projects.add(project_name)
-                hours = float(te.duration_minutes or 0) / 60
-                project_hours[project_name] = project_hours.get(project_name, 0) + hours
-        
-        # Recent activity (last 7 days)
-        recent_date = datetime.utcnow() - timedelta(days=7)
-        recent_entries = [te for te in time_entries if te.created_at >= recent_date]
-        recent_hours = sum(float(te.duration_minutes or 0) for te in recent_entries) / 60
-        
-        # Generate insights
-        insights = []
-        if project_hours:
-            top_project = max(project_hours.items(), key=lambda x: x[1])
-            insights.append(f"You've spent the most time on '{top_project[0]}' with {top_project[1]:.1f} hours")
-        
-        if recent_hours > 0:
-            insights.append(f"In the last 7 days, you've logged {recent_hours:.1f} hours")
-        
-        avg_hours = total_hours / len(time_entries) if time_entries else 0
-        if avg_hours > 0:
-            insights.append(f"Your average session length is {avg_hours:.1f} hours")
-        
-        return {
-            "total_hours": round(total_hours, 1),
-            "entries_count": len(time_entries),
-            "average_session_hours": round(avg_hours, 1),
-            "projects_worked": list(projects),
-            "project_hours_distribution": project_hours,
-            "most_productive_project": max(project_hours.items(), key=lambda x: x[1])[0] if project_hours else None,
-            "recent_week_hours": round(recent_hours, 1),
-            "insights": insights
-        }
+        # Served from memory until one of the user's time entries changes
+        return cached_analytics(db, user.id, "productivity-insights", build_productivity_insights)
         
     except Exception as e:
         # Return fallback data if there's any error
@@ -117,44 +173,7 @@ async def get_recent_activity(user_id: str, days: int = 30, db: Session = Depend
         if not user:
             return {"time_entries": [], "daily_summaries": [], "period": f"Last {days} days"}
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        time_entries = db.query(TimeEntry).filter(
-            TimeEntry.user_id == user.id,
-            TimeEntry.created_at >= cutoff_date
-        ).order_by(TimeEntry.created_at.desc()).all()
-        
-        # Process entries for response
-        entries_data = []
-        daily_summaries = {}
-        
-        for te in time_entries:
-            date_str = te.start_time.date().isoformat() if te.start_time else te.created_at.date().isoformat()
-            hours = float(te.duration_minutes or 0) / 60
-            
-            entries_data.append({
-                "date": date_str,
-                "duration_hours": hours,
-                "project_name": te.task.project.name if te.task and te.task.project else "Unknown",
-                "task_name": te.task.name if te.task else "Unknown Task"
-            })
-            
-            if date_str not in daily_summaries:
-                daily_summaries[date_str] = {"date": date_str, "total_hours": 0, "entries_count": 0, "projects": set()}
-            
-            daily_summaries[date_str]["total_hours"] += hours
-            daily_summaries[date_str]["entries_count"] += 1
-            if te.task and te.task.project:
-                daily_summaries[date_str]["projects"].add(te.task.project.name)
-        
-        # Convert sets to lists
-        for summary in daily_summaries.values():
-            summary["projects"] = list(summary["projects"])
-        
-        return {
-            "time_entries": entries_data,
-            "daily_summaries": list(daily_summaries.values()),
-            "period": f"Last {days} days"
-        }
+        return cached_analytics(db, user.id, "recent-activity", build_recent_activity, days)
         
     except Exception as e:
         # Return fallback demo data
@@ -171,3 +190,11 @@ async def get_recent_activity(user_id: str, days: int = 30, db: Session = Depend
             ],
             "period": f"Last {days} days"
         }
+
+
+@router.get("/cache-stats")
+def get_analytics_cache_stats(current_user: User = Depends(get_current_user)):
+    """Analytics response cache size and hit/miss counters (superusers only)"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to view cache statistics")
+    return analytics_cache.stats()
@@ -0,0 +1,170 @@
+"""
+Async (AsyncSession) versions of the I/O-bound time entry endpoints.
+Mounted ahead of routes/time_entry.py under the same prefix when "time_entries"
+is listed in ASYNC_ROUTERS; endpoints not defined here fall through to the sync router.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, date, timedelta
+from ..database import get_async_db
+from ..crud.async_time_entry import (
+    start_time_entry, get_active_timer, stop_active_timer,
+    get_time_entries_by_date_range, search_time_entries
+)
+from ..pagination import set_next_cursor, MAX_PAGE_SIZE
+from ..crud.async_task import get_task_by_id
+from ..crud.async_project import check_project_permission
+from ..schemas.time_entry import (
+    TimeEntryCreate, TimeEntryResponse, TimeEntryTimerStart,
+    TimeEntrySortField
+)
+from .auth import get_current_user_async
+from ..models.user import User
+
+router = APIRouter()
+
+
+async def verify_task_time_access(db: AsyncSession, task_id, user: User, detail: str):
+    """Task must exist and user must be a project member or the assignee"""
+    task = await get_task_by_id(db, task_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+    has_project_access = task.project_id and await check_project_permission(
+        db, task.project_id, user.id)
+    is_assigned = task.assigned_to_id == user.id
+
+    if not (has_project_access or is_assigned):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
+    return task
+
+
+@router.get("/my-entries", response_model=List[TimeEntryResponse])
+async def list_my_time_entries(
+    response: Response,
+    start_date: Optional[date] = Query(
+        None, description="Filter entries from this date"),
+    end_date: Optional[date] = Query(
+        None, description="Filter entries until this date"),
+    task_id: Optional[str] = Query(
+        None, description="Filter entries for specific task"),
+    project_id: Optional[str] = Query(
+        None, description="Filter entries for specific project"),
+    workspace_id: Optional[str] = Query(
+        None, description="Filter entries for projects in this workspace"),
+    min_duration: Optional[float] = Query(
+        None, ge=0, description="Minimum duration in minutes"),
+    max_duration: Optional[float] = Query(
+        None, ge=0, description="Maximum duration in minutes"),
+    running_only: bool = Query(
+        False, description="Only entries whose timer is still running"),
+    description: Optional[str] = Query(
+        None, description="Case-insensitive text the description must contain"),
+    sort_by: TimeEntrySortField = Query(
+        TimeEntrySortField.START_TIME, description="Sort column"),
+    descending: bool = Query(
+        True, description="Newest first"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get current user's time entries with optional filters"""
+    import uuid
+
+    task_uuid = None
+    if task_id:
+        task_uuid = uuid.UUID(task_id)
+        await verify_task_time_access(
+            db, task_uuid, current_user, "Not authorized to view time entries for this task")
+
+    entries, next_cursor = await search_time_entries(
+        db,
+        sort_by=sort_by,
+        descending=descending,
+        cursor=cursor,
+        limit=limit,
+        user_id=current_user.id,
+        task_id=task_uuid,
+        project_id=uuid.UUID(project_id) if project_id else None,
+        workspace_id=uuid.UUID(workspace_id) if workspace_id else None,
+        start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+        end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        running_only=running_only,
+        description=description
+    )
+    set_next_cursor(response, next_cursor)
+    return entries
+
+
+@router.get("/daily/{date}", response_model=List[TimeEntryResponse])
+async def get_daily_entries(
+    date: date,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get time entries for a specific date"""
+    start_datetime = datetime.combine(date, datetime.min.time())
+    end_datetime = start_datetime + timedelta(days=1)
+    return await get_time_entries_by_date_range(db, current_user.id, start_datetime, end_datetime)
+
+
+@router.post("/timer/start")
+async def start_time_timer(
+    timer_data: TimeEntryTimerStart,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start a timer for a task"""
+    if timer_data.task_id:
+        await verify_task_time_access(
+            db, timer_data.task_id, current_user, "Not authorized to track time for this task")
+
+    time_entry = TimeEntryCreate(
+        user_id=current_user.id,
+        task_id=timer_data.task_id,
+        project_id=timer_data.project_id,
+        description=timer_data.description,
+        start_time=timer_data.start_time
+    )
+
+    timer = await start_time_entry(db, time_entry)
+    return {"message": "Timer started successfully", "time_entry": TimeEntryResponse.model_validate(timer)}
+
+
+@router.post("/timer/stop", response_model=TimeEntryResponse)
+async def stop_time_timer(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stop the active timer and create time entry"""
+    time_entry = await stop_active_timer(db, current_user.id)
+    if not time_entry:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No active timer found"
+        )
+    return time_entry
+
+
+@router.get("/timer/active")
+async def get_active_time_timer(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get current active timer"""
+    active_timer = await get_active_timer(db, current_user.id)
+    if active_timer:
+        return {"active": True, "time_entry": TimeEntryResponse.model_validate(active_timer)}
+    return {"active": False, "time_entry": None}
@@ -1,15 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import ipaddress
+import os
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from ..database import get_db
-from ..crud.auth import get_user_by_id, get_user_by_email, create_user, authenticate_user, request_password_reset, reset_user_password
+from ..database import get_db, get_async_db
+from ..unit_of_work import UnitOfWorkRoute
+from ..crud.auth import get_user_by_email, create_user, authenticate_user, request_password_reset, reset_user_password
+from ..crud.auth_cache import get_token_claims, get_cached_user, get_cached_user_async
 from ..schemas.auth import UserSignup, Token, ForgotPasswordRequest, ResetPasswordRequest, ForgotPasswordResponse
 from ..schemas.user import UserResponse
-from ..utils import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, verify_token, create_reset_token, verify_reset_token
+from ..cache import NonceLedger
+from ..hashing import admit_password_attempt, record_failed_password_attempt, password_hasher
+from ..utils import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, create_reset_token, verify_reset_token, verify_stream_ticket
+)
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+# Reverse proxies (comma-separated IPs or CIDRs) whose X-Forwarded-For header is believed,
+# so rate limits apply to the real client rather than to the proxy
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()
+]
 
-router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# jti of stream tickets already used to open a stream
+spent_stream_tickets = NonceLedger()
+
+
+def _token_user_id(token: str, credentials_exception: HTTPException):
+    """User ID from the (cached) token claims"""
+    claims = get_token_claims(token)
+    if claims is None:
+        raise credentials_exception
+
+    # Convert string UUID back to UUID object
+    try:
+        import uuid
+        return uuid.UUID(claims["sub"])
+    except (ValueError, TypeError):
+        raise credentials_exception
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -19,25 +55,84 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    user_id = verify_token(token)
-    if user_id is None:
+    # Both lookups are cache hits for a token seen recently (see crud/auth_cache.py);
+    # FastAPI already resolves this dependency once per request
+    user_uuid = _token_user_id(token, credentials_exception)
+    user = get_cached_user(db, user_uuid)
+
+    if user is None:
         raise credentials_exception
+    return user
 
-    # Convert string UUID back to UUID object
+
+def get_stream_user(
+    token: str = Depends(optional_oauth2_scheme),
+    ticket: str = Query(None, description="Single-use ticket from POST /time-entries/timer/stream-ticket, "
+                                          "for clients (EventSource) that can't send headers"),
+    db: Session = Depends(get_db)
+):
+    """get_current_user that also accepts a stream ticket in place of the bearer token"""
+    if token:
+        return get_current_user(token, db)
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    claims = verify_stream_ticket(ticket) if ticket else None
+    # Spent per worker process, like profiling nonces; tickets only live STREAM_TICKET_EXPIRE_SECONDS
+    if claims is None or not spent_stream_tickets.spend(claims["jti"], claims["exp"]):
+        raise credentials_exception
     try:
-        import uuid
-        user_uuid = uuid.UUID(user_id)
-        user = get_user_by_id(db, user_id=user_uuid)
+        user_uuid = uuid.UUID(claims["sub"])
     except (ValueError, TypeError):
         raise credentials_exception
+    user = get_cached_user(db, user_uuid)
+    if user is None:
+        raise credentials_exception
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Same as get_current_user, for routers running on the async engine"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
+    user_uuid = _token_user_id(token, credentials_exception)
+    user = await get_cached_user_async(db, user_uuid)
     if user is None:
         raise credentials_exception
     return user
 
 
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request):
+    """Client address, taken from X-Forwarded-For when the request came through a trusted proxy"""
+    peer = request.client.host if request.client else None
+    if not peer or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for value in request.headers.getlist("x-forwarded-for") for hop in value.split(",") if hop.strip()]
+    # Walk back from the nearest hop; the first address we don't operate is the client
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserSignup, db: Session = Depends(get_db)):
+def register_user(user: UserSignup, request: Request, db: Session = Depends(get_db)):
+    admit_password_attempt(client_ip(request))
+
     # Check if user already exists
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
@@ -51,9 +146,14 @@ def register_user(user: UserSignup, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_user(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    # Rejected before any bcrypt work so a burst can't monopolise the hashing pool
+    ip = client_ip(request)
+    admit_password_attempt(ip, form_data.username)
+
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        record_failed_password_attempt(ip, form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -72,6 +172,17 @@ def read_users_me(current_user: UserResponse = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/hashing-stats")
+def read_hashing_stats(current_user: UserResponse = Depends(get_current_user)):
+    """Password hashing pool queue depth and timings (superusers only)"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view hashing statistics"
+        )
+    return password_hasher.stats()
+
+
 @router.post("/forgot-password", response_model=ForgotPasswordResponse)
 def forgot_password(
     request: ForgotPasswordRequest,
@@ -108,10 +219,12 @@ def forgot_password(
 @router.post("/reset-password")
 def reset_password(
     request: ResetPasswordRequest,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """Reset password using reset token"""
-    
+    admit_password_attempt(client_ip(http_request))
+
     # Verify the reset token
     email = verify_reset_token(request.token)
     if not email:
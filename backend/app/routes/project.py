@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import get_db
+from ..unit_of_work import UnitOfWorkRoute
 from .. import models
 from ..crud.project import (
     create_project, get_workspace_projects, get_user_projects, get_project_by_id,
     update_project, add_project_member, update_project_member_role,
     remove_project_member, get_project_members,
-    soft_delete_project, check_project_access, get_user_accessible_projects
+    soft_delete_project, check_project_access, get_user_accessible_projects,
+    get_user_projects_page
 )
+from ..pagination import set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from ..crud.workspace import check_workspace_access, is_workspace_owner
 from ..schemas.project import (
     ProjectCreate, ProjectResponse, ProjectUpdate,
@@ -18,7 +21,7 @@ from ..schemas.workspace import WorkspaceRole
 from .auth import get_current_user
 from ..models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @router.post("/", response_model=ProjectResponse)
@@ -58,10 +61,20 @@ def list_workspace_projects(
 
 @router.get("/my-projects", response_model=List[ProjectResponse])
 def list_user_projects(
+    response: Response,
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all projects where user is a member"""
+    if cursor or limit:
+        projects, next_cursor = get_user_projects_page(
+            db, current_user.id, cursor, limit or DEFAULT_PAGE_SIZE)
+        set_next_cursor(response, next_cursor)
+        return projects
     return get_user_projects(db, current_user.id)
 
 
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database import get_db
+from ..unit_of_work import UnitOfWorkRoute
 from .. import models
 from ..crud.task import (
     create_task, get_project_tasks, get_task_by_id, get_user_tasks,
     update_task, get_task_subtasks, update_task_status,
-    assign_task, unassign_task, soft_delete_task, check_task_access,
-    get_workspace_tasks, get_user_accessible_tasks, get_user_tasks_enhanced
+    assign_task, unassign_task, soft_delete_task_subtree, check_task_access,
+    get_workspace_tasks, get_user_accessible_tasks, get_user_accessible_tasks_page,
+    get_user_tasks_enhanced,
+    get_task_project_id, get_project_task_tree, get_project_tasks_page
 )
+from ..pagination import set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from ..crud.project import check_project_access
+from ..crud.permissions import get_project_access
 from ..crud.workspace import is_workspace_owner
 from ..schemas.task import (
     TaskCreate, TaskResponse, TaskUpdate, TaskStatus
@@ -18,7 +23,15 @@ from ..schemas.project import ProjectRole
 from .auth import get_current_user
 from ..models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+def sees_all_project_tasks(db: Session, project_id, user_id) -> bool:
+    """Workspace owners and project managers see every task, members only their own"""
+    access = get_project_access(db, project_id, user_id)
+    if not access:
+        return False
+    return access.is_manager or access.member_role == ProjectRole.MANAGER
 
 
 @router.post("/", response_model=TaskResponse)
@@ -48,8 +61,13 @@ def create_new_task(
 
 @router.get("/project/{project_id}", response_model=List[TaskResponse])
 def list_project_tasks(
+    response: Response,
     project_id: str,
     include_subtasks: bool = True,
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -60,6 +78,23 @@ def list_project_tasks(
     # Check if user has access to the project using new 2-tier system
     project = check_project_access(db, project_id, str(current_user.id))
     
+    # Cursor pagination: visibility filter applied in SQL, keyed on (created_at, id)
+    if cursor or limit:
+        sees_all = sees_all_project_tasks(db, project_uuid, current_user.id)
+        tasks, next_cursor = get_project_tasks_page(
+            db, project_uuid, include_subtasks,
+            member_id=None if sees_all else current_user.id,
+            cursor=cursor, limit=limit or DEFAULT_PAGE_SIZE)
+        set_next_cursor(response, next_cursor)
+        if not sees_all and include_subtasks:
+            for task in tasks:
+                if task.subtasks:
+                    task.subtasks = [
+                        subtask for subtask in task.subtasks
+                        if subtask.assigned_to_id == current_user.id or subtask.assigned_to_id is None
+                    ]
+        return tasks
+    
     # Check if user is workspace owner for enhanced visibility
     if is_workspace_owner(db, project.workspace_id, current_user.id):
         # Workspace owner sees ALL tasks
@@ -100,6 +135,44 @@ def list_project_tasks(
             return member_tasks
 
 
+@router.get("/project/{project_id}/tree", response_model=List[TaskResponse])
+def get_project_task_tree_endpoint(
+    project_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a project's full task tree, assembled from a single query, with role-based filtering"""
+    # Check if user has access to the project using new 2-tier system
+    project = check_project_access(db, project_id, str(current_user.id))
+
+    # Workspace owners and project managers see everything, members see assigned or unassigned tasks
+    member_id = None if sees_all_project_tasks(db, project.id, current_user.id) else current_user.id
+    return get_project_task_tree(db, project.id, member_id)
+
+
+@router.get("/my-tasks", response_model=List[TaskResponse])
+def list_my_accessible_tasks(
+    response: Response,
+    workspace_id: Optional[str] = Query(
+        None, description="Only tasks in this workspace"),
+    status: Optional[TaskStatus] = Query(
+        None, description="Only tasks with this status"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get tasks accessible to the current user (all for managers, assigned for members)"""
+    import uuid
+    workspace_uuid = uuid.UUID(workspace_id) if workspace_id else None
+
+    tasks, next_cursor = get_user_accessible_tasks_page(
+        db, current_user.id, workspace_uuid, status, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return tasks
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task_details(
     task_id: str,
@@ -117,31 +190,18 @@ def get_task_details(
     all_subtasks = get_task_subtasks(db, task_uuid)
     
     # Apply member filtering for subtasks (same logic as list_task_subtasks)
-    project_id = task.project_id
+    project_id = get_task_project_id(db, task)
     if not project_id:
         raise HTTPException(500, "Task not associated with project")
     
-    # Check if user is workspace owner
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if project and is_workspace_owner(db, project.workspace_id, current_user.id):
-        filtered_subtasks = all_subtasks  # Workspace owner sees all
+    if sees_all_project_tasks(db, project_id, current_user.id):
+        filtered_subtasks = all_subtasks  # Workspace owner / project manager sees all
     else:
-        # Check if user is project manager
-        is_project_manager = db.query(models.ProjectMember).filter(
-            models.ProjectMember.project_id == project_id,
-            models.ProjectMember.user_id == current_user.id,
-            models.ProjectMember.role == ProjectRole.MANAGER,
-            models.ProjectMember.is_deleted == False
-        ).first()
-        
-        if is_project_manager:
-            filtered_subtasks = all_subtasks  # Project manager sees all
-        else:
-            # Member sees only subtasks assigned to them OR unassigned subtasks
-            filtered_subtasks = [
-                subtask for subtask in all_subtasks 
-                if subtask.assigned_to_id == current_user.id or subtask.assigned_to_id is None
-            ]
+        # Member sees only subtasks assigned to them OR unassigned subtasks
+        filtered_subtasks = [
+            subtask for subtask in all_subtasks 
+            if subtask.assigned_to_id == current_user.id or subtask.assigned_to_id is None
+        ]
     
     # Replace the task's subtasks with filtered ones
     task.subtasks = filtered_subtasks
@@ -224,6 +284,7 @@ def unassign_task_from_user(
 @router.delete("/{task_id}")
 def delete_task(
     task_id: str,
+    include_time_entries: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -234,14 +295,18 @@ def delete_task(
     # Check manager access using new 2-tier system
     task = check_task_access(db, task_id, str(current_user.id), ProjectRole.MANAGER)
     
-    success = soft_delete_task(db, task_uuid)
-    if not success:
+    deleted = soft_delete_task_subtree(db, task_uuid, include_time_entries)
+    if not deleted["tasks"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to delete task"
         )
     
-    return {"message": "Task deleted successfully"}
+    return {
+        "message": "Task deleted successfully",
+        "deleted_tasks": deleted["tasks"],
+        "deleted_time_entries": deleted["time_entries"]
+    }
 
 
 @router.get("/{task_id}/subtasks", response_model=List[TaskResponse])
@@ -261,25 +326,12 @@ def list_task_subtasks(
     all_subtasks = get_task_subtasks(db, task_uuid)
     
     # Apply member filtering for subtasks
-    project_id = task.project_id
+    project_id = get_task_project_id(db, task)
     if not project_id:
         raise HTTPException(500, "Task not associated with project")
     
-    # Check if user is workspace owner
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if project and is_workspace_owner(db, project.workspace_id, current_user.id):
-        return all_subtasks  # Workspace owner sees all
-    
-    # Check if user is project manager
-    is_project_manager = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project_id,
-        models.ProjectMember.user_id == current_user.id,
-        models.ProjectMember.role == ProjectRole.MANAGER,
-        models.ProjectMember.is_deleted == False
-    ).first()
-    
-    if is_project_manager:
-        return all_subtasks  # Project manager sees all
+    if sees_all_project_tasks(db, project_id, current_user.id):
+        return all_subtasks  # Workspace owner / project manager sees all
     else:
         # Member sees subtasks assigned to them OR unassigned subtasks
         member_subtasks = [
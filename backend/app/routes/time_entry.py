@@ -1,26 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
 from ..database import get_db
+from ..unit_of_work import UnitOfWorkRoute
 from ..crud.time_entry import (
-    start_time_entry, get_user_time_entries, get_task_time_entries,
-    update_time_entry, get_active_timer, stop_time_entry,
+    start_time_entry, get_task_time_entries,
+    update_time_entry, get_active_timer, stop_active_timer,
     get_time_entries_by_date_range, soft_delete_time_entry,
-    create_manual_time_entry
+    create_manual_time_entry, get_user_time_entries_page, search_time_entries
 )
+from ..pagination import set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..export import ExportFormat, stream_time_entries_export
+from ..crud.time_entry_import import import_time_entries_csv
+from ..crud.rollup import get_user_rollup_totals, get_user_rollup_breakdown
 
 from ..crud.task import get_task_by_id
 from ..crud.project import check_project_permission
+from ..crud.workspace import get_user_workspace_ids
+from ..events import timer_events, timer_event_stream
+from ..utils import create_stream_ticket, STREAM_TICKET_EXPIRE_SECONDS
 from ..schemas.time_entry import (
-    TimeEntryCreate, TimeEntryResponse, TimeEntryUpdate, TimeEntryTimerStart
+    TimeEntryCreate, TimeEntryResponse, TimeEntryUpdate, TimeEntryTimerStart,
+    StatisticsGroupBy, TimeEntrySortField
 )
 from ..schemas.project import ProjectRole
-from .auth import get_current_user
+from .auth import get_current_user, get_stream_user
 from ..models.user import User
 from ..models.time_entry import TimeEntry
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 # Helper function to get time entry by ID
 
@@ -68,29 +79,42 @@ def create_new_time_entry(
 
 @router.get("/my-entries", response_model=List[TimeEntryResponse])
 def list_my_time_entries(
+    response: Response,
     start_date: Optional[date] = Query(
         None, description="Filter entries from this date"),
     end_date: Optional[date] = Query(
         None, description="Filter entries until this date"),
     task_id: Optional[str] = Query(
         None, description="Filter entries for specific task"),
+    project_id: Optional[str] = Query(
+        None, description="Filter entries for specific project"),
+    workspace_id: Optional[str] = Query(
+        None, description="Filter entries for projects in this workspace"),
+    min_duration: Optional[float] = Query(
+        None, ge=0, description="Minimum duration in minutes"),
+    max_duration: Optional[float] = Query(
+        None, ge=0, description="Maximum duration in minutes"),
+    running_only: bool = Query(
+        False, description="Only entries whose timer is still running"),
+    description: Optional[str] = Query(
+        None, description="Case-insensitive text the description must contain"),
+    sort_by: TimeEntrySortField = Query(
+        TimeEntrySortField.START_TIME, description="Sort column"),
+    descending: bool = Query(
+        True, description="Newest first"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get current user's time entries with optional filters"""
-    # Get entries based on date range if provided
-    if start_date and end_date:
-        from datetime import datetime
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        entries = get_time_entries_by_date_range(
-            db, current_user.id, start_datetime, end_datetime)
-    else:
-        entries = get_user_time_entries(db, current_user.id)
-
-    # Filter by task if specified
+    from datetime import datetime
+    import uuid
+
+    task_uuid = None
     if task_id:
-        import uuid
         task_uuid = uuid.UUID(task_id)
 
         # Verify user has access to the task
@@ -111,12 +135,121 @@ def list_my_time_entries(
                 detail="Not authorized to view time entries for this task"
             )
 
-        # Filter entries by task
-        entries = [entry for entry in entries if entry.task_id == task_uuid]
-
+    # All filters are applied in SQL; pagination is keyed on (sort column, id)
+    entries, next_cursor = search_time_entries(
+        db,
+        sort_by=sort_by,
+        descending=descending,
+        cursor=cursor,
+        limit=limit,
+        user_id=current_user.id,
+        task_id=task_uuid,
+        project_id=uuid.UUID(project_id) if project_id else None,
+        workspace_id=uuid.UUID(workspace_id) if workspace_id else None,
+        start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+        end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        running_only=running_only,
+        description=description
+    )
+    set_next_cursor(response, next_cursor)
     return entries
 
 
+@router.get("/export")
+def export_my_time_entries(
+    format: ExportFormat = Query(ExportFormat.CSV, description="csv or ndjson"),
+    start_date: Optional[date] = Query(
+        None, description="Export entries from this date"),
+    end_date: Optional[date] = Query(
+        None, description="Export entries until this date"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the current user's time entries as CSV or NDJSON"""
+    from datetime import datetime
+    return stream_time_entries_export(
+        format,
+        filename="time-entries",
+        user_id=current_user.id,
+        start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+        end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None
+    )
+
+
+@router.post("/import")
+def import_my_time_entries(
+    file: UploadFile = File(..., description="CSV export (ours, Toggl or Clockify style)"),
+    workspace_id: Optional[str] = Query(
+        None, description="Resolve project names within this workspace"),
+    dry_run: bool = Query(
+        False, description="Validate only, don't write anything"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk import completed time entries for the current user from a CSV file"""
+    import io
+    import uuid
+    workspace_uuid = uuid.UUID(workspace_id) if workspace_id else None
+
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_time_entries_csv(
+            db, csv_file, current_user.id, workspace_id=workspace_uuid, dry_run=dry_run)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded CSV"
+        )
+    finally:
+        csv_file.detach()
+
+
+# Statistics are aggregated in SQL from daily_time_rollups; raw entries only on request
+@router.get("/statistics")
+def get_time_tracking_statistics(
+    response: Response,
+    start_date: Optional[date] = Query(
+        None, description="Statistics from this date"),
+    end_date: Optional[date] = Query(
+        None, description="Statistics until this date"),
+    group_by: Optional[StatisticsGroupBy] = Query(
+        None, description="Only return this breakdown (project, task or day); all three by default"),
+    include_entries: bool = Query(
+        False, description="Also return the raw entries, paginated"),
+    cursor: Optional[str] = Query(
+        None, description="Entries cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(
+        DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Entries page size"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get time tracking statistics for current user"""
+    total_entries, total_minutes = get_user_rollup_totals(
+        db, current_user.id, start_date, end_date)
+
+    group_bys = [group_by] if group_by else list(StatisticsGroupBy)
+    statistics = {
+        "total_time_minutes": total_minutes,
+        "total_entries": total_entries
+    }
+    for grouping in group_bys:
+        statistics[f"by_{grouping.value}"] = get_user_rollup_breakdown(
+            db, current_user.id, grouping.value, start_date, end_date)
+
+    if include_entries:
+        from datetime import datetime
+        entries, next_cursor = get_user_time_entries_page(
+            db, current_user.id,
+            start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+            end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None,
+            cursor=cursor, limit=limit)
+        set_next_cursor(response, next_cursor)
+        statistics["entries"] = [TimeEntryResponse.model_validate(entry) for entry in entries]
+
+    return statistics
+
+
 @router.get("/daily/{date}", response_model=List[TimeEntryResponse])
 def get_daily_entries(
     date: date,
@@ -284,15 +417,8 @@ def start_time_timer(
                 detail="Not authorized to track time for this task"
             )
 
-    # Check if user already has an active timer
-    active_timer = get_active_timer(db, current_user.id)
-    if active_timer:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have an active timer. Stop it before starting a new one."
-        )
-
     # Create TimeEntryCreate object with user_id set
+    # (start_time_entry rejects the start atomically if a timer is already running)
     time_entry = TimeEntryCreate(
         user_id=current_user.id,
         task_id=timer_data.task_id,
@@ -311,22 +437,13 @@ def stop_time_timer(
     db: Session = Depends(get_db)
 ):
     """Stop the active timer and create time entry"""
-    active_timer = get_active_timer(db, current_user.id)
-    if not active_timer:
+    # Duration is computed in SQL by the same UPDATE that stops the timer
+    time_entry = stop_active_timer(db, current_user.id)
+    if not time_entry:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No active timer found"
         )
-
-    # Calculate duration and stop timer
-    from datetime import datetime, timezone
-    from ..schemas.time_entry import TimeEntryStop
-
-    end_time = datetime.now(timezone.utc)
-    duration = (end_time - active_timer.start_time).total_seconds() / 60
-
-    stop_data = TimeEntryStop(end_time=end_time, duration_minutes=duration)
-    time_entry = stop_time_entry(db, active_timer.id, stop_data)
     return time_entry
 
 
@@ -342,31 +459,44 @@ def get_active_time_timer(
     return {"active": False, "time_entry": None}
 
 
-# Simple statistics endpoint using existing functions
-@router.get("/statistics")
-def get_time_tracking_statistics(
-    start_date: Optional[date] = Query(
-        None, description="Statistics from this date"),
-    end_date: Optional[date] = Query(
-        None, description="Statistics until this date"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get time tracking statistics for current user"""
-    if start_date and end_date:
-        from datetime import datetime
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        entries = get_time_entries_by_date_range(
-            db, current_user.id, start_datetime, end_datetime)
-    else:
-        entries = get_user_time_entries(db, current_user.id)
+@router.post("/timer/stream-ticket")
+def create_timer_stream_ticket(current_user: User = Depends(get_current_user)):
+    """
+    Single-use ticket for opening /timer/stream?ticket=... from an EventSource,
+    which can't send the Authorization header; expires after a few seconds
+    """
+    return {"ticket": create_stream_ticket(current_user.id), "expires_in": STREAM_TICKET_EXPIRE_SECONDS}
 
-    total_minutes = sum(entry.duration_minutes or 0 for entry in entries)
-    total_entries = len(entries)
 
-    return {
-        "total_time_minutes": total_minutes,
-        "total_entries": total_entries,
-        "entries": entries
-    }
+@router.get("/timer/stream")
+async def stream_timer_events(
+    current_user: User = Depends(get_stream_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events feed of timer changes for the current user and their workspace teammates.
+    Starts with a timer.snapshot of the user's active timer, then timer.started / timer.stopped /
+    timer.updated / timer.deleted as they are committed; timer.resync means events were dropped
+    and /timer/active should be refetched.
+    """
+    workspace_ids = await run_in_threadpool(get_user_workspace_ids, db, current_user.id)
+    # Subscribe before reading the snapshot so nothing committed in between is missed
+    subscription = timer_events.subscribe(current_user.id, workspace_ids)
+    try:
+        active_timer = await run_in_threadpool(get_active_timer, db, current_user.id)
+        snapshot = {
+            "active": active_timer is not None,
+            "time_entry": TimeEntryResponse.model_validate(active_timer).model_dump(mode="json") if active_timer else None
+        }
+    except Exception:
+        timer_events.unsubscribe(subscription)
+        raise
+    finally:
+        # The stream outlives the request's DB work; don't hold a pooled connection for it
+        await run_in_threadpool(db.close)
+
+    return StreamingResponse(
+        timer_event_stream(timer_events, subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
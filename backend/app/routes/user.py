@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
+from typing import List, Optional
 from datetime import datetime
 from ..database import get_db
+from ..unit_of_work import UnitOfWorkRoute
 from ..models.user import User
-from ..schemas.user import UserProfile, UserBasicInfo, UserProfileUpdate, UserDeleteResponse
+from ..schemas.user import UserProfile, UserBasicInfo, UserProfileUpdate, UserDeleteResponse, UserResponse
 from .auth import get_current_user
 from ..crud.user import get_user_by_id_protected, update_user_profile as crud_update_user_profile, soft_delete_user
+from ..crud.user import get_users as crud_get_users
+from ..pagination import set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
-@router.get("/")
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/", response_model=List[UserResponse])
+def get_users(
+    response: Response,
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List users that haven't been deleted (all of them unless cursor or limit is given)"""
+    if cursor and not limit:
+        limit = DEFAULT_PAGE_SIZE
+    users, next_cursor = crud_get_users(db, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return users
 
 # New protected endpoints
 
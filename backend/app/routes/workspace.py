@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, date
 from ..database import get_db
+from ..unit_of_work import UnitOfWorkRoute
 from ..crud.workspace import (
     create_workspace, get_user_workspaces, get_workspace_by_id,
     update_workspace, add_workspace_member,
     remove_workspace_member, check_workspace_permission, get_workspace_members,
-    soft_delete_workspace
+    soft_delete_workspace, get_workspace_members_page
 )
+from ..pagination import set_next_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..export import ExportFormat, stream_time_entries_export
+from ..crud.permissions import get_workspace_access
 from ..schemas.workspace import (
     WorkspaceCreate, WorkspaceResponse, WorkspaceUpdate,
     WorkspaceMemberCreate, WorkspaceMemberResponse, WorkspaceRole
@@ -15,7 +20,7 @@ from ..schemas.workspace import (
 from .auth import get_current_user
 from ..models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 def check_workspace_access(db: Session, workspace_id: str, user_id: str, required_role: WorkspaceRole = WorkspaceRole.MEMBER):
@@ -52,23 +57,26 @@ def check_workspace_access(db: Session, workspace_id: str, user_id: str, require
             detail="Workspace not found"
         )
 
-    # 2-TIER LOGIC: Owner = ADMIN, Members = MEMBER
-    is_owner = workspace.owner_id == user_uuid
+    # Resolve effective role (cached per user and workspace)
+    access = get_workspace_access(db, workspace_uuid, user_uuid)
+    if not access:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workspace not found"
+        )
 
-    if is_owner:
+    # 2-TIER LOGIC: Owner = ADMIN, Members = MEMBER
+    if access.is_owner:
         # Owner is always ADMIN - can do everything
         user_effective_role = WorkspaceRole.ADMIN
+    elif access.is_member:
+        # Any role in DB becomes MEMBER logically
+        user_effective_role = WorkspaceRole.MEMBER
     else:
-        # Check if user is a member (any role in DB becomes MEMBER logically)
-        is_member = check_workspace_permission(
-            db, workspace_uuid, user_uuid, WorkspaceRole.MEMBER)
-        if is_member:
-            user_effective_role = WorkspaceRole.MEMBER
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not a workspace member"
-            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a workspace member"
+        )
 
     # Check if user's effective role meets the requirement
     # Lower number = higher privilege (ADMIN=1, MEMBER=2)
@@ -215,7 +223,12 @@ def add_member_to_workspace(
 
 @router.get("/{workspace_id}/members", response_model=List[WorkspaceMemberResponse])
 def list_workspace_members(
+    response: Response,
     workspace_id: str,
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size (enables cursor pagination)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -224,9 +237,38 @@ def list_workspace_members(
     workspace = check_workspace_access(
         db, workspace_id, current_user.id, WorkspaceRole.MEMBER)
 
+    if cursor or limit:
+        members, next_cursor = get_workspace_members_page(
+            db, workspace.id, cursor, limit or DEFAULT_PAGE_SIZE)
+        set_next_cursor(response, next_cursor)
+        return members
     return get_workspace_members(db, workspace.id)
 
 
+@router.get("/{workspace_id}/export")
+def export_workspace_time_entries(
+    workspace_id: str,
+    format: ExportFormat = Query(ExportFormat.CSV, description="csv or ndjson"),
+    start_date: Optional[date] = Query(
+        None, description="Export entries from this date"),
+    end_date: Optional[date] = Query(
+        None, description="Export entries until this date"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream every time entry in the workspace as CSV or NDJSON (admin only)"""
+    workspace = check_workspace_access(
+        db, workspace_id, current_user.id, WorkspaceRole.ADMIN)
+
+    return stream_time_entries_export(
+        format,
+        filename=f"workspace-{workspace.id}-time-entries",
+        workspace_id=workspace.id,
+        start_date=datetime.combine(start_date, datetime.min.time()) if start_date else None,
+        end_date=datetime.combine(end_date, datetime.max.time()) if end_date else None
+    )
+
+
 @router.delete("/{workspace_id}/members/{user_id}")
 def remove_member_from_workspace(
     workspace_id: str,
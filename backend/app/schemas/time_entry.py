@@ -3,6 +3,7 @@
 
 import uuid
 from datetime import datetime, timezone
+from enum import Enum
 from typing import Optional
 from pydantic import Field
 from .base import BaseSchema, BaseDBSchema
@@ -51,6 +52,19 @@ class TimeEntryUpdate(BaseSchema):
     description: Optional[str] = None
 
 
+class StatisticsGroupBy(str, Enum):
+    """Breakdowns available from /time-entries/statistics"""
+    PROJECT = "project"
+    TASK = "task"
+    DAY = "day"
+
+
+class TimeEntrySortField(str, Enum):
+    """Sortable (non-null) time entry columns, usable with cursor pagination"""
+    START_TIME = "start_time"
+    CREATED_AT = "created_at"
+
+
 class TimeEntryResponse(TimeEntryBase, BaseDBSchema):
     user_id: uuid.UUID
     project_id: uuid.UUID
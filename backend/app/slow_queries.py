@@ -0,0 +1,225 @@
+# Slow statement recorder
+# backend/app/slow_queries.py
+#
+# Statements slower than SLOW_QUERY_MS are kept in a bounded ring buffer with
+# their SQL, parameter shape (names and types, never values), duration and the
+# CRUD/route function that issued them. A sample of them is EXPLAINed on a
+# background thread so the plan that was slow is on record too, without turning
+# on log_min_duration_statement / auto_explain for the whole database.
+
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+try:
+    import greenlet
+except ImportError:  # only installed with SQLAlchemy's asyncio support
+    greenlet = None
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+# Fraction of slow statements that get an EXPLAIN
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.2"))
+# EXPLAIN ANALYZE re-runs the statement, so it's opt-in and limited to plain SELECTs
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "0") == "1"
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+# EXPLAINs waiting or running; further samples are skipped rather than queued
+SLOW_QUERY_MAX_PENDING_EXPLAINS = int(os.getenv("SLOW_QUERY_MAX_PENDING_EXPLAINS", "4"))
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_CALLER_DIRS = tuple(os.path.join(_APP_DIR, name) + os.sep for name in ("crud", "routes"))
+_WRITE_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "MERGE", "TRUNCATE", "CREATE", "ALTER", "DROP", "COPY")
+
+
+def _parameter_type(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Names and types of the bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"executemany": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: _parameter_type(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_parameter_type(value) for value in parameters]
+    return None
+
+
+def _app_caller(frame):
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_CALLER_DIRS):
+            module = os.path.relpath(filename, _APP_DIR)[:-3].replace(os.sep, ".")
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def calling_function():
+    """module.function of the innermost app/crud or app/routes frame on the stack"""
+    caller = _app_caller(sys._getframe(2))
+    if caller is None and greenlet is not None:
+        # Async engine statements run in a greenlet spawned by SQLAlchemy; its parent is
+        # suspended inside the awaiting coroutine chain, which leads back to the CRUD call
+        parent = greenlet.getcurrent().parent
+        if parent is not None:
+            caller = _app_caller(parent.gr_frame)
+    return caller
+
+
+def _explainable(statement: str) -> bool:
+    head = statement.lstrip("( \n\t").upper()
+    return head.startswith(("SELECT", "WITH"))
+
+
+def _read_only(statement: str) -> bool:
+    upper = statement.upper()
+    return upper.lstrip("( \n\t").startswith("SELECT") and not any(
+        f" {keyword} " in f" {upper} " for keyword in _WRITE_KEYWORDS)
+
+
+class SlowQueryRecorder:
+    """Engine listener plus ring buffer of slow statements"""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, buffer_size: int = SLOW_QUERY_BUFFER_SIZE,
+                 explain_sample: float = SLOW_QUERY_EXPLAIN_SAMPLE, explain_analyze: bool = SLOW_QUERY_EXPLAIN_ANALYZE):
+        self.threshold_ms = threshold_ms
+        self.explain_sample = explain_sample
+        self.explain_analyze = explain_analyze
+        self.records = deque(maxlen=buffer_size)
+        self.recorded = 0
+        self.explained = 0
+        self.explain_skipped = 0
+        self._ids = itertools.count(1)
+        self._pending_explains = 0
+        self._executor = None
+        self._explain_engine = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def attach(self, engine, explain: bool = True):
+        """
+        Listen on a sync Engine (async_engine.sync_engine for the async one).
+        EXPLAINs replay the statement with this engine's driver, so only enable
+        explain for the engine whose paramstyle the statements use.
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        if explain:
+            self._explain_engine = engine
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        if duration_ms < self.threshold_ms or getattr(self._local, "explaining", False):
+            return
+
+        record = {
+            "id": next(self._ids),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters": parameter_shape(parameters, executemany),
+            "caller": calling_function(),
+            "rowcount": getattr(cursor, "rowcount", None),
+            "engine": conn.engine.url.drivername,
+            "plan": None,
+            "plan_analyzed": False,
+            "explain_error": None
+        }
+        with self._lock:
+            self.records.append(record)
+            self.recorded += 1
+
+        if (not executemany and conn.engine is self._explain_engine and _explainable(statement)
+                and random.random() < self.explain_sample):
+            self._schedule_explain(record, statement, parameters)
+
+    def _schedule_explain(self, record, statement, parameters):
+        with self._lock:
+            if self._pending_explains >= SLOW_QUERY_MAX_PENDING_EXPLAINS:
+                self.explain_skipped += 1
+                return
+            self._pending_explains += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        # Parameter values only live until the EXPLAIN has run; the record keeps just their shape
+        self._executor.submit(self._explain, record, statement, parameters)
+
+    def _explain(self, record, statement, parameters):
+        analyze = self.explain_analyze and _read_only(statement)
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        self._local.explaining = True
+        try:
+            with self._explain_engine.connect() as conn:
+                with conn.begin() as transaction:
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}")
+                    plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).scalar()
+                    # Nothing an EXPLAIN does should stick
+                    transaction.rollback()
+            record["plan"] = plan
+            record["plan_analyzed"] = analyze
+            with self._lock:
+                self.explained += 1
+        except Exception as e:
+            record["explain_error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            self._local.explaining = False
+            with self._lock:
+                self._pending_explains -= 1
+
+    def snapshot(self, limit: int = None, min_duration_ms: float = None):
+        """Recorded statements, newest first"""
+        with self._lock:
+            records = list(self.records)
+        records.reverse()
+        if min_duration_ms is not None:
+            records = [record for record in records if record["duration_ms"] >= min_duration_ms]
+        return [dict(record) for record in records[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold_ms,
+                "buffered": len(self.records),
+                "buffer_size": self.records.maxlen,
+                "recorded": self.recorded,
+                "explained": self.explained,
+                "explain_skipped": self.explain_skipped,
+                "pending_explains": self._pending_explains,
+                "explain_sample": self.explain_sample,
+                "explain_analyze": self.explain_analyze,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,118 @@
+# Unit of work for request sessions
+# backend/app/unit_of_work.py
+#
+# CRUD writes go through transaction()/commit() instead of calling db.commit()
+# directly. Only the outermost transaction block commits; inside one, commit()
+# just flushes, so a multi-step operation (create_project and its memberships)
+# shares a single transaction and a single COMMIT. Cache invalidations registered
+# with on_commit() run once that commit has happened, and are dropped on rollback.
+#
+# Routers built with UnitOfWorkRoute make the whole request the outermost block:
+# get_db opens it, every CRUD call in the endpoint only flushes, and the request
+# commits once after the endpoint returns - before the response is sent, since
+# FastAPI runs dependency teardown only after that. An endpoint that raises
+# (HTTPException included) commits nothing.
+#
+# Request sessions don't expire objects on commit and models fetch server-generated
+# columns with INSERT/UPDATE ... RETURNING (eager_defaults), so written objects can
+# be returned without a refresh SELECT.
+
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+
+_DEPTH = "unit_of_work_depth"
+_AFTER_COMMIT = "unit_of_work_after_commit"
+_REQUEST_SESSIONS = "unit_of_work_sessions"
+
+
+def in_transaction(db: Session) -> bool:
+    return db.info.get(_DEPTH, 0) > 0
+
+
+@contextmanager
+def transaction(db: Session):
+    """Commit when the outermost block exits, roll back if it raises; nested blocks only flush"""
+    depth = db.info.get(_DEPTH, 0)
+    db.info[_DEPTH] = depth + 1
+    try:
+        yield db
+        if depth:
+            db.flush()
+    except Exception:
+        if not depth:
+            db.info.pop(_AFTER_COMMIT, None)
+            db.rollback()
+        raise
+    finally:
+        db.info[_DEPTH] = depth
+
+    if not depth:
+        _commit_outermost(db)
+
+
+def _commit_outermost(db: Session):
+    try:
+        db.commit()
+    except Exception:
+        db.info.pop(_AFTER_COMMIT, None)
+        db.rollback()
+        raise
+    for callback in db.info.pop(_AFTER_COMMIT, []):
+        callback()
+
+
+def commit(db: Session):
+    """db.commit() outside a transaction block, a flush inside one"""
+    if in_transaction(db):
+        db.flush()
+    else:
+        db.commit()
+
+
+def on_commit(db: Session, callback):
+    """Run callback after the enclosing transaction commits (right away when there is none)"""
+    if in_transaction(db):
+        db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
+def begin_request(request: Request, db: Session):
+    """Hold db in a transaction block until its UnitOfWorkRoute commits it (no-op on other routes)"""
+    sessions = request.scope.get(_REQUEST_SESSIONS)
+    if sessions is not None:
+        db.info[_DEPTH] = db.info.get(_DEPTH, 0) + 1
+        sessions.append(db)
+
+
+def end_request(db: Session):
+    """Close the block begin_request() opened, committing if it was the outermost one"""
+    depth = db.info.get(_DEPTH, 1) - 1
+    db.info[_DEPTH] = depth
+    if depth:
+        db.flush()
+    elif not db.is_active:
+        # The endpoint caught a database error and answered anyway; nothing of it can be committed
+        db.info.pop(_AFTER_COMMIT, None)
+        db.rollback()
+    else:
+        _commit_outermost(db)
+
+
+class UnitOfWorkRoute(APIRoute):
+    """APIRoute committing the request's get_db sessions once, after the endpoint returns"""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request):
+            sessions = request.scope[_REQUEST_SESSIONS] = []
+            response = await handler(request)
+            for db in sessions:
+                await run_in_threadpool(end_request, db)
+            return response
+
+        return unit_of_work_handler
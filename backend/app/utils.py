@@ -1,4 +1,3 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
@@ -10,20 +9,25 @@ from pathlib import Path
 env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(env_path)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (bcrypt runs in the bounded process pool in hashing.py)
+from .hashing import password_hasher
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 RESET_TOKEN_EXPIRE_MINUTES = 15  # Password reset tokens expire in 15 minutes
+STREAM_TICKET_EXPIRE_SECONDS = int(os.getenv("STREAM_TICKET_EXPIRE_SECONDS", "30"))
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """(valid, new_hash) - new_hash is set when the stored hash should be upgraded"""
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -35,16 +39,19 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str):
+def decode_token(token: str):
+    """Return the verified claims of a token, or None if it is invalid or expired"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
+def verify_token(token: str):
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload.get("sub")
+
 
 def create_reset_token(email: str):
     """Create a password reset token for the given email"""
@@ -59,6 +66,25 @@ def create_reset_token(email: str):
     return encoded_jwt
 
 
+def create_stream_ticket(user_id):
+    """Short-lived, single-use token opening one event stream (EventSource can't send headers)"""
+    to_encode = {
+        "sub": str(user_id),
+        "exp": datetime.utcnow() + timedelta(seconds=STREAM_TICKET_EXPIRE_SECONDS),
+        "jti": secrets.token_urlsafe(16),
+        "type": "stream_ticket"
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_stream_ticket(ticket: str):
+    """Claims of a valid, unexpired stream ticket, or None (spending it is up to the caller)"""
+    payload = decode_token(ticket)
+    if payload is None or payload.get("type") != "stream_ticket" or not payload.get("jti"):
+        return None
+    return payload
+
+
 def verify_reset_token(token: str):
     """Verify password reset token and return email if valid"""
     try:
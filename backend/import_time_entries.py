@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Bulk time entry import
+Loads a CSV export (ours, Toggl or Clockify style) for one user via COPY
+Usage: python import_time_entries.py entries.csv --user-email someone@example.com [--workspace-id ID] [--dry-run]
+"""
+import argparse
+import sys
+import os
+import uuid
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.crud.auth import get_user_by_email
+from app.crud.time_entry_import import import_time_entries_csv, DEFAULT_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import time entries from a CSV file")
+    parser.add_argument("csv_path", help="Path to the CSV file")
+    parser.add_argument("--user-email", required=True, help="User the entries belong to")
+    parser.add_argument("--workspace-id", help="Resolve project names within this workspace")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows validated and COPYed per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, don't write anything")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, args.user_email)
+        if not user:
+            print(f"❌ User {args.user_email} not found")
+            return 1
+
+        workspace_id = uuid.UUID(args.workspace_id) if args.workspace_id else None
+
+        with open(args.csv_path, encoding="utf-8-sig", newline="") as csv_file:
+            report = import_time_entries_csv(
+                db, csv_file, user.id, workspace_id=workspace_id,
+                dry_run=args.dry_run, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"Rows read:   {report['rows']}")
+    print(f"Valid rows:  {report['valid']}")
+    if args.dry_run:
+        print("Dry run - nothing was written")
+    else:
+        print(f"✅ Imported: {report['imported']}")
+        print(f"Duplicates skipped: {report['duplicates']}")
+
+    if report["error_count"]:
+        print(f"❌ {report['error_count']} rows rejected:")
+        for error in report["errors"]:
+            print(f"  line {error['row']}: {error['error']}")
+        if report["error_count"] > len(report["errors"]):
+            print(f"  ... and {report['error_count'] - len(report['errors'])} more")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
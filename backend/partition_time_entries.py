@@ -0,0 +1,207 @@
+"""
+Migration script to convert time_entries into a table range-partitioned by month on start_time
+Existing rows are copied into monthly partitions in one transaction (the table is locked meanwhile);
+the old table is kept as time_entries_unpartitioned until you drop it.
+Also creates upcoming partitions and detaches/archives old ones.
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.database import engine
+from app.models.time_entry import TimeEntry
+from app.models.active_timer import ActiveTimer, BACKFILL_ACTIVE_TIMERS_SQL
+from app.partitions import (
+    PARENT_TABLE, ARCHIVE_SCHEMA, is_partitioned, ensure_time_entry_partitions,
+    detach_partitions_before, add_months, month_start
+)
+
+OLD_TABLE = "time_entries_unpartitioned"
+OLD_SUFFIX = "_unpartitioned"
+COLUMNS = ", ".join(column.name for column in TimeEntry.__table__.columns)
+
+
+def table_indexes(conn, table_name):
+    result = conn.execute(text("""
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = 'public' AND tablename = :table;
+    """), {"table": table_name})
+    return [row[0] for row in result.fetchall()]
+
+
+def rename_indexes(conn, table_name, add_suffix: bool):
+    """Index (and primary key) names are schema-wide, so the old table's must move out of the way"""
+    for index_name in table_indexes(conn, table_name):
+        if add_suffix:
+            new_name = (index_name + OLD_SUFFIX)[:63]
+        elif index_name.endswith(OLD_SUFFIX):
+            new_name = index_name[:-len(OLD_SUFFIX)]
+        else:
+            continue
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{new_name}";'))
+
+
+def run_migration():
+    """Swap time_entries for a partitioned table holding the same rows"""
+    try:
+        with engine.begin() as conn:
+            print("Connected to database successfully!")
+
+            if is_partitioned(conn):
+                print("✅ time_entries is already partitioned")
+                return
+
+            conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE;"))
+
+            print("Renaming the current table...")
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {OLD_TABLE};"))
+            rename_indexes(conn, OLD_TABLE, add_suffix=True)
+
+            print("Creating the partitioned table...")
+            TimeEntry.__table__.create(bind=conn)
+            ActiveTimer.__table__.create(bind=conn, checkfirst=True)
+
+            first_start = conn.execute(text(f"SELECT min(start_time) FROM {OLD_TABLE};")).scalar()
+            first_month = first_start.astimezone(timezone.utc).date() if first_start else None
+            created = ensure_time_entry_partitions(conn, first_month=first_month)
+            print(f"✅ Created {len(created)} monthly partitions")
+
+            print("Copying rows...")
+            result = conn.execute(text(f"""
+                INSERT INTO {PARENT_TABLE} ({COLUMNS})
+                SELECT {COLUMNS} FROM {OLD_TABLE};
+            """))
+            print(f"✅ Copied {result.rowcount} time entries")
+
+            # The unique running-timer index can't exist on a partitioned table; active_timers replaces it
+            conn.execute(BACKFILL_ACTIVE_TIMERS_SQL)
+
+            conn.execute(text(f"ANALYZE {PARENT_TABLE};"))
+            print("✅ Migration completed successfully!")
+            print(f"The previous table is kept as {OLD_TABLE}; drop it once you're happy (option 4).")
+
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        print("Make sure your database is running and accessible.")
+
+
+def rollback_migration():
+    """Copy rows back into the unpartitioned table and swap it back in"""
+    try:
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                print("❌ time_entries is not partitioned; nothing to roll back")
+                return
+            if conn.execute(text("SELECT to_regclass(:name);"), {"name": OLD_TABLE}).scalar() is None:
+                print(f"❌ {OLD_TABLE} no longer exists; cannot roll back")
+                return
+
+            print("Rolling back migration...")
+            conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE;"))
+            conn.execute(text(f"DELETE FROM {OLD_TABLE};"))
+            conn.execute(text(f"""
+                INSERT INTO {OLD_TABLE} ({COLUMNS})
+                SELECT {COLUMNS} FROM {PARENT_TABLE};
+            """))
+            conn.execute(text(f"DROP TABLE {PARENT_TABLE} CASCADE;"))
+            conn.execute(text(f"ALTER TABLE {OLD_TABLE} RENAME TO {PARENT_TABLE};"))
+            rename_indexes(conn, PARENT_TABLE, add_suffix=False)
+            print("✅ Rollback completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def create_upcoming_partitions():
+    """Create the next months' partitions now (the app also does this periodically)"""
+    try:
+        with engine.begin() as conn:
+            created = ensure_time_entry_partitions(conn)
+        print(f"✅ Created: {', '.join(created)}" if created else "✅ All partitions already exist")
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def archive_old_partitions(keep_months: int):
+    """Detach partitions older than keep_months into the archive schema"""
+    cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -keep_months)
+    try:
+        with engine.begin() as conn:
+            detached = detach_partitions_before(conn, cutoff)
+        if detached:
+            print(f"✅ Moved to {ARCHIVE_SCHEMA}: {', '.join(detached)}")
+        else:
+            print(f"✅ No partitions older than {cutoff.isoformat()}")
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def drop_old_table():
+    """Drop the pre-migration copy of time_entries"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {OLD_TABLE};"))
+        print(f"✅ Dropped {OLD_TABLE}")
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def check_table_exists():
+    """Check if time_entries table exists"""
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_name = 'time_entries';
+            """))
+
+            tables = [row[0] for row in result.fetchall()]
+            return 'time_entries' in tables
+
+    except Exception as e:
+        print(f"❌ Error checking table: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("=== Time Entries Partitioning Migration ===")
+
+    if not check_table_exists():
+        print("❌ time_entries table does not exist!")
+        print("Please create your database tables first by running your FastAPI app.")
+        exit(1)
+
+    print("1. Run migration (partition time_entries by month)")
+    print("2. Create upcoming partitions now")
+    print("3. Archive old partitions (detach into the archive schema)")
+    print("4. Drop the pre-migration table")
+    print("5. Rollback migration")
+
+    choice = input("Enter your choice (1-5): ").strip()
+
+    if choice == "1":
+        run_migration()
+    elif choice == "2":
+        create_upcoming_partitions()
+    elif choice == "3":
+        months = input("Keep how many months attached? (e.g. 24): ").strip()
+        if months.isdigit() and int(months) > 0:
+            archive_old_partitions(int(months))
+        else:
+            print("Invalid number of months.")
+    elif choice == "4":
+        confirm = input(
+            f"Are you sure? This will permanently drop {OLD_TABLE}! (y/N): ").strip().lower()
+        if confirm == 'y':
+            drop_old_table()
+        else:
+            print("Cancelled.")
+    elif choice == "5":
+        confirm = input(
+            "Are you sure you want to rollback? (y/N): ").strip().lower()
+        if confirm == 'y':
+            rollback_migration()
+        else:
+            print("Rollback cancelled.")
+    else:
+        print("Invalid choice. Please run the script again.")
@@ -0,0 +1,135 @@
+"""
+Migration script for the daily_time_rollups table
+Creates the table, backfills it from time_entries and can rebuild or verify it later
+Run this script against existing databases (fresh databases get the table from create_all)
+"""
+
+import uuid
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.models.daily_time_rollup import DailyTimeRollup
+from app.crud.rollup import rebuild_daily_rollups
+
+# Rollups that disagree with a fresh aggregate of time_entries
+VERIFY_QUERY = """
+    WITH expected AS (
+        SELECT user_id, date(timezone('UTC', start_time)) AS day, project_id, task_id,
+               sum(coalesce(duration_minutes, 0)) AS minutes, count(*) AS entries_count
+        FROM time_entries
+        WHERE is_deleted = false AND end_time IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    ), actual AS (
+        SELECT user_id, day, project_id, task_id, minutes, entries_count
+        FROM daily_time_rollups
+        WHERE entries_count <> 0
+    )
+    SELECT coalesce(e.user_id, a.user_id), coalesce(e.day, a.day),
+           e.minutes, a.minutes, e.entries_count, a.entries_count
+    FROM expected e
+    FULL OUTER JOIN actual a USING (user_id, day, project_id, task_id)
+    WHERE e.entries_count IS DISTINCT FROM a.entries_count
+       OR abs(coalesce(e.minutes, 0) - coalesce(a.minutes, 0)) > 0.001
+    LIMIT 20;
+"""
+
+
+def run_migration():
+    """Create daily_time_rollups and backfill it from existing time entries"""
+    try:
+        DailyTimeRollup.__table__.create(bind=engine, checkfirst=True)
+        print("✅ daily_time_rollups table is ready")
+        rebuild()
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        print("Make sure your database is running and accessible.")
+
+
+def rebuild(user_id: uuid.UUID = None):
+    """Recompute rollups from time_entries (all users, or one user)"""
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_rollups(db, user_id)
+        print(f"✅ Rebuilt {rows} rollup rows")
+    except Exception as e:
+        print(f"❌ Error rebuilding rollups: {e}")
+    finally:
+        db.close()
+
+
+def rollback_migration():
+    """Drop the daily_time_rollups table"""
+    try:
+        DailyTimeRollup.__table__.drop(bind=engine, checkfirst=True)
+        print("✅ Rollback completed successfully!")
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+
+
+def verify_rollups():
+    """Compare rollups against a fresh aggregate of time_entries"""
+    try:
+        with engine.connect() as conn:
+            mismatches = conn.execute(text(VERIFY_QUERY)).fetchall()
+    except Exception as e:
+        print(f"❌ Error verifying rollups: {e}")
+        return False
+
+    if not mismatches:
+        print("✅ Rollups match time_entries")
+        return True
+
+    print("❌ Rollups are out of date (run option 2 to rebuild):")
+    for user_id, day, expected_minutes, actual_minutes, expected_count, actual_count in mismatches:
+        print(f"  - user {user_id} on {day}: expected {expected_count} entries / {expected_minutes} min, "
+              f"found {actual_count} / {actual_minutes}")
+    return False
+
+
+def check_table_exists():
+    """Check if time_entries table exists"""
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT EXISTS (
+                    SELECT FROM information_schema.tables
+                    WHERE table_name = 'time_entries'
+                );
+            """))
+            return result.fetchone()[0]
+    except Exception as e:
+        print(f"❌ Error checking table: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("=== Daily Time Rollups Migration ===")
+
+    if not check_table_exists():
+        print("❌ time_entries table does not exist!")
+        print("Please create your database tables first by running your FastAPI app.")
+        exit(1)
+
+    print("1. Run migration (create table and backfill)")
+    print("2. Rebuild rollups (all users, or one user)")
+    print("3. Verify rollups against time_entries")
+    print("4. Rollback migration (drop table)")
+
+    choice = input("Enter your choice (1, 2, 3, or 4): ").strip()
+
+    if choice == "1":
+        run_migration()
+    elif choice == "2":
+        user_id = input("User ID to rebuild (leave empty for everyone): ").strip()
+        rebuild(uuid.UUID(user_id) if user_id else None)
+    elif choice == "3":
+        if not verify_rollups():
+            exit(1)
+    elif choice == "4":
+        confirm = input(
+            "Are you sure you want to rollback? This will drop daily_time_rollups! (y/N): ").strip().lower()
+        if confirm == 'y':
+            rollback_migration()
+        else:
+            print("Rollback cancelled.")
+    else:
+        print("Invalid choice. Please run the script again.")
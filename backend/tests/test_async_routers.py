@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_unknown_async_router_stops_startup():
+    env = {**os.environ, "ASYNC_ROUTERS": "time_entries,projects"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode != 0
+    assert "Unsupported ASYNC_ROUTERS projects" in result.stderr
@@ -0,0 +1,16 @@
+from passlib.hash import bcrypt
+
+from app import hashing
+
+
+def test_hashes_with_a_different_work_factor_are_upgraded():
+    rounds = hashing.BCRYPT_ROUNDS
+    # Only the rounds field matters to needs_update, so the hashes can be cheap to make
+    lower = bcrypt.using(rounds=4).hash("secret").replace("$04$", f"${rounds - 1:02d}$", 1)
+    higher = lower.replace(f"${rounds - 1:02d}$", f"${rounds + 1:02d}$", 1)
+    current = lower.replace(f"${rounds - 1:02d}$", f"${rounds:02d}$", 1)
+
+    assert hashing.pwd_context.needs_update(lower)
+    assert hashing.pwd_context.needs_update(higher)
+    assert not hashing.pwd_context.needs_update(current)
+
@@ -0,0 +1,50 @@
+import ipaddress
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import hashing
+from app.routes import auth
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(hashing, "ip_limiter", hashing.AttemptLimiter(30, 60))
+    monkeypatch.setattr(hashing, "email_limiter", hashing.AttemptLimiter(5, 60))
+
+
+def test_successful_logins_do_not_use_the_email_budget():
+    for _ in range(20):
+        hashing.admit_password_attempt("10.0.0.1", "user@example.com")
+
+
+def test_failed_logins_block_only_the_failing_client():
+    for _ in range(5):
+        hashing.admit_password_attempt("10.0.0.66", "victim@example.com")
+        hashing.record_failed_password_attempt("10.0.0.66", "Victim@example.com")
+
+    with pytest.raises(HTTPException) as blocked:
+        hashing.admit_password_attempt("10.0.0.66", "victim@example.com")
+    assert blocked.value.status_code == 429
+    # The account owner, elsewhere, can still log in
+    hashing.admit_password_attempt("10.0.0.1", "victim@example.com")
+
+
+def make_request(peer, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": headers, "client": (peer, 1234)})
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(auth, "TRUSTED_PROXIES", [])
+
+    assert auth.client_ip(make_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_client_ip_walks_back_through_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(auth, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+
+    request = make_request("10.0.0.2", "198.51.100.7, 203.0.113.5, 10.0.0.3")
+
+    assert auth.client_ip(request) == "203.0.113.5"
@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.utils import create_access_token
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILING_SECRET", "test-secret")
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        return {"total": sum(i * i for i in range(10000))}
+
+    app.add_middleware(profiling.ProfilingMiddleware, store=profiling.ProfileStore(str(tmp_path)))
+    return TestClient(app)
+
+
+def request_headers(user_id, profile_value=None):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    if profile_value:
+        headers[profiling.PROFILING_HEADER] = profile_value
+    return headers
+
+
+def test_profiles_the_minting_users_request_once(client):
+    admin_id = uuid.uuid4()
+    value = profiling.sign_profile_request("GET", "/work", admin_id)
+
+    first = client.get("/work", headers=request_headers(admin_id, value))
+    replay = client.get("/work", headers=request_headers(admin_id, value))
+
+    assert "x-profile-id" in first.headers
+    assert replay.status_code == 200
+    assert "x-profile-id" not in replay.headers
+
+
+def test_requires_the_minting_users_bearer_token(client):
+    admin_id = uuid.uuid4()
+    value = profiling.sign_profile_request("GET", "/work", admin_id)
+
+    anonymous = client.get("/work", headers={profiling.PROFILING_HEADER: value})
+    other_user = client.get("/work", headers=request_headers(uuid.uuid4(), value))
+
+    assert "x-profile-id" not in anonymous.headers
+    assert "x-profile-id" not in other_user.headers
+
+
+def test_rejects_values_for_another_path(client):
+    admin_id = uuid.uuid4()
+    value = profiling.sign_profile_request("GET", "/other", admin_id)
+
+    response = client.get("/work", headers=request_headers(admin_id, value))
+
+    assert "x-profile-id" not in response.headers
@@ -0,0 +1,30 @@
+import asyncio
+
+from sqlalchemy.util import await_only, greenlet_spawn
+
+from app import slow_queries
+
+# Stand-in for an async CRUD module; only its frames count as app code
+ASYNC_CRUD_SOURCE = """
+async def get_time_entries(run):
+    return await run()
+"""
+
+
+def test_async_engine_statements_are_attributed_to_the_awaiting_crud_function(monkeypatch):
+    monkeypatch.setattr(slow_queries, "_APP_DIR", "/srv/app")
+    monkeypatch.setattr(slow_queries, "_CALLER_DIRS", ("/srv/app/crud/",))
+    namespace = {}
+    exec(compile(ASYNC_CRUD_SOURCE, "/srv/app/crud/async_time_entry.py", "exec"), namespace)
+
+    def after_cursor_execute():
+        return slow_queries.calling_function()
+
+    def execute():
+        # The driver awaits, as asyncpg does, then the engine event fires in the greenlet
+        await_only(asyncio.sleep(0))
+        return after_cursor_execute()
+
+    caller = asyncio.run(namespace["get_time_entries"](lambda: greenlet_spawn(execute)))
+
+    assert caller == "crud.async_time_entry.get_time_entries"
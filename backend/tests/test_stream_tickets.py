@@ -0,0 +1,58 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.crud.auth_cache import get_token_claims
+from app.database import get_db
+from app.routes import auth as auth_routes
+from app.utils import create_access_token, create_stream_ticket
+
+
+@pytest.fixture
+def client(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4())
+    monkeypatch.setattr(auth_routes, "get_cached_user", lambda db, user_id: user if user_id == user.id else None)
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream(current_user=Depends(auth_routes.get_stream_user)):
+        return {"user_id": str(current_user.id)}
+
+    app.dependency_overrides[get_db] = lambda: None
+    client = TestClient(app)
+    client.user = user
+    return client
+
+
+def test_ticket_opens_one_stream(client):
+    ticket = create_stream_ticket(client.user.id)
+
+    first = client.get("/stream", params={"ticket": ticket})
+    replay = client.get("/stream", params={"ticket": ticket})
+
+    assert first.status_code == 200
+    assert first.json() == {"user_id": str(client.user.id)}
+    assert replay.status_code == 401
+
+
+def test_access_token_is_not_accepted_in_the_url(client):
+    token = create_access_token({"sub": str(client.user.id)})
+
+    assert client.get("/stream", params={"ticket": token}).status_code == 401
+    assert client.get("/stream", params={"access_token": token}).status_code == 401
+
+
+def test_bearer_header_still_works(client):
+    token = create_access_token({"sub": str(client.user.id)})
+
+    response = client.get("/stream", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+
+
+def test_ticket_is_not_a_bearer_token(client):
+    assert get_token_claims(create_stream_ticket(client.user.id)) is None
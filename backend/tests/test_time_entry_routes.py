@@ -0,0 +1,43 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes import time_entry
+from app.routes.auth import get_current_user
+
+
+@pytest.fixture
+def client(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4(), is_superuser=False)
+    monkeypatch.setattr(time_entry, "get_user_rollup_totals",
+                        lambda db, user_id, start_day, end_day: (3, 90))
+    monkeypatch.setattr(time_entry, "get_user_rollup_breakdown",
+                        lambda db, user_id, group_by, start_day, end_day: [{"group_by": group_by}])
+
+    app = FastAPI()
+    app.include_router(time_entry.router, prefix="/time-entries")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: None
+    return TestClient(app)
+
+
+def test_statistics_is_not_routed_to_time_entry_id(client):
+    response = client.get("/time-entries/statistics")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_entries"] == 3
+    assert body["total_time_minutes"] == 90
+    assert set(body) >= {"by_project", "by_task", "by_day"}
+
+
+def test_statistics_single_breakdown(client):
+    response = client.get("/time-entries/statistics", params={"group_by": "day"})
+
+    assert response.status_code == 200
+    assert response.json()["by_day"] == [{"group_by": "day"}]
+    assert "by_project" not in response.json()
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, create_engine, event, func, select
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.unit_of_work import UnitOfWorkRoute, begin_request, commit, on_commit
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture
+def setup():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+    commits, callbacks = [], []
+    event.listen(SessionLocal, "after_commit", lambda session: commits.append(session))
+
+    def get_session(request: Request):
+        db = SessionLocal()
+        begin_request(request, db)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    router = APIRouter(route_class=UnitOfWorkRoute)
+
+    @router.post("/items")
+    def create_items(fail: bool = False, db: Session = Depends(get_session)):
+        for item_id in (1, 2):
+            db.add(Item(id=item_id))
+            commit(db)
+            on_commit(db, lambda item_id=item_id: callbacks.append(item_id))
+        if fail:
+            raise HTTPException(status_code=403, detail="Not allowed")
+        return {"ok": True}
+
+    @router.get("/closed")
+    def closes_its_session(db: Session = Depends(get_session)):
+        db.close()
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+
+    def count():
+        with SessionLocal() as db:
+            return db.scalar(select(func.count()).select_from(Item))
+
+    return TestClient(app), commits, callbacks, count
+
+
+def test_request_commits_once_and_then_runs_callbacks(setup):
+    client, commits, callbacks, count = setup
+
+    assert client.post("/items").status_code == 200
+
+    assert len(commits) == 1
+    assert callbacks == [1, 2]
+    assert count() == 2
+
+
+def test_endpoint_that_raises_commits_nothing(setup):
+    client, commits, callbacks, count = setup
+
+    assert client.post("/items", params={"fail": True}).status_code == 403
+
+    assert commits == []
+    assert callbacks == []
+    assert count() == 0
+
+
+def test_endpoint_may_close_its_session_early(setup):
+    client, _, _, _ = setup
+
+    assert client.get("/closed").status_code == 200
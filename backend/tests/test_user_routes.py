@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes import user as user_routes
+from app.routes.auth import get_current_user
+
+
+def make_user(email):
+    return SimpleNamespace(
+        id=uuid.uuid4(), full_name="Test User", email=email, is_active=True, is_superuser=False,
+        hashed_password="$2b$12$not-a-real-hash", created_at=datetime.now(timezone.utc)
+    )
+
+
+@pytest.fixture
+def app(monkeypatch):
+    users = [make_user("a@example.com"), make_user("b@example.com")]
+    calls = []
+
+    def fake_get_users(db, cursor=None, limit=None):
+        calls.append((cursor, limit))
+        return (users[:limit] if limit else users), None
+
+    monkeypatch.setattr(user_routes, "crud_get_users", fake_get_users)
+    app = FastAPI()
+    app.include_router(user_routes.router, prefix="/users")
+    app.dependency_overrides[get_db] = lambda: None
+    app.state.calls = calls
+    return app
+
+
+def test_list_users_requires_authentication(app):
+    response = TestClient(app).get("/users/", params={"limit": 2})
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("params, expected_call", [({}, (None, None)), ({"limit": 1}, (None, 1))])
+def test_list_users_hides_password_hashes(app, params, expected_call):
+    app.dependency_overrides[get_current_user] = lambda: make_user("me@example.com")
+
+    response = TestClient(app).get("/users/", params=params)
+
+    assert response.status_code == 200
+    assert all("hashed_password" not in user for user in response.json())
+    assert app.state.calls == [expected_call]